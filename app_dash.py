@@ -3,65 +3,359 @@
 Layout: sidebar (bộ lọc), nhiều trang với biểu đồ có animation.
 """
 
+import itertools
+import json
+import os
 import sys
+import threading
+import time
 from pathlib import Path
 
+# Mốc bắt đầu import (hồ sơ khởi động: STARTUP_PROFILE, python benchmark.py --startup)
+_IMPORT_STARTED = time.perf_counter()
+
 ROOT = Path(__file__).resolve().parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+import numpy as np
 import pandas as pd
 import dash
-from dash import dcc, html, dash_table, Input, Output, State
+from dash import dcc, html, dash_table, ctx, no_update, Input, Output, Patch, State
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import plotly.graph_objects as go
 from dash.exceptions import PreventUpdate
 
 from core.file import FileManager
-from core.data_cleaner import DataCleaner
-from core.analysis import DataAnalysis
+from core.cache import LRUCache, MemoryBudget, estimate_size
+from core.client_aggregate import build_count_aggregate
+from core.loader import SingleFlightLoader
+from core.watcher import FileWatcher
+from core.metadata import build_metadata, read_metadata, write_metadata
+from core.table_query import filter_rows, parse_filter_query, sort_order
+from core.codes import (
+    AGE_BINS,
+    AGE_GROUP_COLUMN,
+    CODE_COLUMNS,
+    DIMENSION_CODE_COLUMNS,
+    REGION_COLUMN,
+    bin_codes,
+    dimension_codes,
+    region_categorical,
+)
+
+# Giai đoạn khởi động -> giây (trả về trong /healthz)
+STARTUP_PROFILE = {"imports": round(time.perf_counter() - _IMPORT_STARTED, 3)}
 
 # ============== Load & cache dữ liệu (chỉ load 1 lần mỗi nguồn) ==============
-_DATA_CACHE = {"cleaned": None, "raw": None}
+CLEANED_CSV = ROOT / "output" / "csv" / "cleaned_data.csv"
+DATA_SOURCES = {True: "cleaned", False: "raw"}
+
+def _attach_age_groups(df, noc_regions=None):
+    """
+    Gắn cột mã nhóm tuổi + mã các chiều group-by 1 lần khi load (file cũ / dữ liệu gốc chưa có).
+    Region: file đã làm sạch mang sẵn (chuyển lại categorical); dữ liệu gốc join từ noc_regions nếu có.
+    """
+    if df is not None and AGE_GROUP_COLUMN not in df.columns and "Age" in df.columns:
+        df[AGE_GROUP_COLUMN] = bin_codes(df["Age"], AGE_BINS)
+    elif df is not None and AGE_GROUP_COLUMN in df.columns:
+        df[AGE_GROUP_COLUMN] = df[AGE_GROUP_COLUMN].astype("int8")
+    if df is not None and REGION_COLUMN in df.columns:
+        df[REGION_COLUMN] = df[REGION_COLUMN].astype("category")
+    elif df is not None and noc_regions is not None and "NOC" in df.columns:
+        noc_values = np.sort(df["NOC"].dropna().unique())
+        df[REGION_COLUMN] = region_categorical(dimension_codes(df["NOC"]), noc_values, noc_regions)
+    if df is not None:
+        # Mã tính trên toàn bộ dataset -> khung đã lọc vẫn dùng lại được
+        for dimension, column in DIMENSION_CODE_COLUMNS.items():
+            if dimension in df.columns and column not in df.columns:
+                df[column] = dimension_codes(df[dimension])
+            elif column in df.columns:
+                df[column] = df[column].astype("int32")
+    return df
 
-def _load_data_impl(use_cleaned=True):
-    """Load từ file/cleaning — gọi trực tiếp chỉ khi cache miss."""
-    cleaned_path = ROOT / "output" / "csv" / "cleaned_data.csv"
-    if use_cleaned and cleaned_path.exists():
-        return pd.read_csv(cleaned_path)
+def _load_data_impl(use_cleaned=True, report=lambda stage: None):
+    """Load từ file/cleaning — gọi trực tiếp chỉ khi cache miss; report("...") báo giai đoạn đang chạy."""
+    if use_cleaned and CLEANED_CSV.exists():
+        report("Đọc cleaned_data.csv")
+        df = pd.read_csv(CLEANED_CSV)
+        report("Gắn mã nhóm tuổi / chiều group-by")
+        return _attach_age_groups(df)
     fm = FileManager("data/athlete_events.csv")
+    report("Đọc athlete_events.csv")
     df = fm.read_file()
+    noc_regions = fm.read_noc_regions()
     if use_cleaned:
+        # Chỉ cần khi chưa có file đã làm sạch -> import muộn
+        from core.data_cleaner import DataCleaner
+        report("Làm sạch dữ liệu")
         cleaner = DataCleaner(df)
-        cleaner.run_full_olympic_cleaning()
+        cleaner.run_full_olympic_cleaning(noc_regions=noc_regions)
         return cleaner.get_data()
-    return df
+    report("Gắn mã nhóm tuổi / chiều group-by")
+    return _attach_age_groups(df, noc_regions)
+
+class DataGeneration:
+    """
+    1 thế hệ dữ liệu của 1 nguồn: dataset đã nạp + số thế hệ (tăng mỗi lần nạp / nạp lại).
+    Phân tích đầy đủ và kết quả đã cache gắn với thế hệ -> nạp lại thay cả cụm 1 lần,
+    request đang chạy giữ thế hệ nó đã lấy.
+    """
+
+    _numbers = itertools.count(1)
+
+    def __init__(self, source, dataframe):
+        self.source = source
+        self.number = next(DataGeneration._numbers)
+        self.dataframe = dataframe
+
+    def __repr__(self):
+        return f"DataGeneration({self.source!r}, #{self.number}, {len(self.dataframe):,} dòng)"
+
+def _load_dataset(key, report):
+    print(f"[Cache] Đang tải dữ liệu {'đã làm sạch' if key == 'cleaned' else 'gốc'}...")
+    return DataGeneration(key, _load_data_impl(key == "cleaned", report))
+
+def _drop_stale(key, keep=None):
+    """Bỏ phân tích / kết quả của nguồn key thuộc thế hệ khác keep (None = mọi thế hệ)."""
+    for generation in ANALYSIS_LOADER.values():
+        if generation.source == key and generation.number != keep:
+            ANALYSIS_LOADER.evict(generation)
+    _RESULT_CACHE.invalidate(lambda k: k[1][0] == (key == "cleaned") and k[2] != keep)
+
+def _dataset_loaded(key, generation, seconds):
+    # Kết quả tính trên lần nạp trước (nếu có) không còn đúng -> bỏ trước khi công bố thế hệ mới
+    _drop_stale(key, generation.number)
+    STARTUP_PROFILE.setdefault(f"dataset_{key}", round(seconds, 3))
+    print(f"[Cache] Xong. {len(generation.dataframe):,} dòng (thế hệ #{generation.number}).")
+
+def _dataset_evicted(key):
+    # Phân tích và kết quả của nguồn này giữ tham chiếu tới dataset cũ -> bỏ theo để bộ nhớ được trả lại
+    _drop_stale(key)
+    print(f"[Cache] Bỏ dữ liệu {key} khỏi bộ nhớ (ngân sách / không dùng lâu)")
+
+# Single-flight: luồng nạp nền và các callback cùng xin 1 nguồn -> 1 lần nạp, các luồng khác chờ
+DATA_LOADER = SingleFlightLoader(
+    _load_dataset, on_loaded=_dataset_loaded,
+    sizeof=lambda key, generation: estimate_size(generation.dataframe), on_evicted=_dataset_evicted,
+)
+
+def create_analysis(dataframe):
+    # core.engine kéo theo duckdb (nếu cài) -> import ở lần phân tích đầu tiên, không lúc khởi động
+    from core.engine import create_analysis as create
+    return create(dataframe)
+
+# Khóa = DataGeneration: mỗi thế hệ 1 phân tích. Kích thước = phần dựng thêm (khối đếm, prefix sums,
+# chỉ mục tìm kiếm...), không tính dataset
+ANALYSIS_LOADER = SingleFlightLoader(
+    lambda generation, report: create_analysis(generation.dataframe),
+    sizeof=lambda generation, analysis: estimate_size(analysis, shared=[generation.dataframe]),
+    keep_state=False,
+)
+
+def current_generation(use_cleaned=True):
+    """Thế hệ dữ liệu hiện tại của nguồn; chưa có thì nạp 1 lần (hoặc chờ lượt nạp đang chạy)."""
+    return DATA_LOADER.get(DATA_SOURCES[bool(use_cleaned)])
+
+def get_cached_analysis(use_cleaned=True, generation=None):
+    """DataAnalysis trên toàn bộ dataset (giữ prefix sums theo năm giữa các callback)."""
+    return ANALYSIS_LOADER.get(generation or current_generation(use_cleaned))
 
 def get_cached_data(use_cleaned=True):
-    """Lấy dataframe đã cache; nếu chưa có thì load 1 lần rồi cache."""
-    key = "cleaned" if use_cleaned else "raw"
-    if _DATA_CACHE[key] is None:
-        label = "đã làm sạch" if use_cleaned else "gốc"
-        print(f"[Cache] Đang tải dữ liệu {label} (chỉ lần đầu)...")
-        _DATA_CACHE[key] = _load_data_impl(use_cleaned)
-        print(f"[Cache] Xong. {len(_DATA_CACHE[key]):,} dòng.")
-    return _DATA_CACHE[key]
-
-# Load dữ liệu đã làm sạch 1 lần khi khởi động (dùng cho layout + dropdown)
-df_global = get_cached_data(use_cleaned=True)
-if df_global is None or df_global.empty:
-    raise FileNotFoundError("Không tìm thấy dữ liệu. Đảm bảo có file `data/athlete_events.csv`.")
+    """Lấy dataframe đã cache; nếu chưa có thì load 1 lần (hoặc chờ lượt nạp đang chạy) rồi cache."""
+    return current_generation(use_cleaned).dataframe
+
+def dataset_status():
+    """Trạng thái nạp từng nguồn (status, stage, elapsed / seconds, error, rows, thế hệ) cho /healthz và sidebar."""
+    status = {key: {"status": "idle"} for key in DATA_SOURCES.values()}
+    status.update(DATA_LOADER.state())
+    for key, generation in DATA_LOADER.values().items():
+        status[key].update(rows=len(generation.dataframe), generation=generation.number)
+    return status
+
+# ============== Cache kết quả theo bộ lọc (LRU giới hạn bộ nhớ) ==============
+RESULT_CACHE_MB = int(os.environ.get("OLYMPIC_RESULT_CACHE_MB", "256"))
+def _shared_objects():
+    """Dataset / phân tích đầy đủ được cache riêng -> không tính vào dung lượng từng mục."""
+    return [*(g.dataframe for g in DATA_LOADER.values().values()), *ANALYSIS_LOADER.values().values()]
+
+_RESULT_CACHE = LRUCache(RESULT_CACHE_MB * 1024 * 1024, sizeof=lambda value: estimate_size(value, shared=_shared_objects()))
+
+# ============== Ngân sách bộ nhớ chung (dataset + phân tích + cache kết quả) ==============
+MEMORY_BUDGET_MB = int(os.environ.get("OLYMPIC_MEMORY_MB", "1024"))
+# Mục phụ không dùng quá số giây này bị bỏ dù còn ngân sách (0 = tắt), vd. dữ liệu gốc hiếm khi chọn.
+# Dataset đã làm sạch + phân tích của nó không bị bỏ vì idle (request sau sẽ phải nạp lại đồng bộ,
+# worker gunicorn mất trang bộ nhớ dùng chung), chỉ bị bỏ khi vượt ngân sách byte.
+IDLE_EVICT_SECONDS = int(os.environ.get("OLYMPIC_IDLE_EVICT_SECONDS", "1800"))
+MEMORY_CHECK_SECONDS = int(os.environ.get("OLYMPIC_MEMORY_CHECK_SECONDS", "10"))
+MEMORY_BUDGET = MemoryBudget(MEMORY_BUDGET_MB * 1024 * 1024, idle_seconds=IDLE_EVICT_SECONDS or None)
+MEMORY_BUDGET.register("datasets", DATA_LOADER, idle_exempt=lambda key: key == "cleaned")
+MEMORY_BUDGET.register("analyses", ANALYSIS_LOADER, idle_exempt=lambda generation: generation.source == "cleaned")
+MEMORY_BUDGET.register("results", _RESULT_CACHE)
+MEMORY_BUDGET.start(MEMORY_CHECK_SECONDS)
+
+def filter_key(use_cleaned, years, year_range, nocs, sports, sexes, medals, text_query):
+    """Bộ lọc chuẩn hóa (list -> tuple đã sắp xếp) làm khóa cache; thứ tự chọn không đổi khóa."""
+    def norm(values):
+        return tuple(sorted(values)) if values else ()
+    return (
+        bool(use_cleaned), norm(years), tuple(year_range) if year_range is not None else None,
+        norm(nocs), norm(sports), norm(sexes), norm(medals), (text_query or "").strip(),
+    )
+
+def _filter_data(filters, generation):
+    use_cleaned, years, year_range, nocs, sports, sexes, medals, text_query = filters
+    df = generation.dataframe
+    if text_query:
+        # Chỉ mục ngược Event/Team trên dataset đầy đủ -> vị trí dòng, áp trước các bộ lọc khác
+        df = df.iloc[get_cached_analysis(generation=generation).text_index().rows(text_query)]
+    if years:
+        df = df[df['Year'].isin(years)]
+    if year_range is not None:
+        df = df[df['Year'].between(year_range[0], year_range[1])]
+    if nocs:
+        df = df[df['NOC'].isin(nocs)]
+    if sports:
+        df = df[df['Sport'].isin(sports)]
+    if sexes:
+        df = df[df['Sex'].isin(sexes)]
+    if medals:
+        df = df[df['Medal'].isin(medals)]
+    return df
+
+def filtered_analysis(filters, generation=None):
+    """
+    DataAnalysis trên dữ liệu đã lọc, cache theo (bộ lọc, thế hệ dữ liệu): đổi tab giữ nguyên các khối
+    đếm, sketch... đã tính. Không lọc gì -> dùng phân tích đầy đủ đã cache.
+    """
+    generation = generation or current_generation(filters[0])
+    if not any(filters[1:]):
+        return get_cached_analysis(generation=generation)
+    return _RESULT_CACHE.get_or_compute(("analysis", filters, generation.number), lambda: create_analysis(_filter_data(filters, generation)))
+
+def invalidate_dataset(use_cleaned=None):
+    """Bỏ dataset / phân tích / kết quả đã cache của 1 nguồn (None = mọi nguồn) khi dữ liệu nạp lại."""
+    for source in ([True, False] if use_cleaned is None else [bool(use_cleaned)]):
+        DATA_LOADER.invalidate(DATA_SOURCES[source])
+        _drop_stale(DATA_SOURCES[source])
+
+def cache_stats():
+    return dict(_RESULT_CACHE.stats(), memory=MEMORY_BUDGET.stats())
+
+# ============== Background callback (diskcache) ==============
+# Tùy chọn (OLYMPIC_BACKGROUND_CALLBACKS=1): figure nặng (dữ liệu gốc, không lọc, chưa có trong cache)
+# tính trong tiến trình nền: không giữ thread Flask, job cũ bị hủy khi input đổi, kết quả lưu trên đĩa
+# nên còn sau khi khởi động lại worker. Cần: pip install "dash[diskcache]"
+try:
+    import diskcache
+    HAS_DISKCACHE = True
+except ImportError:
+    HAS_DISKCACHE = False
+
+BACKGROUND_CALLBACKS = os.environ.get("OLYMPIC_BACKGROUND_CALLBACKS", "0") == "1"
+CALLBACK_CACHE_DIR = Path(os.environ.get("OLYMPIC_CALLBACK_CACHE_DIR", ROOT / "output" / "cache" / "callbacks"))
+# Hạn giữ kết quả trên đĩa (giây)
+CALLBACK_CACHE_EXPIRE = int(os.environ.get("OLYMPIC_CALLBACK_CACHE_EXPIRE", str(7 * 24 * 3600)))
+
+def raw_data_files():
+    """Đường dẫn các file dữ liệu gốc đang có (athlete_events.csv, noc_regions.csv)."""
+    paths = []
+    for relative in ("data/athlete_events.csv", "data/noc_regions.csv"):
+        try:
+            paths.append(FileManager(relative).file_path)
+        except FileNotFoundError:
+            pass
+    return paths
+
+def callback_cache_token():
+    """
+    (tên, mtime, size) của file dữ liệu nguồn + mã dashboard: thêm vào khóa cache đĩa,
+    dữ liệu hoặc code đổi thì kết quả cũ không còn được dùng.
+    """
+    paths = [CLEANED_CSV, Path(__file__).resolve(), *raw_data_files()]
+    return [(p.name, p.stat().st_mtime_ns, p.stat().st_size) for p in paths if p.exists()]
+
+def _background_manager():
+    if not (BACKGROUND_CALLBACKS and HAS_DISKCACHE):
+        return None
+    try:
+        from dash import DiskcacheManager
+        CALLBACK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return DiskcacheManager(diskcache.Cache(str(CALLBACK_CACHE_DIR)), cache_by=[callback_cache_token], expire=CALLBACK_CACHE_EXPIRE)
+    except ImportError as e:
+        # DiskcacheManager còn cần multiprocess + psutil
+        print(f"[Background] Thiếu thư viện ({e}) -> callback chạy đồng bộ")
+        return None
+
+BACKGROUND_MANAGER = _background_manager()
+
+# Lọc phía trình duyệt (OLYMPIC_CLIENT_FILTERING=1): các biểu đồ đếm tự gộp lại từ bảng đếm gửi 1 lần
+CLIENT_FILTERING = os.environ.get("OLYMPIC_CLIENT_FILTERING", "0") == "1"
+
+# ============== Metadata cho layout (dropdown, khoảng năm, số dòng) ==============
+# Nguồn nạp nền ngay khi khởi động: mặc định "cleaned" (dữ liệu gốc nạp ở lần chọn đầu tiên),
+# "raw" / "cleaned,raw" = danh sách nguồn, 1 = cả 2, 0 = chỉ nạp ở callback đầu tiên
+_PRELOAD = os.environ.get("OLYMPIC_PRELOAD", "cleaned")
+PRELOAD_SOURCES = [] if _PRELOAD == "0" else (
+    list(DATA_SOURCES.values()) if _PRELOAD == "1"
+    else [key for key in map(str.strip, _PRELOAD.split(",")) if key in DATA_SOURCES.values()]
+)
+
+def _dataset_metadata(df=None):
+    """
+    Metadata từ file kèm cleaned_data.csv (main.py ghi) nếu còn khớp dấu vân tay: layout dựng
+    ngay, không cần nạp dataset. Không có / lệch -> tính từ df (None = nạp đồng bộ) rồi ghi lại cho lần sau.
+    """
+    metadata = read_metadata(CLEANED_CSV)
+    if metadata is not None:
+        return metadata
+    if df is None:
+        df = get_cached_data(use_cleaned=True)
+    if df is None or df.empty:
+        raise FileNotFoundError("Không tìm thấy dữ liệu. Đảm bảo có file `data/athlete_events.csv`.")
+    if CLEANED_CSV.exists():
+        try:
+            write_metadata(df, CLEANED_CSV)
+        except OSError as e:
+            print(f"[Metadata] Không ghi được file metadata: {e}")
+    return build_metadata(df)
+
+_started = time.perf_counter()
+DATASET_METADATA = _dataset_metadata()
+STARTUP_PROFILE["metadata"] = round(time.perf_counter() - _started, 3)
+DATA_LOADER.preload(PRELOAD_SOURCES)
+
+DEFAULT_TOP_N = 15
+YEAR_MIN = DATASET_METADATA["year_min"]
+YEAR_MAX = DATASET_METADATA["year_max"]
 
 # ============== Tạo app Dash (Bootstrap) ==============
 app = dash.Dash(
     __name__,
     external_stylesheets=[dbc.themes.FLATLY],
     meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
+    # Component của tab VĐV chỉ có khi tab được render
+    suppress_callback_exceptions=True,
 )
 
 app.title = "🏅 Olympic Data Explorer"
 
+@app.server.route("/cache/stats")
+def result_cache_stats():
+    """Số liệu cache kết quả: hit/miss, tỷ lệ hit, số mục, dung lượng, eviction (+ ngân sách bộ nhớ chung)."""
+    return cache_stats()
+
+# Trạng thái sẵn sàng (warmup() cập nhật); /healthz trả 503 cho tới khi warmup xong
+READINESS = {"ready": False, "warmup_seconds": None, "figures": 0, "errors": []}
+
+@app.server.route("/healthz")
+def healthz():
+    """Readiness cho load balancer / main.py: 200 khi dữ liệu + cache đã sẵn sàng, 503 khi đang warmup."""
+    datasets = dataset_status()
+    status = dict(READINESS, pid=os.getpid(), rows=datasets["cleaned"].get("rows", 0), datasets=datasets, startup=STARTUP_PROFILE)
+    return status, 200 if READINESS["ready"] else 503
+
 # CSS Reset: loại bỏ padding/margin mặc định
 app.index_string = '''
 <!DOCTYPE html>
@@ -88,6 +382,10 @@ app.index_string = '''
                 margin: 0;
                 padding: 0;
             }
+            .graph-computing {
+                opacity: 0.45;
+                transition: opacity 0.2s;
+            }
             .container-fluid.p-0, .container-fluid {
                 padding-left: 0 !important;
                 padding-right: 0 !important;
@@ -107,210 +405,435 @@ app.index_string = '''
 '''
 
 # ============== Layout ==============
-sidebar = dbc.Card([
-    dbc.CardHeader(html.H5("🔍 Bộ lọc", className="mb-0 fw-bold text-primary")),
-    dbc.CardBody([
-        html.Label("Nguồn dữ liệu", className="fw-semibold small text-muted"),
-        dcc.RadioItems(
-            id='data-source',
-            options=[
-                {'label': ' Đã làm sạch (khuyến nghị)', 'value': True},
-                {'label': ' Dữ liệu gốc', 'value': False}
-            ],
-            value=True,
-            className="mb-3",
-            inputStyle={"marginRight": "6px"}
-        ),
-        html.Label("Năm", className="fw-semibold small text-muted"),
-        dcc.Dropdown(
-            id='year-filter',
-            options=[{'label': str(y), 'value': y} for y in sorted(df_global['Year'].dropna().unique())],
-            multi=True,
-            placeholder="Tất cả năm",
-            className="mb-3"
-        ),
-        html.Label("Quốc gia (NOC)", className="fw-semibold small text-muted"),
-        dcc.Dropdown(
-            id='noc-filter',
-            options=[{'label': n, 'value': n} for n in sorted(df_global['NOC'].dropna().unique())],
-            multi=True,
-            placeholder="Tất cả quốc gia",
-            className="mb-3"
-        ),
-        html.Label("Môn thể thao", className="fw-semibold small text-muted"),
-        dcc.Dropdown(
-            id='sport-filter',
-            options=[{'label': s, 'value': s} for s in sorted(df_global['Sport'].dropna().unique())],
-            multi=True,
-            placeholder="Tất cả môn",
-            className="mb-3"
-        ),
-        html.Label("Giới tính", className="fw-semibold small text-muted"),
-        dcc.Dropdown(
-            id='sex-filter',
-            options=[{'label': s, 'value': s} for s in sorted(df_global['Sex'].dropna().unique())],
-            multi=True,
-            placeholder="Tất cả",
-            className="mb-3"
-        ),
-        html.Label("Huy chương", className="fw-semibold small text-muted"),
-        dcc.Dropdown(
-            id='medal-filter',
-            options=[{'label': m, 'value': m} for m in sorted(df_global['Medal'].dropna().unique())],
-            multi=True,
-            placeholder="Tất cả",
-            className="mb-3"
-        ),
-        html.Label("Top N", className="fw-semibold small text-muted"),
-        dcc.Slider(
-            id='top-n',
-            min=5,
-            max=30,
-            step=5,
-            value=15,
-            marks={i: str(i) for i in range(5, 31, 5)},
-            tooltip={"placement": "bottom", "always_visible": True}
-        ),
-        dbc.CardFooter(html.Small(f"📊 {len(df_global):,} bản ghi", className="text-muted"))
-    ])
-], className="shadow-sm")
-
-app.layout = dbc.Container([
-    # Navbar
-    dbc.Navbar(
-        dbc.Container([
-            dbc.NavbarBrand("🏅 Olympic Data Explorer", className="fw-bold fs-4"),
-            dbc.NavbarToggler(id="navbar-toggler"),
-        ], fluid=True),
-        color="primary",
-        dark=True,
-        className="mb-3 shadow",
-        style={"marginBottom": "0.5rem"},
-    ),
-    dbc.Row([
-        dbc.Col(sidebar, md=3, className="mb-4"),
-        dbc.Col([
-            dbc.Tabs(
-                id='main-tabs',
-                className="nav-fill nav-pills",
-                children=[
-                    dbc.Tab(label="Tổng quan", tab_id='overview', label_style={"fontWeight": "600"}),
-                    dbc.Tab(label="Huy chương", tab_id='medals', label_style={"fontWeight": "600"}),
-                    dbc.Tab(label="Giới tính", tab_id='gender', label_style={"fontWeight": "600"}),
-                    dbc.Tab(label="Tuổi", tab_id='age', label_style={"fontWeight": "600"}),
-                    dbc.Tab(label="Thể chất", tab_id='physique', label_style={"fontWeight": "600"}),
-                    dbc.Tab(label="Bảng dữ liệu", tab_id='data', label_style={"fontWeight": "600"}),
+def build_sidebar(metadata):
+    year_min, year_max = metadata["year_min"], metadata["year_max"]
+    return dbc.Card([
+        dbc.CardHeader(html.H5("🔍 Bộ lọc", className="mb-0 fw-bold text-primary")),
+        dbc.CardBody([
+            html.Label("Nguồn dữ liệu", className="fw-semibold small text-muted"),
+            dcc.RadioItems(
+                id='data-source',
+                options=[
+                    {'label': ' Đã làm sạch (khuyến nghị)', 'value': True},
+                    {'label': ' Dữ liệu gốc', 'value': False}
+                ],
+                value=True,
+                className="mb-1",
+                inputStyle={"marginRight": "6px"}
+            ),
+            # Tiến độ nạp dataset nền: hỏi lại mỗi giây cho tới khi nguồn đang chọn đã sẵn sàng
+            html.Small(id='dataset-status', className="text-muted d-block mb-3"),
+            dcc.Interval(id='dataset-poll', interval=1000),
+            html.Label("Nội dung / Đội", className="fw-semibold small text-muted"),
+            dcc.Input(
+                id='text-search',
+                type='search',
+                debounce=True,
+                placeholder="vd. relay, doubles, 4 x 100",
+                className="form-control form-control-sm",
+            ),
+            html.Small(id='text-search-info', className="text-muted d-block mb-3"),
+            html.Label("Năm", className="fw-semibold small text-muted"),
+            dcc.Dropdown(
+                id='year-filter',
+                options=[{'label': str(y), 'value': y} for y in metadata['years']],
+                multi=True,
+                placeholder="Tất cả năm",
+                className="mb-3"
+            ),
+            html.Label("Khoảng năm", className="fw-semibold small text-muted"),
+            dcc.RangeSlider(
+                id='year-range',
+                min=year_min,
+                max=year_max,
+                step=1,
+                value=[year_min, year_max],
+                marks={y: str(y) for y in range(year_min - year_min % 20 + 20, year_max + 1, 20)},
+                tooltip={"placement": "bottom", "always_visible": False},
+                className="mb-3"
+            ),
+            html.Label("Quốc gia (NOC)", className="fw-semibold small text-muted"),
+            dcc.Dropdown(
+                id='noc-filter',
+                options=[{'label': n, 'value': n} for n in metadata['nocs']],
+                multi=True,
+                placeholder="Tất cả quốc gia",
+                className="mb-2"
+            ),
+            dcc.RadioItems(
+                id='country-level',
+                options=[
+                    {'label': ' Theo NOC', 'value': 'NOC'},
+                    {'label': ' Theo khu vực', 'value': REGION_COLUMN, 'disabled': not metadata['has_region']},
                 ],
-                active_tab='overview',
+                value='NOC',
+                inline=True,
+                className="mb-3 small",
+                inputStyle={"marginRight": "4px", "marginLeft": "8px"}
+            ),
+            html.Label("Môn thể thao", className="fw-semibold small text-muted"),
+            dcc.Dropdown(
+                id='sport-filter',
+                options=[{'label': s, 'value': s} for s in metadata['sports']],
+                multi=True,
+                placeholder="Tất cả môn",
+                className="mb-3"
             ),
-            dcc.Loading(html.Div(id='tab-content', className="mt-4"), type="circle", fullscreen=False),
-        ], md=9),
-    ], className="g-4"),
-], fluid=True, className="p-0")
+            html.Label("Giới tính", className="fw-semibold small text-muted"),
+            dcc.Dropdown(
+                id='sex-filter',
+                options=[{'label': s, 'value': s} for s in metadata['sexes']],
+                multi=True,
+                placeholder="Tất cả",
+                className="mb-3"
+            ),
+            html.Label("Huy chương", className="fw-semibold small text-muted"),
+            dcc.Dropdown(
+                id='medal-filter',
+                options=[{'label': m, 'value': m} for m in metadata['medals']],
+                multi=True,
+                placeholder="Tất cả",
+                className="mb-3"
+            ),
+            html.Label("Top N", className="fw-semibold small text-muted"),
+            dcc.Slider(
+                id='top-n',
+                min=5,
+                max=30,
+                step=5,
+                value=DEFAULT_TOP_N,
+                marks={i: str(i) for i in range(5, 31, 5)},
+                tooltip={"placement": "bottom", "always_visible": True}
+            ),
+            dbc.CardFooter(html.Small(f"📊 {metadata['rows']:,} bản ghi", className="text-muted"))
+        ])
+    ], className="shadow-sm")
+
+def serve_layout():
+    """Layout dựng lại mỗi lần tải trang: dropdown, khoảng năm theo thế hệ dữ liệu hiện tại (nạp lại nóng)."""
+    return dbc.Container([
+        # Navbar
+        dbc.Navbar(
+            dbc.Container([
+                dbc.NavbarBrand("🏅 Olympic Data Explorer", className="fw-bold fs-4"),
+                dbc.NavbarToggler(id="navbar-toggler"),
+            ], fluid=True),
+            color="primary",
+            dark=True,
+            className="mb-3 shadow",
+            style={"marginBottom": "0.5rem"},
+        ),
+        dbc.Row([
+            dbc.Col(build_sidebar(DATASET_METADATA), md=3, className="mb-4"),
+            dbc.Col([
+                dbc.Tabs(
+                    id='main-tabs',
+                    className="nav-fill nav-pills",
+                    children=[
+                        dbc.Tab(label="Tổng quan", tab_id='overview', label_style={"fontWeight": "600"}),
+                        dbc.Tab(label="Huy chương", tab_id='medals', label_style={"fontWeight": "600"}),
+                        dbc.Tab(label="Giới tính", tab_id='gender', label_style={"fontWeight": "600"}),
+                        dbc.Tab(label="Tuổi", tab_id='age', label_style={"fontWeight": "600"}),
+                        dbc.Tab(label="Thể chất", tab_id='physique', label_style={"fontWeight": "600"}),
+                        dbc.Tab(label="Tương đồng", tab_id='similar', label_style={"fontWeight": "600"}),
+                        dbc.Tab(label="Vận động viên", tab_id='athlete', label_style={"fontWeight": "600"}),
+                        dbc.Tab(label="Bảng dữ liệu", tab_id='data', label_style={"fontWeight": "600"}),
+                    ],
+                    active_tab='overview',
+                ),
+                html.Div(id='filter-status', className="mt-4"),
+                dcc.Loading(html.Div(id='tab-content', className="mt-2"), type="circle", fullscreen=False),
+            ], md=9),
+        ], className="g-4"),
+        # Số thế hệ của nguồn đang chọn (đổi khi nạp xong / nạp lại nóng)
+        dcc.Store(id='data-generation'),
+        *([dcc.Store(id='client-aggregate')] if CLIENT_FILTERING else []),
+    ], fluid=True, className="p-0")
+
+_started = time.perf_counter()
+# Dựng thử 1 lần: đo thời gian, lỗi layout lộ ra ngay lúc khởi động
+serve_layout()
+app.layout = serve_layout
+STARTUP_PROFILE["layout"] = round(time.perf_counter() - _started, 3)
 
 # ============== Callbacks ==============
-@app.callback(
-    Output('tab-content', 'children'),
-    [Input('main-tabs', 'active_tab'),
-     Input('data-source', 'value'),
-     Input('year-filter', 'value'),
-     Input('noc-filter', 'value'),
-     Input('sport-filter', 'value'),
-     Input('sex-filter', 'value'),
-     Input('medal-filter', 'value'),
-     Input('top-n', 'value')]
-)
-def update_tab_content(tab, use_cleaned, years, nocs, sports, sexes, medals, top_n):
-    if tab is None:
-        tab = 'overview'
-    top_n = top_n if top_n is not None else 15
-    try:
-        df = get_cached_data(use_cleaned if use_cleaned is not None else True)
-        if years:
-            df = df[df['Year'].isin(years)]
-        if nocs:
-            df = df[df['NOC'].isin(nocs)]
-        if sports:
-            df = df[df['Sport'].isin(sports)]
-        if sexes:
-            df = df[df['Sex'].isin(sexes)]
-        if medals:
-            df = df[df['Medal'].isin(medals)]
-    except Exception as e:
-        return dbc.Alert(f"Lỗi khi lọc dữ liệu: {e}", color="danger")
-    
-    if df.empty:
-        return dbc.Alert("Không có dữ liệu sau khi lọc. Thử bỏ bớt bộ lọc.", color="warning")
-    
-    analysis = DataAnalysis(df)
-    
-    try:
-        if tab == 'overview':
-            overview = analysis.analyze_data_overview()
-            return dbc.Container([
-                dbc.Row([
-                    dbc.Col(dbc.Card([dbc.CardBody([html.H3(f"{overview['total_athletes']:,}", className="text-primary mb-0"), html.P("Vận động viên", className="text-muted small mb-0")])], className="shadow-sm text-center"), xs=6, md=4, lg=2),
-                    dbc.Col(dbc.Card([dbc.CardBody([html.H3(f"{overview['total_countries']:,}", className="text-info mb-0"), html.P("Quốc gia", className="text-muted small mb-0")])], className="shadow-sm text-center"), xs=6, md=4, lg=2),
-                    dbc.Col(dbc.Card([dbc.CardBody([html.H3(f"{overview['total_olympic_games']:,}", className="text-success mb-0"), html.P("Kỳ Olympic", className="text-muted small mb-0")])], className="shadow-sm text-center"), xs=6, md=4, lg=2),
-                    dbc.Col(dbc.Card([dbc.CardBody([html.H3(f"{overview['total_sports']:,}", className="text-warning mb-0"), html.P("Môn thể thao", className="text-muted small mb-0")])], className="shadow-sm text-center"), xs=6, md=4, lg=2),
-                    dbc.Col(dbc.Card([dbc.CardBody([html.H3(f"{overview['total_medals']:,}", className="text-danger mb-0"), html.P("Tổng huy chương", className="text-muted small mb-0")])], className="shadow-sm text-center"), xs=6, md=4, lg=2),
-                ], className="g-3 mb-4"),
-                dbc.Row([
-                    dbc.Col(dcc.Graph(id='overview-medal-pie', figure=create_animated_medal_pie(analysis), config={"displayModeBar": True}, style={'height': '400px'}), md=6, className="mb-3"),
-                    dbc.Col(dcc.Graph(id='overview-gender', figure=create_animated_gender_bar(analysis), config={"displayModeBar": True}, style={'height': '400px'}), md=6, className="mb-3"),
-                ]),
-                dbc.Row(dbc.Col(dcc.Graph(id='overview-year-line', figure=create_animated_year_line(analysis), config={"displayModeBar": True}, style={'height': '450px'}), width=12)),
-            ], fluid=True)
-        elif tab == 'medals':
-            return dbc.Container([
+# Bộ lọc sidebar: tên tham số FilterView -> id component
+FILTER_COMPONENTS = {
+    'use_cleaned': 'data-source',
+    'years': 'year-filter',
+    'year_range': 'year-range',
+    'nocs': 'noc-filter',
+    'sports': 'sport-filter',
+    'sexes': 'sex-filter',
+    'medals': 'medal-filter',
+    'text_query': 'text-search',
+}
+ALL_FILTERS = tuple(FILTER_COMPONENTS)
+
+class FilterView:
+    """
+    Bộ lọc đã chuẩn hóa + dữ liệu / phân tích tương ứng (lấy từ cache, tính khi cần).
+    Thế hệ dữ liệu lấy 1 lần ở lần dùng đầu tiên: dữ liệu được nạp lại giữa chừng thì
+    callback vẫn tính trọn trên thế hệ cũ.
+    """
+
+    def __init__(self, use_cleaned=True, years=None, year_range=None, nocs=None, sports=None, sexes=None, medals=None, text_query=None, *, generation=None):
+        use_cleaned = use_cleaned if use_cleaned is not None else True
+        self._generation = generation
+        # Khoảng năm phủ toàn bộ dữ liệu = không lọc
+        if year_range is not None and year_range[0] <= YEAR_MIN and year_range[1] >= YEAR_MAX:
+            year_range = None
+        self.filters = filter_key(use_cleaned, years, year_range, nocs, sports, sexes, medals, text_query)
+        (self.use_cleaned, self.years, self.year_range, self.nocs,
+         self.sports, self.sexes, self.medals, self.text_query) = self.filters
+
+    @property
+    def generation(self):
+        if self._generation is None:
+            self._generation = current_generation(self.use_cleaned)
+        return self._generation
+
+    @property
+    def analysis(self):
+        return filtered_analysis(self.filters, self.generation)
+
+    @property
+    def full_analysis(self):
+        """Phân tích trên toàn bộ dataset (cùng thế hệ)."""
+        return get_cached_analysis(generation=self.generation)
+
+    @property
+    def dataframe(self):
+        return self.analysis.dataframe
+
+    def medal_source(self):
+        """
+        (analysis, year_range) cho tổng hợp huy chương / giới tính: nếu chỉ lọc theo khoảng năm,
+        lấy từ prefix sums của dataset đầy đủ (O(1) mỗi ô) thay vì groupby lại.
+        """
+        if self.year_range is not None and not (self.years or self.nocs or self.sports or self.sexes or self.medals or self.text_query):
+            return self.full_analysis, self.year_range
+        return self.analysis, None
+
+    def physique_sketch(self):
+        # Chỉ lọc môn / giới tính: cắt sketch của dataset đầy đủ thay vì quét lại dòng
+        if self.years or self.year_range is not None or self.nocs or self.medals or self.text_query:
+            return self.analysis.physique_sketch()
+        return self.full_analysis.physique_sketch()
+
+    def level(self, level):
+        # Cấp khu vực cần cột Region (dữ liệu gốc không có bảng noc_regions thì về NOC)
+        if level == REGION_COLUMN and REGION_COLUMN in self.generation.dataframe.columns:
+            return REGION_COLUMN
+        return 'NOC'
+
+    def cached(self, name, compute, *extra):
+        """Kết quả trung gian (bảng xếp hạng...) cache LRU theo (name, bộ lọc, thế hệ dữ liệu, extra)."""
+        return _RESULT_CACHE.get_or_compute((name, self.filters, self.generation.number) + extra, compute)
+
+    def is_cached(self, name, *extra):
+        return (name, self.filters, self.generation.number) + extra in _RESULT_CACHE
+
+    def is_heavy(self):
+        """Dữ liệu gốc, không lọc gì: figure tính trên cả dataset gốc (chậm nhất)."""
+        return not self.use_cleaned and not any(self.filters[1:])
+
+def _error_figure(error):
+    fig = go.Figure()
+    fig.add_annotation(text=f"Lỗi hiển thị: {error}", showarrow=False, font={"color": "#dc3545"})
+    fig.update_layout(xaxis_visible=False, yaxis_visible=False)
+    return fig
+
+# id figure -> (filters, top_n, level, build): warmup() dựng sẵn mọi figure với bộ lọc mặc định
+FIGURE_BUILDERS = {}
+
+# id figure -> cấu hình vẽ phía client (assets/client_filters.js)
+CLIENT_FIGURES = {}
+# id figure có background callback cho trường hợp nặng (cần store '<id>-background' trong layout)
+BACKGROUND_FIGURES = set()
+
+def figure_callback(figure_id, filters=ALL_FILTERS, top_n=False, level=False, patch=None, client=None):
+    """
+    Đăng ký callback riêng cho 1 figure, chỉ nghe các bộ lọc nó dùng (+ top-n / country-level nếu cần).
+    Figure cache LRU theo (id, bộ lọc, top_n, level). patch(view, top_n, level): khi chỉ top-n đổi,
+    trả về Patch cập nhật đúng các trace đã vẽ thay vì dựng lại và gửi cả figure.
+    Có BACKGROUND_MANAGER: callback thường vẫn trả lời mọi trường hợp, trừ figure nặng (FilterView.is_heavy)
+    chưa có trong cache -> nạp dataset / phân tích ngay trong tiến trình phục vụ (tiến trình nền fork ra
+    dùng chung) rồi ghi bộ lọc vào store '<id>-background' cho background callback dựng figure (báo tiến độ
+    dưới figure, cache trên đĩa); State id của figure nằm trong khóa cache đĩa để các figure không lẫn nhau.
+    client={"chart": ...} và CLIENT_FILTERING: clientside callback vẽ từ bảng đếm 'client-aggregate';
+    trường hợp bảng đếm không đủ thì client ghi bộ lọc vào store '<id>-fallback' để server tính như cũ.
+    """
+    inputs = [Input(FILTER_COMPONENTS[name], 'value') for name in filters]
+    if top_n:
+        inputs.append(Input('top-n', 'value'))
+    if level:
+        inputs.append(Input('country-level', 'value'))
+
+    def register(build):
+        FIGURE_BUILDERS[figure_id] = (filters, top_n, level, build)
+
+        def compute(values, set_progress=None):
+            view = FilterView(**dict(zip(filters, values)))
+            n = (values[len(filters)] if values[len(filters)] is not None else DEFAULT_TOP_N) if top_n else None
+            lvl = view.level(values[-1]) if level else None
+            try:
+                if set_progress is not None:
+                    set_progress(("Đang lọc dữ liệu...",))
+                # Không còn dòng nào: filter-status đã cảnh báo chung, figure để trống
+                if 'use_cleaned' in filters and len(filters) == len(ALL_FILTERS) and view.dataframe.empty:
+                    return {}
+                if set_progress is not None:
+                    set_progress(("Đang dựng biểu đồ...",))
+                if patch is not None and set(ctx.triggered_prop_ids) == {'top-n.value'}:
+                    patched = patch(view, n, lvl)
+                    if patched is not None:
+                        return patched
+                return view.cached(("figure", figure_id), lambda: build(view, n, lvl), n, lvl)
+            except Exception as e:
+                return _error_figure(e)
+
+        if CLIENT_FILTERING and client is not None:
+            CLIENT_FIGURES[figure_id] = client
+            options = dict(client, figure_id=figure_id, filters=list(filters), top_n=top_n, level=level, default_top_n=DEFAULT_TOP_N)
+            app.clientside_callback(
+                f"function(aggregate, ...values) {{ return window.olympicClient.render(aggregate, values, {json.dumps(options)}); }}",
+                [Output(figure_id, 'figure'), Output(f"{figure_id}-fallback", 'data')],
+                [Input('client-aggregate', 'data')] + inputs,
+            )
+
+            @app.callback(Output(figure_id, 'figure', allow_duplicate=True), Input(f"{figure_id}-fallback", 'data'), prevent_initial_call=True)
+            def update(values):
+                return compute(values)
+        elif BACKGROUND_MANAGER is None:
+            @app.callback(Output(figure_id, 'figure'), inputs)
+            def update(*values):
+                return compute(values)
+        else:
+            BACKGROUND_FIGURES.add(figure_id)
+            background_id, progress_id = f"{figure_id}-background", f"{figure_id}-progress"
+
+            @app.callback([Output(figure_id, 'figure'), Output(background_id, 'data')], inputs)
+            def update(*values):
+                view = FilterView(**dict(zip(filters, values)))
+                n = (values[len(filters)] if values[len(filters)] is not None else DEFAULT_TOP_N) if top_n else None
+                lvl = view.level(values[-1]) if level else None
+                if 'use_cleaned' in filters and view.is_heavy() and not view.is_cached(("figure", figure_id), n, lvl) \
+                        and set(ctx.triggered_prop_ids) != {'top-n.value'}:
+                    try:
+                        # Dataset + phân tích nằm trong tiến trình phục vụ (single-flight, cache chung)
+                        view.analysis
+                    except Exception as e:
+                        return _error_figure(e), no_update
+                    return no_update, list(values)
+                return compute(values), no_update
+
+            @app.callback(
+                Output(figure_id, 'figure', allow_duplicate=True),
+                [Input(background_id, 'data'), State(figure_id, 'id')],
+                background=True,
+                manager=BACKGROUND_MANAGER,
+                prevent_initial_call=True,
+                progress=[Output(progress_id, 'children')],
+                running=[
+                    (Output(figure_id, 'className'), 'graph-computing', ''),
+                    (Output(progress_id, 'style'), {'display': 'block'}, {'display': 'none'}),
+                ],
+            )
+            def update_background(set_progress, values, _figure_id):
+                return compute(values, set_progress)
+        return build
+    return register
+
+def _graph(graph_id, height):
+    children = [
+        dcc.Graph(id=graph_id, figure={}, config={"displayModeBar": True}, style={'height': height}),
+        # Tiến độ của background callback (ẩn khi không chạy nền)
+        html.Small(id=f"{graph_id}-progress", className="text-muted", style={'display': 'none'}),
+    ]
+    if graph_id in CLIENT_FIGURES:
+        # Bộ lọc client không tự vẽ được -> server tính
+        children.append(dcc.Store(id=f"{graph_id}-fallback"))
+    if graph_id in BACKGROUND_FIGURES:
+        children.append(dcc.Store(id=f"{graph_id}-background"))
+    return html.Div(children)
+
+@app.callback(Output('tab-content', 'children'), Input('main-tabs', 'active_tab'))
+def update_tab_content(tab):
+    """Khung của tab (chỉ phụ thuộc tab đang chọn); từng figure / bảng có callback riêng."""
+    tab = tab or 'overview'
+    if tab == 'overview':
+        return dbc.Container([
+            html.Div(id='overview-stats'),
             dbc.Row([
-                dbc.Col(dcc.Graph(id='medal-count-bar', figure=create_animated_medal_count(analysis), style={'height': '400px'}), md=6, className="mb-3"),
-                dbc.Col(dcc.Graph(id='medal-country-bar', figure=create_animated_country_medals(analysis, top_n), style={'height': '400px'}), md=6, className="mb-3"),
+                dbc.Col(_graph('overview-medal-pie', '400px'), md=6, className="mb-3"),
+                dbc.Col(_graph('overview-gender', '400px'), md=6, className="mb-3"),
             ]),
-            dbc.Row(dbc.Col(dcc.Graph(id='medal-year-line', figure=create_animated_year_line(analysis), style={'height': '450px'}), width=12, className="mb-3")),
-            dbc.Row(dbc.Col(dcc.Graph(id='medal-sport-bar', figure=create_animated_sport_medals(analysis, top_n), style={'height': '500px'}), width=12, className="mb-3")),
-            dbc.Row(dbc.Col(dcc.Graph(id='medal-tally-stacked', figure=create_animated_medal_tally(analysis, top_n), style={'height': '500px'}), width=12)),
+            dbc.Row(dbc.Col(_graph('overview-year-line', '450px'), width=12)),
         ], fluid=True)
-        elif tab == 'gender':
-            gender = analysis.analyze_data_by_gender()
-            return dbc.Container([
+    if tab == 'medals':
+        return dbc.Container([
             dbc.Row([
-                dbc.Col(dcc.Graph(id='gender-pie', figure=create_animated_gender_pie(gender), style={'height': '400px'}), md=6, className="mb-3"),
-                dbc.Col(dcc.Graph(id='gender-medal-bar', figure=create_animated_gender_medal(gender), style={'height': '400px'}), md=6, className="mb-3"),
+                dbc.Col(_graph('medal-count-bar', '400px'), md=6, className="mb-3"),
+                dbc.Col(_graph('medal-country-bar', '400px'), md=6, className="mb-3"),
             ]),
+            dbc.Row(dbc.Col(_graph('medal-year-line', '450px'), width=12, className="mb-3")),
+            dbc.Row(dbc.Col(_graph('medal-sport-bar', '500px'), width=12, className="mb-3")),
+            dbc.Row(dbc.Col(_graph('medal-tally-stacked', '500px'), width=12, className="mb-3")),
+            dbc.Row(dbc.Col(_graph('medal-home-advantage', '500px'), width=12)),
         ], fluid=True)
-        elif tab == 'age':
-            age_summary = analysis.age_summary()
-            return dbc.Container([
-            dbc.Alert([html.Strong("Tuổi trung bình: "), f"{age_summary['mean']} — Min: {age_summary['min']}, Max: {age_summary['max']}"], color="info", className="text-center mb-4"),
-            dbc.Row(dbc.Col(dcc.Graph(id='age-distribution', figure=create_animated_age_distribution(analysis), style={'height': '450px'}), width=12, className="mb-3")),
-            dbc.Row(dbc.Col(dcc.Graph(id='age-medal-ratio', figure=create_animated_age_medal_ratio(analysis), style={'height': '450px'}), width=12)),
+    if tab == 'gender':
+        return dbc.Container([
+            dbc.Row([
+                dbc.Col(_graph('gender-pie', '400px'), md=6, className="mb-3"),
+                dbc.Col(_graph('gender-medal-bar', '400px'), md=6, className="mb-3"),
+            ]),
         ], fluid=True)
-        elif tab == 'physique':
-            phys = analysis.medal_vs_non_medal_physique()
-            if phys is None or phys.empty:
-                return dbc.Alert("Không đủ dữ liệu Height/Weight để phân tích thể chất.", color="warning")
-            return dbc.Container([
-            dbc.Row(dbc.Col(dcc.Graph(id='physique-comparison', figure=create_animated_physique_comparison(phys), style={'height': '500px'}), width=12)),
+    if tab == 'age':
+        return dbc.Container([
+            html.Div(id='age-summary'),
+            dbc.Row(dbc.Col(_graph('age-distribution', '450px'), width=12, className="mb-3")),
+            dbc.Row(dbc.Col(_graph('age-medal-ratio', '450px'), width=12)),
         ], fluid=True)
-        elif tab == 'data':
-            max_rows = min(1000, len(df))
-            return dbc.Container([
-            dbc.Alert([
-                html.Small(f"Hiển thị tối đa {max_rows:,} dòng — Tổng {len(df):,} bản ghi sau lọc. "),
-                html.Small("Dùng pagination ở dưới để xem thêm.", className="text-muted")
-            ], color="light", className="mb-3"),
+    if tab == 'physique':
+        return dbc.Container([
+            dbc.Row(dbc.Col(_graph('physique-comparison', '500px'), width=12, className="mb-3")),
+            dbc.Row([
+                dbc.Col(_graph('physique-histogram', '450px'), md=6, className="mb-3"),
+                dbc.Col(_graph('physique-bmi-histogram', '450px'), md=6, className="mb-3"),
+            ]),
+            dbc.Row(dbc.Col(_graph('physique-percentiles', '550px'), width=12)),
+        ], fluid=True)
+    if tab == 'similar':
+        return dbc.Container([
+            dbc.Row(dbc.Col(_graph('similar-bar', '500px'), width=12, className="mb-3")),
+            dbc.Row(dbc.Col(_graph('similar-heatmap', '600px'), width=12)),
+        ], fluid=True)
+    if tab == 'athlete':
+        return dbc.Container([
+            dbc.Alert("Tìm theo tên (gõ vài chữ đầu, không cần dấu) hoặc ID — tra trên toàn bộ dataset, không theo bộ lọc.", color="light", className="mb-3 small"),
+            dcc.Dropdown(id='athlete-search', options=[], searchable=True, placeholder="Nhập tên hoặc ID vận động viên...", className="mb-4"),
+            html.Div(id='athlete-detail'),
+        ], fluid=True)
+    if tab == 'data':
+        return dbc.Container([
+            dbc.Alert(id='data-info', color="light", className="mb-3"),
             dbc.Card([
                 dbc.CardBody([
                     dash_table.DataTable(
-                        data=df.head(max_rows).to_dict('records'),
-                        columns=[{"name": i, "id": i} for i in df.columns],
-                        page_size=50,
-                        page_action='native',
+                        id='data-table',
+                        data=[],
+                        columns=[],
+                        page_size=DATA_PAGE_SIZE,
+                        page_action='custom',
                         page_current=0,
-                        sort_action='native',
+                        page_count=1,
+                        sort_action='custom',
                         sort_mode='multi',
-                        filter_action='native',
+                        sort_by=[],
+                        filter_action='custom',
+                        filter_query='',
+                        filter_options={'case': 'insensitive'},
                         fixed_rows={'headers': True},
                         style_table={
                             'overflowX': 'auto',
@@ -357,13 +880,388 @@ def update_tab_content(tab, use_cleaned, years, nocs, sports, sexes, medals, top
                 ])
             ], className="shadow-sm"),
         ], fluid=True, className="px-2")
-        return html.Div("Tab không hợp lệ")
+    return html.Div("Tab không hợp lệ")
+
+@app.callback(Output('filter-status', 'children'), [Input(c, 'value') for c in FILTER_COMPONENTS.values()])
+def update_filter_status(*values):
+    """Cảnh báo chung khi bộ lọc lỗi hoặc không còn dòng nào (thay cho từng biểu đồ)."""
+    try:
+        empty = FilterView(*values).dataframe.empty
     except Exception as e:
-        return dbc.Alert([html.Strong("Lỗi hiển thị: "), str(e)], color="danger")
+        return dbc.Alert(f"Lỗi khi lọc dữ liệu: {e}", color="danger")
+    if empty:
+        return dbc.Alert("Không có dữ liệu sau khi lọc. Thử bỏ bớt bộ lọc.", color="warning")
+    return None
+
+# Chu kỳ hỏi trạng thái dữ liệu (ms): nhanh khi đang nạp, chậm khi đã sẵn sàng (chỉ để thấy lượt nạp lại nóng)
+DATASET_POLL_MS, DATASET_IDLE_POLL_MS = 1000, 15000
+
+@app.callback(
+    [Output('dataset-status', 'children'), Output('dataset-poll', 'interval'), Output('dataset-poll', 'disabled'), Output('data-generation', 'data')],
+    [Input('dataset-poll', 'n_intervals'), Input('data-source', 'value')],
+    State('data-generation', 'data'),
+)
+def update_dataset_status(n_intervals, use_cleaned, shown_generation):
+    """
+    Trạng thái nạp của nguồn đang chọn. Đã sẵn sàng và không còn nguồn nào đang nạp thì hỏi thưa
+    lại (có nạp lại nóng) hoặc ngừng hỏi. data-generation chỉ ghi khi thế hệ đổi.
+    """
+    datasets = dataset_status()
+    state = datasets[DATA_SOURCES[bool(use_cleaned)]]
+    generation = state.get("generation") if state["status"] == "ready" else None
+    generation = generation if generation != shown_generation else no_update
+    busy = any(s["status"] == "loading" or "reloading" in s for s in datasets.values())
+    settled = (DATASET_POLL_MS, False, generation) if busy else (DATASET_IDLE_POLL_MS, not HOT_RELOAD, generation)
+    if state["status"] == "loading":
+        stage = f" — {state['stage']}" if state.get("stage") else ""
+        return f"⏳ Đang nạp dữ liệu{stage} ({state['elapsed']:.0f}s)...", DATASET_POLL_MS, False, generation
+    if state["status"] == "error":
+        return html.Span(f"⚠️ Nạp dữ liệu lỗi: {state['error']}", className="text-danger"), *settled
+    if state["status"] == "ready":
+        text = f"✅ {state['rows']:,} dòng (thế hệ #{state['generation']}), nạp trong {state['seconds']:.1f}s"
+        if "reloading" in state:
+            reloading = state["reloading"]
+            stage = f" — {reloading['stage']}" if reloading.get("stage") else ""
+            text += f" · 🔄 Đang nạp dữ liệu mới{stage} ({reloading['elapsed']:.0f}s)"
+        elif "reload_error" in state:
+            text += f" · ⚠️ Nạp lại lỗi: {state['reload_error']}"
+        return text, *settled
+    # Chưa nạp (không preload / đã bị bỏ khỏi bộ nhớ): callback biểu đồ sẽ nạp, hỏi tiếp để hiện tiến độ
+    return "Dữ liệu sẽ được nạp khi cần", DATASET_POLL_MS, False, generation
+
+def client_aggregate(view):
+    """
+    Bảng đếm Year × NOC × Sport × Sex × Medal của thế hệ dữ liệu + figure mặc định làm khuôn cho
+    từng biểu đồ vẽ phía client. Gửi 1 lần mỗi thế hệ; client chỉ thay dữ liệu trace.
+    """
+    generation = view.generation
+    return dict(
+        build_count_aggregate(generation.dataframe),
+        source=generation.source,
+        generation=generation.number,
+        templates={figure_id: default_figure(view, figure_id) for figure_id in CLIENT_FIGURES},
+    )
+
+if CLIENT_FILTERING:
+    @app.callback(Output('client-aggregate', 'data'), Input('data-generation', 'data'), State('data-source', 'value'))
+    def update_client_aggregate(generation_number, use_cleaned):
+        if generation_number is None:
+            raise PreventUpdate
+        view = FilterView(use_cleaned)
+        # Đã nạp lại giữa chừng: gửi thế hệ hiện tại, lần hỏi trạng thái sau không đổi nữa
+        return view.cached("client_aggregate", lambda: client_aggregate(view))
+
+# ---------- Tổng quan ----------
+@app.callback(Output('overview-stats', 'children'), [Input(c, 'value') for c in FILTER_COMPONENTS.values()])
+def update_overview_stats(*values):
+    view = FilterView(*values)
+    if view.dataframe.empty:
+        return None
+    overview = view.cached("overview", view.analysis.analyze_data_overview)
+    stats = [
+        ('total_athletes', "Vận động viên", "text-primary"),
+        ('total_countries', "Quốc gia", "text-info"),
+        ('total_olympic_games', "Kỳ Olympic", "text-success"),
+        ('total_sports', "Môn thể thao", "text-warning"),
+        ('total_medals', "Tổng huy chương", "text-danger"),
+    ]
+    return dbc.Row([
+        dbc.Col(dbc.Card([dbc.CardBody([html.H3(f"{overview[key]:,}", className=f"{color} mb-0"), html.P(label, className="text-muted small mb-0")])], className="shadow-sm text-center"), xs=6, md=4, lg=2)
+        for key, label, color in stats
+    ], className="g-3 mb-4")
+
+@figure_callback('overview-medal-pie', client={'chart': 'medalPie'})
+def _overview_medal_pie(view, top_n, level):
+    return create_animated_medal_pie(*view.medal_source())
+
+@figure_callback('overview-gender', client={'chart': 'genderBar'})
+def _overview_gender(view, top_n, level):
+    return create_animated_gender_bar(*view.medal_source())
+
+@figure_callback('overview-year-line', client={'chart': 'yearLine'})
+def _overview_year_line(view, top_n, level):
+    return create_animated_year_line(*view.medal_source())
+
+# ---------- Huy chương ----------
+def _ranked_countries(view, level):
+    analysis, year_range = view.medal_source()
+    return view.cached("medals_by_country", lambda: analysis.medals_by_country(year_range=year_range, level=level), level)
+
+def _ranked_sports(view):
+    analysis, year_range = view.medal_source()
+    return view.cached("medals_by_sport", lambda: analysis.medals_by_sport(year_range=year_range))
+
+def _medal_tally(view, level):
+    analysis, year_range = view.medal_source()
+    return view.cached(
+        "medal_tally",
+        # Lọc theo loại huy chương có thể thiếu cột -> luôn đủ 3 cột cho biểu đồ xếp chồng
+        lambda: analysis.medal_tally_table(year_range=year_range, level=level).reindex(columns=["Gold", "Silver", "Bronze"], fill_value=0),
+        level,
+    )
+
+@figure_callback('medal-count-bar', client={'chart': 'medalCountBar'})
+def _medal_count_bar(view, top_n, level):
+    return create_animated_medal_count(*view.medal_source())
+
+@figure_callback(
+    'medal-country-bar', top_n=True, level=True, client={'chart': 'rankedBar', 'dimension': 'NOC'},
+    patch=lambda view, top_n, level: patch_ranked_bar(_ranked_countries(view, level), top_n, country_medals_title(top_n, level))
+    if not _ranked_countries(view, level).empty else None,
+)
+def _medal_country_bar(view, top_n, level):
+    return create_animated_country_medals(_ranked_countries(view, level), top_n, level)
+
+@figure_callback('medal-year-line', client={'chart': 'yearLine'})
+def _medal_year_line(view, top_n, level):
+    return create_animated_year_line(*view.medal_source())
+
+@figure_callback(
+    'medal-sport-bar', top_n=True, client={'chart': 'rankedBar', 'dimension': 'Sport'},
+    patch=lambda view, top_n, level: patch_ranked_bar(_ranked_sports(view), top_n, sport_medals_title(top_n))
+    if not _ranked_sports(view).empty else None,
+)
+def _medal_sport_bar(view, top_n, level):
+    return create_animated_sport_medals(_ranked_sports(view), top_n)
+
+@figure_callback(
+    'medal-tally-stacked', top_n=True, level=True, client={'chart': 'medalTally'},
+    patch=lambda view, top_n, level: patch_medal_tally(_medal_tally(view, level), top_n, medal_tally_title(top_n, level))
+    if not _medal_tally(view, level).empty else None,
+)
+def _medal_tally_stacked(view, top_n, level):
+    return create_animated_medal_tally(_medal_tally(view, level), top_n, level)
+
+@figure_callback('medal-home-advantage', filters=('use_cleaned', 'years', 'year_range', 'nocs'))
+def _medal_home_advantage(view, top_n, level):
+    return create_home_advantage_chart(home_advantage_view(view.use_cleaned, view.years, view.year_range, view.nocs, generation=view.generation))
+
+# ---------- Giới tính ----------
+def _gender(view):
+    analysis, year_range = view.medal_source()
+    return view.cached("gender", lambda: analysis.analyze_data_by_gender(year_range=year_range))
+
+@figure_callback('gender-pie')
+def _gender_pie(view, top_n, level):
+    return create_animated_gender_pie(_gender(view))
+
+@figure_callback('gender-medal-bar')
+def _gender_medal_bar(view, top_n, level):
+    return create_animated_gender_medal(_gender(view))
+
+# ---------- Tuổi ----------
+@app.callback(Output('age-summary', 'children'), [Input(c, 'value') for c in FILTER_COMPONENTS.values()])
+def update_age_summary(*values):
+    view = FilterView(*values)
+    if view.dataframe.empty:
+        return None
+    age_summary = view.analysis.age_summary()
+    return dbc.Alert([html.Strong("Tuổi trung bình: "), f"{age_summary['mean']} — Min: {age_summary['min']}, Max: {age_summary['max']}"], color="info", className="text-center mb-4")
+
+@figure_callback('age-distribution')
+def _age_distribution(view, top_n, level):
+    return create_animated_age_distribution(view.analysis)
+
+@figure_callback('age-medal-ratio')
+def _age_medal_ratio(view, top_n, level):
+    return create_animated_age_medal_ratio(view.analysis)
+
+# ---------- Thể chất ----------
+@figure_callback('physique-comparison')
+def _physique_comparison(view, top_n, level):
+    phys = view.analysis.medal_vs_non_medal_physique()
+    if phys is None or phys.empty:
+        return {}
+    return create_animated_physique_comparison(phys)
+
+@figure_callback('physique-histogram')
+def _physique_histogram(view, top_n, level):
+    return create_physique_histogram(view.physique_sketch().histogram("Height", view.sports, view.sexes, by=("Sex",)), "Height")
+
+@figure_callback('physique-bmi-histogram')
+def _physique_bmi_histogram(view, top_n, level):
+    return create_physique_histogram(view.physique_sketch().histogram("BMI", view.sports, view.sexes, by=("Sex",)), "BMI")
+
+@figure_callback('physique-percentiles', top_n=True)
+def _physique_percentiles(view, top_n, level):
+    return create_physique_percentile_box(view.physique_sketch().summary(view.sports, view.sexes), top_n)
+
+# ---------- Tương đồng ----------
+# Hồ sơ huy chương là thuộc tính toàn thời gian -> tính trên toàn bộ dataset, chỉ phụ thuộc NOC đã chọn
+def _similar_targets(view, top_n):
+    full_analysis = view.full_analysis
+    ranked = full_analysis.medals_by_country().index
+    targets = [n for n in (view.nocs or []) if n in ranked] or list(ranked[:1])
+    heat_nocs = targets if len(targets) >= 2 else list(ranked[:top_n])
+    return full_analysis, targets, heat_nocs
+
+@figure_callback('similar-bar', filters=('use_cleaned', 'nocs'), top_n=True)
+def _similar_bar(view, top_n, level):
+    full_analysis, targets, _ = _similar_targets(view, top_n)
+    return create_similar_countries_bar(full_analysis.similar_countries(targets[:4], k=top_n))
+
+@figure_callback('similar-heatmap', filters=('use_cleaned', 'nocs'), top_n=True)
+def _similar_heatmap(view, top_n, level):
+    full_analysis, _, heat_nocs = _similar_targets(view, top_n)
+    return create_similarity_heatmap(full_analysis.profile_similarity(heat_nocs))
+
+# ---------- Bảng dữ liệu ----------
+# Phân trang / sắp xếp / lọc cột chạy trên server, trên toàn bộ dữ liệu sau lọc sidebar:
+# thứ tự sắp và kết quả lọc cột cache LRU, mỗi trang chỉ cắt page_size dòng.
+DATA_PAGE_SIZE = 50
+
+# Cột mã nội bộ (nhóm tuổi, các chiều group-by, Region): không hiện ở bảng, không lọc / sắp theo được
+HIDDEN_TABLE_COLUMNS = frozenset(CODE_COLUMNS)
+
+def _check_table_columns(sort_by, filter_query):
+    """ValueError nếu sort_by / filter_query nhắm vào cột ẩn (HIDDEN_TABLE_COLUMNS)."""
+    columns = [s.get('column_id') for s in (sort_by or [])]
+    columns += [clause[0] for clause in parse_filter_query(filter_query)]
+    for column in columns:
+        if column in HIDDEN_TABLE_COLUMNS:
+            raise ValueError(f"Không có cột {column}")
+
+def table_rows(view, sort_by, filter_query):
+    """Vị trí dòng (iloc trong view.dataframe) theo thứ tự hiển thị của bảng."""
+    _check_table_columns(sort_by, filter_query)
+    sort_key = tuple((s['column_id'], s.get('direction')) for s in (sort_by or []))
+    order = view.cached("table_order", lambda: sort_order(view.dataframe, sort_by), sort_key)
+    filter_query = (filter_query or "").strip()
+    if not filter_query:
+        return order
+
+    def filtered_order():
+        matched = view.cached("table_filter", lambda: filter_rows(view.dataframe, filter_query), filter_query)
+        keep = np.zeros(len(view.dataframe), dtype=bool)
+        keep[matched] = True
+        return order[keep[order]]
+    return view.cached("table_rows", filtered_order, sort_key, filter_query)
+
+def _visible_columns(df):
+    return [c for c in df.columns if c not in HIDDEN_TABLE_COLUMNS]
+
+def _table_columns(df):
+    # type numeric: ô lọc của cột số sinh điều kiện so sánh (>=, <...) thay vì chuỗi
+    return [
+        {"name": c, "id": c, "type": "numeric" if pd.api.types.is_numeric_dtype(df[c].dtype) else "text"}
+        for c in _visible_columns(df)
+    ]
+
+@app.callback(
+    [Output('data-table', 'data'),
+     Output('data-table', 'columns'),
+     Output('data-table', 'page_count'),
+     Output('data-table', 'page_current'),
+     Output('data-info', 'children')],
+    [Input(c, 'value') for c in FILTER_COMPONENTS.values()] + [
+        Input('data-table', 'page_current'),
+        Input('data-table', 'page_size'),
+        Input('data-table', 'sort_by'),
+        Input('data-table', 'filter_query'),
+    ]
+)
+def update_data_table(*values):
+    view = FilterView(*values[:len(FILTER_COMPONENTS)])
+    page_current, page_size, sort_by, filter_query = values[len(FILTER_COMPONENTS):]
+    page_size = page_size or DATA_PAGE_SIZE
+    # Bộ lọc sidebar / cột đổi -> về trang đầu
+    if not set(ctx.triggered_prop_ids) <= {'data-table.page_current', 'data-table.page_size', 'data-table.sort_by'}:
+        page_current = 0
+    df = view.dataframe
+    try:
+        rows = table_rows(view, sort_by, filter_query)
+    except ValueError as e:
+        return [], _table_columns(df), 1, 0, html.Small(f"Lỗi lọc / sắp xếp cột: {e}", className="text-danger")
+    page_count = max(1, -(-len(rows) // page_size))
+    page_current = min(page_current or 0, page_count - 1)
+    start = page_current * page_size
+    page = df.iloc[rows[start:start + page_size]][_visible_columns(df)]
+    info = [
+        html.Small(f"Dòng {min(start + 1, len(rows)):,}–{start + len(page):,} / {len(rows):,} bản ghi"
+                   + (f" (lọc cột từ {len(df):,})" if len(rows) != len(df) else "") + ". "),
+        html.Small("Sắp xếp / lọc cột áp dụng trên toàn bộ dữ liệu sau lọc.", className="text-muted")
+    ]
+    return page.to_dict('records'), _table_columns(df), page_count, page_current, info
+
+@app.callback(
+    Output('text-search-info', 'children'),
+    [Input('text-search', 'value'),
+     Input('data-source', 'value')]
+)
+def update_text_search_info(text_query, use_cleaned):
+    """Số dòng + vài nội dung/đội khớp, lấy thẳng từ chỉ mục."""
+    text_query = (text_query or "").strip()
+    if not text_query:
+        return ""
+    index = get_cached_analysis(use_cleaned if use_cleaned is not None else True).text_index()
+    n_rows = len(index.rows(text_query))
+    if n_rows == 0:
+        return "Không có nội dung / đội nào khớp."
+    examples = [v for column in index.columns for v in index.values(text_query, column)[:2]]
+    return f"{n_rows:,} dòng khớp — vd. " + "; ".join(map(str, examples[:3]))
+
+def _athlete_option(row):
+    return {"label": f"{row['Name']} — {row['NOC']}, {row['Sport']} (ID {row['ID']}, {row['Medals']} HC)", "value": int(row["ID"])}
+
+@app.callback(
+    Output('athlete-search', 'options'),
+    Input('athlete-search', 'search_value'),
+    [State('athlete-search', 'value'),
+     State('data-source', 'value')]
+)
+def update_athlete_options(search_value, selected, use_cleaned):
+    """Typeahead: mỗi lần gõ chỉ tra chỉ mục (searchsorted + trigram), không quét dataframe."""
+    if not search_value:
+        raise PreventUpdate
+    index = get_cached_analysis(use_cleaned if use_cleaned is not None else True).athlete_index()
+    options = [_athlete_option(row) for row in index.search(search_value, limit=20).to_dict('records')]
+    # Giữ lựa chọn hiện tại trong options để dropdown còn hiển thị nhãn
+    if selected is not None and all(o["value"] != selected for o in options):
+        current = index.search(str(selected), limit=1)
+        if not current.empty and int(current["ID"].iloc[0]) == selected:
+            options.insert(0, _athlete_option(current.iloc[0]))
+    return options
+
+@app.callback(
+    Output('athlete-detail', 'children'),
+    Input('athlete-search', 'value'),
+    State('data-source', 'value')
+)
+def update_athlete_detail(athlete_id, use_cleaned):
+    if athlete_id is None:
+        return html.Div()
+    profile = get_cached_analysis(use_cleaned if use_cleaned is not None else True).athlete_profile(int(athlete_id))
+    if profile is None:
+        return dbc.Alert(f"Không tìm thấy vận động viên ID {athlete_id}.", color="warning")
+    summary, rows = profile["summary"], profile["rows"]
+    columns = [c for c in ["Year", "Season", "City", "Games", "Age", "Team", "Event", "Medal"] if c in rows.columns]
+    stats = [
+        ("Quốc gia", summary["NOC"], "text-info"),
+        ("Môn", summary["Sport"], "text-success"),
+        ("Lượt thi đấu", f"{summary['Entries']:,}", "text-warning"),
+        ("Huy chương", f"{summary['Medals']:,}", "text-danger"),
+    ]
+    return dbc.Container([
+        html.H4(summary["Name"], className="fw-bold mb-3"),
+        dbc.Row([
+            dbc.Col(dbc.Card([dbc.CardBody([html.H4(value, className=f"{color} mb-0"), html.P(label, className="text-muted small mb-0")])], className="shadow-sm text-center"), xs=6, md=3)
+            for label, value, color in stats
+        ], className="g-3 mb-4"),
+        dbc.Row(dbc.Col(dcc.Graph(id='athlete-medal-timeline', figure=create_athlete_medal_timeline(rows), style={'height': '400px'}), width=12, className="mb-3")),
+        dbc.Card(dbc.CardBody(dash_table.DataTable(
+            data=rows[columns].to_dict('records'),
+            columns=[{"name": c, "id": c} for c in columns],
+            page_size=20,
+            sort_action='native',
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'padding': '8px', 'fontSize': '13px', 'fontFamily': 'Inter, sans-serif'},
+            style_header={'backgroundColor': 'var(--bs-primary)', 'color': 'white', 'fontWeight': '600'},
+        )), className="shadow-sm"),
+    ], fluid=True)
 
 # ============== Hàm tạo biểu đồ có animation ==============
-def create_animated_medal_pie(analysis):
-    medal_count = analysis.medal_count()
+def create_animated_medal_pie(analysis, year_range=None):
+    medal_count = analysis.medal_count(year_range=year_range)
     if medal_count.empty:
         return {}
     
@@ -388,8 +1286,8 @@ def create_animated_medal_pie(analysis):
     )
     return fig
 
-def create_animated_gender_bar(analysis):
-    gender = analysis.analyze_data_by_gender()
+def create_animated_gender_bar(analysis, year_range=None):
+    gender = analysis.analyze_data_by_gender(year_range=year_range)
     counts = gender.get("gender_counts")
     if counts is None or counts.empty:
         return {}
@@ -416,8 +1314,8 @@ def create_animated_gender_bar(analysis):
     )
     return fig
 
-def create_animated_year_line(analysis):
-    by_year = analysis.medals_by_year().sort_index()
+def create_animated_year_line(analysis, year_range=None):
+    by_year = analysis.medals_by_year(year_range=year_range).sort_index()
     if by_year.empty:
         return {}
     
@@ -443,8 +1341,8 @@ def create_animated_year_line(analysis):
     )
     return fig
 
-def create_animated_medal_count(analysis):
-    medal_count = analysis.medal_count()
+def create_animated_medal_count(analysis, year_range=None):
+    medal_count = analysis.medal_count(year_range=year_range)
     if medal_count.empty:
         return {}
     
@@ -469,8 +1367,37 @@ def create_animated_medal_count(analysis):
     )
     return fig
 
-def create_animated_country_medals(analysis, top_n):
-    by_country = analysis.medals_by_country().head(top_n)
+def country_medals_title(top_n, level="NOC"):
+    return f"Top {top_n} {'khu vực' if level == REGION_COLUMN else 'quốc gia'} theo tổng số huy chương"
+
+def sport_medals_title(top_n):
+    return f"Top {top_n} môn thể thao theo số huy chương"
+
+def medal_tally_title(top_n, level="NOC"):
+    return f"Top {top_n} {'khu vực' if level == REGION_COLUMN else 'quốc gia'} – Gold / Silver / Bronze"
+
+def patch_ranked_bar(ranked, top_n, title):
+    """Top-N đổi trên bar ngang đã vẽ: chỉ gửi lại x / y / màu của trace và tiêu đề."""
+    head = ranked.head(top_n)
+    patched = Patch()
+    patched['data'][0]['x'] = head.to_numpy().tolist()
+    patched['data'][0]['y'] = head.index.tolist()
+    patched['data'][0]['marker']['color'] = head.to_numpy().tolist()
+    patched['layout']['title']['text'] = title
+    return patched
+
+def patch_medal_tally(tally, top_n, title):
+    """Top-N đổi trên bảng tổng sắp xếp chồng: cập nhật x / y của 3 trace Gold, Silver, Bronze."""
+    head = tally.head(top_n)
+    patched = Patch()
+    for i, medal in enumerate(["Gold", "Silver", "Bronze"]):
+        patched['data'][i]['x'] = head.index.tolist()
+        patched['data'][i]['y'] = head[medal].tolist()
+    patched['layout']['title']['text'] = title
+    return patched
+
+def create_animated_country_medals(ranked, top_n, level="NOC"):
+    by_country = ranked.head(top_n)
     if by_country.empty:
         return {}
     
@@ -478,7 +1405,7 @@ def create_animated_country_medals(analysis, top_n):
         y=by_country.index,
         x=by_country.values,
         orientation='h',
-        title=f"Top {top_n} quốc gia theo tổng số huy chương",
+        title=country_medals_title(top_n, level),
         labels={"x": "Số huy chương", "y": "NOC"},
         color=by_country.values,
         color_continuous_scale="Viridis"
@@ -499,8 +1426,8 @@ def create_animated_country_medals(analysis, top_n):
     )
     return fig
 
-def create_animated_sport_medals(analysis, top_n):
-    by_sport = analysis.medals_by_sport().head(top_n)
+def create_animated_sport_medals(ranked, top_n):
+    by_sport = ranked.head(top_n)
     if by_sport.empty:
         return {}
     
@@ -508,7 +1435,7 @@ def create_animated_sport_medals(analysis, top_n):
         y=by_sport.index,
         x=by_sport.values,
         orientation='h',
-        title=f"Top {top_n} môn thể thao theo số huy chương",
+        title=sport_medals_title(top_n),
         labels={"x": "Số huy chương", "y": "Môn"},
         color=by_sport.values,
         color_continuous_scale="Plasma"
@@ -529,9 +1456,9 @@ def create_animated_sport_medals(analysis, top_n):
     )
     return fig
 
-def create_animated_medal_tally(analysis, top_n):
-    tally = analysis.medal_tally_table().head(top_n)
-    if tally.empty or "Gold" not in tally.columns:
+def create_animated_medal_tally(tally, top_n, level="NOC"):
+    tally = tally.head(top_n)
+    if tally.empty:
         return {}
     
     fig = go.Figure()
@@ -541,8 +1468,8 @@ def create_animated_medal_tally(analysis, top_n):
     
     fig.update_layout(
         barmode='stack',
-        title=f"Top {top_n} quốc gia – Gold / Silver / Bronze",
-        xaxis_title="Quốc gia",
+        title=medal_tally_title(top_n, level),
+        xaxis_title="Khu vực" if level == REGION_COLUMN else "Quốc gia",
         yaxis_title="Số huy chương",
         font_family='Inter',
         transition={'duration': 600, 'easing': 'cubic-in-out'},
@@ -550,6 +1477,95 @@ def create_animated_medal_tally(analysis, top_n):
     )
     return fig
 
+def home_advantage_view(use_cleaned, years=None, year_range=None, nocs=None, generation=None):
+    """Lợi thế sân nhà tính trên toàn bộ dataset (tỷ lệ cần mẫu số đầy đủ), lọc theo năm/NOC đã chọn."""
+    home = get_cached_analysis(use_cleaned, generation).home_advantage()
+    if years:
+        home = home[home['Year'].isin(years)]
+    if year_range is not None:
+        home = home[home['Year'].between(year_range[0], year_range[1])]
+    if nocs:
+        home = home[home['HostNOC'].isin(nocs)]
+    return home
+
+def create_home_advantage_chart(home):
+    if home is None or home.empty:
+        return {}
+
+    labels = home['Games'] + " (" + home['HostNOC'] + ")"
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        name="Khi làm chủ nhà",
+        x=labels,
+        y=home['HostShare'],
+        marker_color="#FFC107",
+        customdata=home[['HostMedals', 'Lift']],
+        hovertemplate='<b>%{x}</b><br>Tỷ lệ: %{y:.2%}<br>%{customdata[0]:,} huy chương<br>Lift: %{customdata[1]}<extra></extra>'
+    ))
+    fig.add_trace(go.Bar(
+        name="Các kỳ lân cận",
+        x=labels,
+        y=home['SurroundingShare'],
+        marker_color="#4B5563",
+        hovertemplate='<b>%{x}</b><br>Tỷ lệ TB: %{y:.2%}<extra></extra>'
+    ))
+    fig.update_layout(
+        barmode='group',
+        title="Lợi thế sân nhà: tỷ lệ huy chương khi đăng cai vs các kỳ lân cận",
+        xaxis_title="Kỳ Olympic (chủ nhà)",
+        yaxis_title="Tỷ lệ huy chương",
+        yaxis_tickformat='.0%',
+        font_family='Inter',
+        transition={'duration': 600, 'easing': 'cubic-in-out'},
+        xaxis_tickangle=-45
+    )
+    return fig
+
+def create_similar_countries_bar(similar):
+    if similar is None or similar.empty:
+        return {}
+
+    fig = px.bar(
+        similar,
+        x="Similar",
+        y="Similarity",
+        color="NOC",
+        barmode="group",
+        title="Quốc gia có hồ sơ huy chương tương đồng nhất (cosine theo môn)",
+        labels={"Similar": "Quốc gia", "Similarity": "Độ tương đồng", "NOC": "So với"},
+    )
+    fig.update_traces(
+        hovertemplate='<b>%{x}</b><br>Độ tương đồng: %{y:.3f}<extra></extra>',
+        marker_line_color='white',
+        marker_line_width=1
+    )
+    fig.update_layout(
+        title_font_size=18,
+        font_family='Inter',
+        transition={'duration': 600, 'easing': 'cubic-in-out'},
+        yaxis_range=[max(0, similar["Similarity"].min() - 0.05), 1],
+        xaxis_tickangle=-45
+    )
+    return fig
+
+def create_similarity_heatmap(similarity):
+    if similarity is None or similarity.empty:
+        return {}
+
+    fig = px.imshow(
+        similarity,
+        color_continuous_scale="Viridis",
+        title="Ma trận tương đồng hồ sơ huy chương",
+        labels={"color": "Cosine"},
+        aspect="auto",
+    )
+    fig.update_layout(
+        title_font_size=18,
+        font_family='Inter',
+        transition={'duration': 500, 'easing': 'cubic-in-out'}
+    )
+    return fig
+
 def create_animated_gender_pie(gender):
     counts = gender.get("gender_counts")
     if counts is None or counts.empty:
@@ -689,7 +1705,183 @@ def create_animated_physique_comparison(phys):
     )
     return fig
 
+PHYSIQUE_LABELS = {"Height": "Chiều cao (cm)", "Weight": "Cân nặng (kg)", "BMI": "BMI"}
+
+def create_physique_histogram(hist, metric):
+    if hist is None or hist.empty:
+        return {}
+    fig = go.Figure()
+    colors = {"M": "#0d6efd", "F": "#dc3545"}
+    for sex, part in hist.groupby("Sex"):
+        fig.add_trace(go.Bar(
+            name="Nam" if sex == "M" else "Nữ" if sex == "F" else str(sex),
+            x=(part["BinLeft"] + part["BinRight"]) / 2,
+            y=part["Count"],
+            width=part["BinRight"] - part["BinLeft"],
+            marker_color=colors.get(sex),
+            opacity=0.6,
+            hovertemplate='%{x:.1f}: %{y:,}<extra></extra>'
+        ))
+    fig.update_layout(
+        barmode='overlay',
+        title=f"Phân bố {PHYSIQUE_LABELS[metric]}",
+        xaxis_title=PHYSIQUE_LABELS[metric],
+        yaxis_title="Số lượt",
+        font_family='Inter',
+        transition={'duration': 500, 'easing': 'cubic-in-out'}
+    )
+    return fig
+
+def create_physique_percentile_box(summary, top_n, metric="Height"):
+    if summary is None or summary.empty:
+        return {}
+    stats = summary.xs(metric, level="Metric").reset_index()
+    stats = stats[stats["N"] > 0]
+    # Top-N môn đông VĐV nhất để biểu đồ còn đọc được
+    sports = stats.groupby("Sport")["N"].sum().nlargest(top_n).index
+    stats = stats[stats["Sport"].isin(sports)].sort_values("P50")
+    fig = go.Figure()
+    colors = {"M": "#0d6efd", "F": "#dc3545"}
+    for sex, part in stats.groupby("Sex"):
+        fig.add_trace(go.Box(
+            name="Nam" if sex == "M" else "Nữ" if sex == "F" else str(sex),
+            x=part["Sport"],
+            q1=part["P25"], median=part["P50"], q3=part["P75"],
+            lowerfence=part["P5"], upperfence=part["P95"],
+            mean=part["Mean"],
+            marker_color=colors.get(sex),
+        ))
+    fig.update_layout(
+        boxmode='group',
+        title=f"{PHYSIQUE_LABELS[metric]} theo môn — P5/P25/P50/P75/P95",
+        yaxis_title=PHYSIQUE_LABELS[metric],
+        font_family='Inter',
+        transition={'duration': 500, 'easing': 'cubic-in-out'}
+    )
+    return fig
+
+def create_athlete_medal_timeline(rows):
+    if rows.empty or "Year" not in rows.columns:
+        return {}
+    medal = rows["Medal"] if "Medal" in rows.columns else pd.Series("No Medal", index=rows.index)
+    timeline = pd.crosstab(rows["Year"], medal.fillna("No Medal")).reset_index()
+    value_columns = [m for m in ["Gold", "Silver", "Bronze", "No Medal"] if m in timeline.columns]
+    timeline = timeline.melt(id_vars="Year", value_vars=value_columns, var_name="Medal", value_name="Số lượt")
+    fig = px.bar(
+        timeline,
+        x="Year",
+        y="Số lượt",
+        color="Medal",
+        color_discrete_map={"Gold": "#FFD700", "Silver": "#C0C0C0", "Bronze": "#CD7F32", "No Medal": "#adb5bd"},
+        title="Thành tích theo kỳ Olympic",
+    )
+    fig.update_layout(
+        barmode='stack',
+        xaxis_type='category',
+        font_family='Inter',
+        transition={'duration': 500, 'easing': 'cubic-in-out'}
+    )
+    return fig
+
+# Import xong (chưa tính dataset nếu nạp nền)
+STARTUP_PROFILE["total_import"] = round(time.perf_counter() - _IMPORT_STARTED, 3)
+
+# ============== Warmup ==============
+def default_figure(view, figure_id):
+    """Figure với top_n / cấp mặc định (đúng khóa cache callback tra khi người dùng chưa đổi gì)."""
+    filters, top_n, level, build = FIGURE_BUILDERS[figure_id]
+    n = DEFAULT_TOP_N if top_n else None
+    lvl = 'NOC' if level else None
+    return view.cached(("figure", figure_id), lambda: build(view, n, lvl), n, lvl)
+
+def warm_generation(generation):
+    """Dựng chỉ mục tìm kiếm và mọi figure với bộ lọc mặc định của 1 thế hệ dữ liệu; trả về danh sách lỗi."""
+    analysis = get_cached_analysis(generation=generation)
+    # Typeahead VĐV / ô tìm Nội dung - Đội: dựng chỉ mục 1 lần thay vì ở lần gõ đầu tiên
+    analysis.athlete_index()
+    analysis.text_index()
+    view = FilterView(generation.source == "cleaned", generation=generation)
+    errors = []
+    for figure_id in FIGURE_BUILDERS:
+        try:
+            default_figure(view, figure_id)
+        except Exception as e:
+            errors.append(f"{figure_id}: {e}")
+    if CLIENT_FILTERING:
+        try:
+            view.cached("client_aggregate", lambda: client_aggregate(view))
+        except Exception as e:
+            errors.append(f"client-aggregate: {e}")
+    return errors
+
+def warmup(use_cleaned=True):
+    """
+    Chuẩn bị trước khi nhận request: nạp dataset, dựng chỉ mục tìm kiếm và mọi figure với bộ lọc
+    mặc định vào cache kết quả (đúng khóa callback sẽ tra). Gọi trước fork (wsgi, preload_app)
+    thì mọi worker dùng chung các trang bộ nhớ này.
+    """
+    started = time.perf_counter()
+    errors = warm_generation(current_generation(use_cleaned))
+    READINESS.update(ready=True, warmup_seconds=round(time.perf_counter() - started, 3), figures=len(FIGURE_BUILDERS) - len(errors), errors=errors)
+    MEMORY_BUDGET.enforce()
+    print(f"[Warmup] {READINESS['figures']} figure trong {READINESS['warmup_seconds']}s" + (f", lỗi: {errors}" if errors else ""))
+    return READINESS
+
+# ============== Nạp lại nóng khi file dữ liệu đổi ==============
+HOT_RELOAD = os.environ.get("OLYMPIC_HOT_RELOAD", "1") != "0"
+WATCH_INTERVAL = float(os.environ.get("OLYMPIC_WATCH_INTERVAL", "2"))
+
+def _refresh_metadata(generation):
+    global DATASET_METADATA, YEAR_MIN, YEAR_MAX
+    metadata = _dataset_metadata(generation.dataframe)
+    # Gán 1 lần: request đang dựng layout thấy trọn bản cũ hoặc trọn bản mới
+    DATASET_METADATA, YEAR_MIN, YEAR_MAX = metadata, metadata["year_min"], metadata["year_max"]
+
+def reload_dataset(key):
+    """
+    Dựng thế hệ mới của 1 nguồn (dataset, phân tích, chỉ mục, figure mặc định) ngay trong luồng gọi
+    trong khi request vẫn dùng thế hệ cũ, thay 1 lần rồi bỏ cache của thế hệ cũ. Nguồn chưa nạp:
+    chỉ bỏ lượt nạp đang dở, lần dùng sau đọc file mới.
+    """
+    if DATA_LOADER.peek(key) is None:
+        DATA_LOADER.invalidate(key)
+        return None
+    started = time.perf_counter()
+    generation = DATA_LOADER.reload(key, prepare=warm_generation)
+    _drop_stale(key, generation.number)
+    if key == "cleaned":
+        _refresh_metadata(generation)
+    MEMORY_BUDGET.enforce()
+    print(f"[Reload] {key}: thế hệ #{generation.number} sau {time.perf_counter() - started:.1f}s")
+    return generation
+
+def _data_files_changed(paths):
+    keys = set()
+    if CLEANED_CSV in paths:
+        keys.add("cleaned")
+    if any(path != CLEANED_CSV for path in paths):
+        keys.add("raw")
+        # Chưa có file đã làm sạch -> nguồn "cleaned" cũng làm sạch từ dữ liệu gốc
+        if not CLEANED_CSV.exists():
+            keys.add("cleaned")
+    print(f"[Reload] File đổi: {', '.join(p.name for p in paths)}")
+    for key in sorted(keys):
+        reload_dataset(key)
+
+DATA_WATCHER = FileWatcher([CLEANED_CSV, *raw_data_files()], _data_files_changed, interval=WATCH_INTERVAL)
+
+def start_hot_reload():
+    """
+    Bắt đầu theo dõi file dữ liệu (OLYMPIC_HOT_RELOAD=0 để tắt). Gọi trong tiến trình phục vụ request:
+    với gunicorn là từng worker (post_fork), không phải master.
+    """
+    if HOT_RELOAD:
+        DATA_WATCHER.start()
+
 # ============== Chạy app ==============
 if __name__ == '__main__':
+    # Server dev: warmup chạy nền, /healthz báo sẵn sàng khi xong. Production: python wsgi.py
+    threading.Thread(target=warmup, daemon=True).start()
+    start_hot_reload()
     print("Đang khởi động Dash... Mở trình duyệt: http://127.0.0.1:8050")
     app.run(debug=True, host='127.0.0.1', port=8050)
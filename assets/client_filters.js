@@ -0,0 +1,219 @@
+/*
+ * Lọc + gộp lại phía trình duyệt cho các biểu đồ đếm (OLYMPIC_CLIENT_FILTERING=1).
+ * Server gửi 1 lần bảng đếm Year × NOC × Sport × Sex × Medal (mỗi cột là mảng số nguyên
+ * mã hóa base64, core/client_aggregate.py) kèm figure mặc định làm khuôn; đổi bộ lọc chỉ
+ * thay dữ liệu của các trace, không gọi server. Trường hợp bảng đếm không đủ (ô tìm
+ * Nội dung / Đội, cấp khu vực, nguồn chưa nạp) -> trả bộ lọc cho callback server tính.
+ */
+(function () {
+    var MEDALS = ["Gold", "Silver", "Bronze"];
+    var TYPES = {uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array};
+    // Bảng đếm -> cột đã giải mã (giải mã 1 lần cho mỗi lần server gửi)
+    var decoded = new WeakMap();
+
+    function decodeColumn(column) {
+        var binary = atob(column.data);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new TYPES[column.dtype](bytes.buffer);
+    }
+
+    function columns(aggregate) {
+        var cols = decoded.get(aggregate);
+        if (!cols) {
+            cols = {count: decodeColumn(aggregate.counts)};
+            Object.keys(aggregate.codes).forEach(function (dim) {
+                cols[dim] = decodeColumn(aggregate.codes[dim]);
+            });
+            decoded.set(aggregate, cols);
+        }
+        return cols;
+    }
+
+    function selected(values) {
+        return values && values.length ? values : null;
+    }
+
+    // keep[mã] = 1 nếu giá trị của chiều thỏa bộ lọc
+    function keepCodes(dictionary, test) {
+        var keep = new Uint8Array(dictionary.length);
+        for (var i = 0; i < dictionary.length; i++) {
+            keep[i] = test(dictionary[i]) ? 1 : 0;
+        }
+        return keep;
+    }
+
+    function memberOf(values) {
+        var chosen = selected(values);
+        return function (value) { return chosen === null || chosen.indexOf(value) >= 0; };
+    }
+
+    // Vị trí các tổ hợp thỏa mọi bộ lọc sidebar (giống _filter_data trên server)
+    function matchingRows(aggregate, filters) {
+        var cols = columns(aggregate);
+        var range = filters.year_range;
+        var inYears = memberOf(filters.years);
+        var keep = {
+            Year: keepCodes(aggregate.dims.Year, function (year) {
+                return inYears(year) && (!range || (year >= range[0] && year <= range[1]));
+            }),
+            NOC: keepCodes(aggregate.dims.NOC, memberOf(filters.nocs)),
+            Sport: keepCodes(aggregate.dims.Sport, memberOf(filters.sports)),
+            Sex: keepCodes(aggregate.dims.Sex, memberOf(filters.sexes)),
+            Medal: keepCodes(aggregate.dims.Medal, memberOf(filters.medals))
+        };
+        var dims = Object.keys(keep);
+        var rows = [];
+        for (var i = 0; i < cols.count.length; i++) {
+            var ok = true;
+            for (var d = 0; d < dims.length && ok; d++) {
+                ok = keep[dims[d]][cols[dims[d]][i]] === 1;
+            }
+            if (ok) {
+                rows.push(i);
+            }
+        }
+        return rows;
+    }
+
+    // Tổng số dòng theo 1 chiều -> [[giá trị, số]] giảm dần (medalsOnly: chỉ dòng Gold/Silver/Bronze)
+    function countBy(aggregate, rows, dim, medalsOnly) {
+        var cols = columns(aggregate);
+        var isMedal = keepCodes(aggregate.dims.Medal, function (m) { return MEDALS.indexOf(m) >= 0; });
+        var totals = new Float64Array(aggregate.dims[dim].length);
+        rows.forEach(function (i) {
+            if (!medalsOnly || isMedal[cols.Medal[i]]) {
+                totals[cols[dim][i]] += cols.count[i];
+            }
+        });
+        var pairs = [];
+        totals.forEach(function (total, code) {
+            if (total > 0 && aggregate.dims[dim][code] !== null) {
+                pairs.push([aggregate.dims[dim][code], total]);
+            }
+        });
+        return pairs.sort(function (a, b) { return b[1] - a[1]; });
+    }
+
+    function pluck(pairs, at) {
+        return pairs.map(function (pair) { return pair[at]; });
+    }
+
+    function clone(template) {
+        return JSON.parse(JSON.stringify(template));
+    }
+
+    // Khuôn dựng với top_n mặc định: "Top 15 ..." -> "Top <topN> ..."
+    function retitle(figure, topN) {
+        var title = figure.layout.title || {};
+        figure.layout.title = Object.assign({}, title, {text: String(title.text || "").replace(/Top \d+/, "Top " + topN)});
+    }
+
+    // Mỗi loại biểu đồ: (khuôn, bảng đếm, tổ hợp đã lọc, top_n, cấu hình) -> figure hoặc {} nếu trống
+    var CHARTS = {
+        medalPie: function (template, aggregate, rows) {
+            var medals = countBy(aggregate, rows, "Medal", true);
+            if (!medals.length) { return {}; }
+            var figure = clone(template);
+            figure.data[0].labels = pluck(medals, 0);
+            figure.data[0].values = pluck(medals, 1);
+            return figure;
+        },
+        medalCountBar: function (template, aggregate, rows) {
+            var medals = countBy(aggregate, rows, "Medal", true);
+            if (!medals.length) { return {}; }
+            var figure = clone(template);
+            var traces = {};
+            figure.data.forEach(function (trace) { traces[trace.name] = trace; });
+            figure.data = medals.filter(function (pair) { return traces[pair[0]]; }).map(function (pair) {
+                return Object.assign(traces[pair[0]], {x: [pair[0]], y: [pair[1]]});
+            });
+            return figure;
+        },
+        genderBar: function (template, aggregate, rows) {
+            var sexes = countBy(aggregate, rows, "Sex", false);
+            if (!sexes.length) { return {}; }
+            var figure = clone(template);
+            figure.data[0].x = pluck(sexes, 0).map(String);
+            figure.data[0].y = pluck(sexes, 1);
+            figure.data[0].marker = Object.assign({}, figure.data[0].marker, {color: pluck(sexes, 1)});
+            return figure;
+        },
+        yearLine: function (template, aggregate, rows) {
+            var years = countBy(aggregate, rows, "Year", true).sort(function (a, b) { return a[0] - b[0]; });
+            if (!years.length) { return {}; }
+            var figure = clone(template);
+            figure.data[0].x = pluck(years, 0);
+            figure.data[0].y = pluck(years, 1);
+            return figure;
+        },
+        rankedBar: function (template, aggregate, rows, topN, options) {
+            var ranked = countBy(aggregate, rows, options.dimension, true).slice(0, topN);
+            if (!ranked.length) { return {}; }
+            var figure = clone(template);
+            figure.data[0].x = pluck(ranked, 1);
+            figure.data[0].y = pluck(ranked, 0);
+            figure.data[0].marker = Object.assign({}, figure.data[0].marker, {color: pluck(ranked, 1)});
+            retitle(figure, topN);
+            return figure;
+        },
+        medalTally: function (template, aggregate, rows, topN, options) {
+            var cols = columns(aggregate);
+            var medalIndex = aggregate.dims.Medal.map(function (m) { return MEDALS.indexOf(m); });
+            var nocs = aggregate.dims.NOC;
+            var grid = nocs.map(function () { return [0, 0, 0]; });
+            rows.forEach(function (i) {
+                var medal = medalIndex[cols.Medal[i]];
+                if (medal >= 0) {
+                    grid[cols.NOC[i]][medal] += cols.count[i];
+                }
+            });
+            // Như medal_tally_table: NOC có huy chương, sắp theo số Gold giảm dần
+            var order = [];
+            grid.forEach(function (counts, code) {
+                if (nocs[code] !== null && counts[0] + counts[1] + counts[2] > 0) {
+                    order.push(code);
+                }
+            });
+            order.sort(function (a, b) { return grid[b][0] - grid[a][0]; });
+            order = order.slice(0, topN);
+            if (!order.length) { return {}; }
+            var figure = clone(template);
+            figure.data.forEach(function (trace) {
+                var m = MEDALS.indexOf(trace.name);
+                trace.x = order.map(function (code) { return nocs[code]; });
+                trace.y = order.map(function (code) { return m >= 0 ? grid[code][m] : 0; });
+            });
+            retitle(figure, topN);
+            return figure;
+        }
+    };
+
+    window.olympicClient = {
+        /*
+         * values: giá trị các Input theo thứ tự của figure_callback (bộ lọc, [top-n], [country-level]).
+         * Trả về [figure, no_update] khi tự tính được, ngược lại [no_update, values] để server tính.
+         */
+        render: function (aggregate, values, options) {
+            var noUpdate = window.dash_clientside.no_update;
+            var filters = {};
+            options.filters.forEach(function (name, i) { filters[name] = values[i]; });
+            var topN = options.top_n ? (values[options.filters.length] || options.default_top_n) : null;
+            var level = options.level ? values[values.length - 1] : "NOC";
+            var source = filters.use_cleaned === false ? "raw" : "cleaned";
+            var template = aggregate && aggregate.templates[options.figure_id];
+            if (!template || !template.data || aggregate.source !== source || level !== "NOC"
+                || (filters.text_query && filters.text_query.trim())) {
+                return [noUpdate, values];
+            }
+            var rows = matchingRows(aggregate, filters);
+            if (!rows.length) {
+                // Không còn dòng nào: filter-status đã cảnh báo chung, figure để trống
+                return [{}, noUpdate];
+            }
+            return [CHARTS[options.chart](template, aggregate, rows, topN, options), noUpdate];
+        }
+    };
+})();
@@ -0,0 +1,130 @@
+"""
+Benchmark các tổng hợp chính của DataAnalysis:
+group-by pandas trên khóa chuỗi (cách cũ) vs kernel np.bincount trên cột mã số nguyên.
+Chạy: python benchmark.py
+      python benchmark.py --csv output/csv/cleaned_data.csv --repeat 7 --scale 4
+      python benchmark.py --startup          (hồ sơ khởi động lạnh của app_dash)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.analysis import DataAnalysis, DIMENSION_CODE_COLUMNS, MEDAL_TYPES, dimension_codes
+
+# Cách tính cũ: group-by / value_counts trên cột chuỗi
+PANDAS_PATHS = {
+    "medal_count": lambda df: df[df["Medal"].isin(MEDAL_TYPES)]["Medal"].value_counts(),
+    "medals_by_country": lambda df: (
+        df[df["Medal"].isin(MEDAL_TYPES)].groupby("NOC")["Medal"].count().sort_values(ascending=False)
+    ),
+    "country_most_gold": lambda df: (
+        df[df["Medal"] == "Gold"].groupby("NOC")["Medal"].count().sort_values(ascending=False)
+    ),
+    "medals_by_year": lambda df: df[df["Medal"].isin(MEDAL_TYPES)].groupby("Year")["Medal"].count(),
+    "medals_by_sport": lambda df: (
+        df[df["Medal"].isin(MEDAL_TYPES)].groupby("Sport")["Medal"].count().sort_values(ascending=False)
+    ),
+    "medal_tally_table": lambda df: df[df["Medal"].isin(MEDAL_TYPES)].pivot_table(
+        index="NOC", columns="Medal", values="Event", aggfunc="count", fill_value=0
+    ),
+    "analyze_data_by_gender": lambda df: (
+        df["Sex"].value_counts(),
+        df["Sex"].value_counts(normalize=True),
+        df[df["Medal"] != "No Medal"].groupby("Sex")["Medal"].count(),
+    ),
+    "physique_by_sport": lambda df: (
+        df.dropna(subset=["Height", "Weight"]).groupby("Sport")[["Height", "Weight"]].mean()
+    ),
+}
+
+
+def load_frame(csv_path: Path, scale: int) -> pd.DataFrame:
+    """Đọc dữ liệu đã làm sạch, nhân bản scale lần rồi gắn cột mã như DataCleaner."""
+    df = pd.read_csv(csv_path)
+    if scale > 1:
+        df = pd.concat([df] * scale, ignore_index=True)
+    for dimension, column in DIMENSION_CODE_COLUMNS.items():
+        if dimension in df.columns and column not in df.columns:
+            df[column] = dimension_codes(df[dimension])
+    return df
+
+
+def best_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def startup_profile(top: int = 15):
+    """
+    Khởi động lạnh app_dash trong tiến trình mới với python -X importtime: in các giai đoạn
+    (STARTUP_PROFILE: import thư viện, metadata, layout, nạp dataset) và các module import lâu nhất.
+    """
+    root = Path(__file__).resolve().parent
+    code = (
+        "import time, json, app_dash; "
+        "t = time.perf_counter(); app_dash.get_cached_data(True); "
+        "print(json.dumps(dict(app_dash.STARTUP_PROFILE, dataset_ready_after_import=round(time.perf_counter() - t, 3))))"
+    )
+    env = dict(os.environ, OLYMPIC_BACKGROUND_CALLBACKS="0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=root, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        return
+    stages = json.loads(result.stdout.strip().splitlines()[-1])
+    print("Giai đoạn khởi động (s):")
+    for stage, seconds in stages.items():
+        print(f"  {stage:<28}{seconds:>8.3f}")
+    # Dòng importtime: "import time: self [us] | cumulative | imported package"; thụt 1 + 2 x cấp,
+    # lấy các module app_dash import trực tiếp (cấp 1)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        name = parts[2]
+        if parts[1].strip().isdigit() and name.startswith("   ") and not name.startswith("     "):
+            modules.append((int(parts[1]) / 1e6, name.strip()))
+    print("Module import lâu nhất (cấp 1, s, cộng dồn):")
+    for seconds, name in sorted(modules, reverse=True)[:top]:
+        print(f"  {name:<28}{seconds:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark group-by pandas vs kernel mã số nguyên")
+    parser.add_argument("--csv", default="output/csv/cleaned_data.csv", help="File dữ liệu đã làm sạch")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần chạy, lấy thời gian nhỏ nhất")
+    parser.add_argument("--scale", type=int, default=1, help="Nhân bản dữ liệu để thử với khung lớn hơn")
+    parser.add_argument("--startup", action="store_true", help="Hồ sơ khởi động lạnh của app_dash (import, metadata, dataset)")
+    args = parser.parse_args()
+
+    if args.startup:
+        startup_profile()
+        return
+
+    df = load_frame(Path(args.csv), args.scale)
+    print(f"{len(df):,} dòng, lặp {args.repeat} lần (ms, nhỏ nhất)")
+    print(f"{'Phép tổng hợp':<24}{'pandas':>10}{'kernel':>10}{'x':>8}")
+    for name, pandas_path in PANDAS_PATHS.items():
+        pandas_time = best_time(lambda: pandas_path(df), args.repeat)
+        # Mỗi lần 1 DataAnalysis mới (như mỗi callback Dash) -> tính cả chi phí đọc cột mã
+        kernel_time = best_time(lambda: getattr(DataAnalysis(df), name)(), args.repeat)
+        speedup = pandas_time / kernel_time if kernel_time > 0 else np.inf
+        print(f"{name:<24}{pandas_time * 1000:>10.2f}{kernel_time * 1000:>10.2f}{speedup:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,280 @@
+import os
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence, Tuple, Union, List
+
+from core.country_report import process_pool_executor, write_country_reports
+from core.results_store import ResultsStore
+from core.search import AthleteIndex, TextIndex
+from core.sketch import PhysiqueSketch
+from core.codes import (
+    AGE_BINS,
+    AGE_GROUP_COLUMN,
+    AGE_LABELS,
+    DIMENSION_CODE_COLUMNS,
+    REGION_COLUMN,
+    bin_codes,
+    dimension_codes,
+    region_categorical,
+)
+
+
+def _sparse():
+    """scipy.sparse, import ở lần dùng đầu (scipy đi kèm scikit-learn); None khi không có scipy."""
+    try:
+        from scipy import sparse
+    except ImportError:
+        return None
+    return sparse
+
+
+MEDAL_TYPES = ["Gold", "Silver", "Bronze"]
+# Lớp cuối của khối đếm theo năm: các dòng không có huy chương
+NO_MEDAL = "No Medal"
+# Các cấp tổng hợp quốc gia: NOC hoặc khu vực (gộp các NOC lịch sử)
+COUNTRY_LEVELS = ("NOC", REGION_COLUMN)
+# Cách đếm huy chương: "athlete" = mỗi VĐV 1 huy chương (mỗi dòng),
+# "event" = mỗi nội dung 1 huy chương cho mỗi NOC (đồng đội chỉ tính 1 lần)
+COUNT_MODES = ("athlete", "event")
+# Trục thời gian của ma trận huy chương: "Year" gộp Summer + Winter cùng năm (trước 1994), "Games" tách từng kỳ
+TIME_AXES = ("Year", "Games")
+
+# Nước chủ nhà (NOC) của từng kỳ Olympic, theo nhãn cột Games ("<Year> <Season>").
+# 1956 Summer: Melbourne (AUS); môn cưỡi ngựa tổ chức riêng ở Stockholm.
+HOST_NOC_BY_GAMES = {
+    "1896 Summer": "GRE", "1900 Summer": "FRA", "1904 Summer": "USA", "1906 Summer": "GRE",
+    "1908 Summer": "GBR", "1912 Summer": "SWE", "1920 Summer": "BEL", "1924 Summer": "FRA",
+    "1928 Summer": "NED", "1932 Summer": "USA", "1936 Summer": "GER", "1948 Summer": "GBR",
+    "1952 Summer": "FIN", "1956 Summer": "AUS", "1960 Summer": "ITA", "1964 Summer": "JPN",
+    "1968 Summer": "MEX", "1972 Summer": "FRG", "1976 Summer": "CAN", "1980 Summer": "URS",
+    "1984 Summer": "USA", "1988 Summer": "KOR", "1992 Summer": "ESP", "1996 Summer": "USA",
+    "2000 Summer": "AUS", "2004 Summer": "GRE", "2008 Summer": "CHN", "2012 Summer": "GBR",
+    "2016 Summer": "BRA",
+    "1924 Winter": "FRA", "1928 Winter": "SUI", "1932 Winter": "USA", "1936 Winter": "GER",
+    "1948 Winter": "SUI", "1952 Winter": "NOR", "1956 Winter": "ITA", "1960 Winter": "USA",
+    "1964 Winter": "AUT", "1968 Winter": "FRA", "1972 Winter": "JPN", "1976 Winter": "AUT",
+    "1980 Winter": "USA", "1984 Winter": "YUG", "1988 Winter": "CAN", "1992 Winter": "FRA",
+    "1994 Winter": "NOR", "1998 Winter": "JPN", "2002 Winter": "USA", "2006 Winter": "ITA",
+    "2010 Winter": "CAN", "2014 Winter": "RUS",
+}
+
+
+def bootstrap_moments(values, n_boot: int, rng: np.random.Generator, max_cells: int = 500_000):
+    """
+    Bootstrap trung bình / phương sai (ddof=1) cho từng cột của values (n × v).
+    Mỗi khối rút 1 ma trận chỉ số (số mẫu × n) bằng rng.integers, đổi thành số lần mỗi dòng
+    được chọn bằng 1 lần np.bincount, rồi nhân ma trận với [x, x²] để có tổng và tổng bình phương.
+    Trả về (means, variances), mỗi mảng có shape (n_boot, v).
+    """
+    values = np.asarray(values, dtype=float)
+    n, n_vars = values.shape
+    means = np.full((n_boot, n_vars), np.nan)
+    variances = np.full((n_boot, n_vars), np.nan)
+    if n == 0:
+        return means, variances
+    # Trừ trung bình trước để tổng bình phương không mất chính xác
+    center = values.mean(axis=0)
+    shifted = values - center
+    moments = np.hstack([shifted, shifted ** 2])
+    chunk = max(1, max_cells // n)
+    for start in range(0, n_boot, chunk):
+        stop = min(start + chunk, n_boot)
+        idx = rng.integers(0, n, size=(stop - start, n))
+        idx += (np.arange(stop - start) * n)[:, None]
+        counts = np.bincount(idx.ravel(), minlength=(stop - start) * n).reshape(stop - start, n)
+        sums = counts.astype(float) @ moments
+        sample_means = sums[:, :n_vars] / n
+        means[start:stop] = sample_means + center
+        if n > 1:
+            variances[start:stop] = (sums[:, n_vars:] - n * sample_means ** 2) / (n - 1)
+    return means, variances
+
+
+def _physique_values(frame: pd.DataFrame) -> np.ndarray:
+    """Ma trận (n × 3): Height, Weight, BMI từng dòng."""
+    height = frame["Height"].to_numpy(dtype=float)
+    weight = frame["Weight"].to_numpy(dtype=float)
+    return np.column_stack([height, weight, weight / (height / 100) ** 2])
+
+
+def _bmi_of_means(means: np.ndarray) -> np.ndarray:
+    """BMI tính từ Height/Weight trung bình, giống physique_by_sport."""
+    return means[..., 1] / ((means[..., 0] / 100) ** 2)
+
+
+def _cohen_d(mean_a, var_a, n_a, mean_b, var_b, n_b):
+    pooled = np.sqrt(((n_a - 1) * var_a + (n_b - 1) * var_b) / max(n_a + n_b - 2, 1))
+    return np.divide(mean_a - mean_b, pooled, out=np.full(np.shape(pooled), np.nan), where=pooled > 0)
+
+
+def _physique_group_ci(medalist: np.ndarray, others: np.ndarray, n_boot: int, ci: float, seed) -> dict:
+    """
+    Bootstrap phân tầng 2 nhóm (có / không huy chương) của 1 tập VĐV:
+    CI trung bình toàn tập, CI từng nhóm, chênh lệch và Cohen's d.
+    """
+    rng = np.random.default_rng(seed)
+    n_a, n_b = len(medalist), len(others)
+    q = [(1 - ci) / 2, 1 - (1 - ci) / 2]
+    mean_a, var_a = bootstrap_moments(medalist, n_boot, rng)
+    mean_b, var_b = bootstrap_moments(others, n_boot, rng)
+    both = np.concatenate([medalist, others])
+
+    def interval(boot):
+        return np.quantile(boot, q, axis=0) if np.isfinite(boot).all() else np.full((2,) + boot.shape[1:], np.nan)
+
+    # Trung bình toàn tập = trung bình có trọng số của 2 nhóm đã resample
+    weights = np.array([n_a, n_b], dtype=float) / max(n_a + n_b, 1)
+    pooled_boot = np.nan_to_num(mean_a) * weights[0] + np.nan_to_num(mean_b) * weights[1]
+    point = both[:, :2].mean(axis=0) if len(both) else np.full(2, np.nan)
+    result = {
+        "N": n_a + n_b,
+        "Mean": np.append(point, _bmi_of_means(point)),
+        "Mean_CI": np.column_stack([interval(pooled_boot[:, :2]), interval(_bmi_of_means(pooled_boot))[:, None]]),
+        "Groups": {},
+    }
+    for name, values, boot in (("Medalist", medalist, mean_a), ("Non-Medalist", others, mean_b)):
+        group_point = values[:, :2].mean(axis=0) if len(values) else np.full(2, np.nan)
+        result["Groups"][name] = (
+            np.append(group_point, _bmi_of_means(group_point)),
+            np.column_stack([interval(boot[:, :2]), interval(_bmi_of_means(boot))[:, None]]),
+        )
+    if n_a >= 2 and n_b >= 2:
+        diff_boot = np.column_stack([mean_a[:, :2] - mean_b[:, :2], _bmi_of_means(mean_a) - _bmi_of_means(mean_b)])
+        d_boot = _cohen_d(mean_a, var_a, n_a, mean_b, var_b, n_b)
+        d_point = _cohen_d(medalist.mean(axis=0), medalist.var(axis=0, ddof=1), n_a,
+                           others.mean(axis=0), others.var(axis=0, ddof=1), n_b)
+        result["Diff"] = result["Groups"]["Medalist"][0] - result["Groups"]["Non-Medalist"][0]
+        result["Diff_CI"] = interval(diff_boot)
+        result["d"] = d_point
+        result["d_CI"] = interval(d_boot)
+    else:
+        result["Diff"] = result["d"] = np.full(3, np.nan)
+        result["Diff_CI"] = result["d_CI"] = np.full((2, 3), np.nan)
+    return result
+
 
 class DataAnalysis:
-    def __init__(self, dataframe: pd.DataFrame):
+    def __init__(
+        self,
+        dataframe: pd.DataFrame,
+        age_bins: Optional[Sequence[float]] = None,
+        age_labels: Optional[Sequence[str]] = None,
+    ):
         self.dataframe = dataframe
+        self.age_bins = list(age_bins) if age_bins is not None else AGE_BINS
+        self.age_labels = list(age_labels) if age_labels is not None else AGE_LABELS
+        if len(self.age_labels) != len(self.age_bins) - 1:
+            raise ValueError("age_labels phải có đúng len(age_bins) - 1 phần tử")
+        self._age_codes: Optional[np.ndarray] = None
+        self._event_medals: Optional[pd.DataFrame] = None
+        # (dimension, medals_only, count_mode, axis) -> (cube, dim_index, axis_index)
+        self._cubes = {}
+        # (dimension, count_mode) -> prefix sums theo Year của khối đếm đầy đủ
+        self._year_prefix = {}
+        # (era_years, count_mode) -> (profiles chuẩn hóa L2, noc_index, feature_index)
+        self._profiles = {}
+        self._physique_sketch: Optional[PhysiqueSketch] = None
+        # dimension -> (mã từng dòng, rows[c] = 1 dòng có mã c hoặc -1)
+        self._dim_codes = {}
+        # top_athletes -> {NOC: báo cáo}
+        self._country_reports = {}
+        self._athlete_index: Optional[AthleteIndex] = None
+        # columns -> chỉ mục ngược Event/Team
+        self._text_indexes = {}
+        # Trạng thái ingest: bảng gom cho kho kết quả (None = không gom), có ghi CSV không
+        self._ingest_tables: Optional[dict] = None
+        self._ingest_sources = {}
+        self._ingest_root: Optional[Path] = None
+        self._ingest_csv = True
+
+    # =====================================================
+    #  INTEGER CODES: kernel group-by bằng np.bincount
+    # =====================================================
+
+    def _codes(self, dimension: str):
+        """
+        Mã số nguyên của 1 chiều, tính 1 lần. Dùng cột mã có sẵn (DIMENSION_CODE_COLUMNS)
+        nếu dataset mang theo, ngược lại factorize 1 lần.
+        Trả về (codes, rows): rows[c] là vị trí 1 dòng có mã c (-1 nếu mã c không xuất hiện).
+        """
+        if dimension not in self._dim_codes:
+            column = DIMENSION_CODE_COLUMNS.get(dimension)
+            if column in self.dataframe.columns:
+                codes = self.dataframe[column].to_numpy(dtype=np.int32)
+            else:
+                codes = dimension_codes(self.dataframe[dimension])
+            rows = np.full(int(codes.max()) + 1 if len(codes) else 0, -1, dtype=np.intp)
+            valid = np.flatnonzero(codes >= 0)
+            rows[codes[valid]] = valid
+            self._dim_codes[dimension] = (codes, rows)
+        return self._dim_codes[dimension]
+
+    def _code_labels(self, dimension: str, code_values: np.ndarray) -> pd.Index:
+        """Nhãn (giữ dtype của cột) của các mã đã cho."""
+        _, rows = self._codes(dimension)
+        return pd.Index(self.dataframe[dimension].iloc[rows[code_values]], name=dimension)
+
+    def _value_mask(self, dimension: str, values: Sequence) -> np.ndarray:
+        """Mặt nạ dòng có giá trị thuộc values, tra bảng theo mã thay vì isin trên chuỗi."""
+        codes, rows = self._codes(dimension)
+        present = np.flatnonzero(rows >= 0)
+        lookup = np.zeros(len(rows) + 1, dtype=bool)
+        lookup[present] = self._code_labels(dimension, present).isin(values)
+        # Mã -1 tra vào ô cuối (luôn False)
+        return lookup[codes]
+
+    def _count_by(self, dimension: str, mask: Optional[np.ndarray] = None, name: Optional[str] = None) -> pd.Series:
+        """Số dòng theo từng giá trị của dimension (bỏ NaN), index sắp xếp như groupby."""
+        codes, rows = self._codes(dimension)
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(rows))
+        present = np.flatnonzero(counts)
+        return pd.Series(counts[present], index=self._code_labels(dimension, present), name=name)
+
+    def _nunique(self, dimension: str) -> int:
+        _, rows = self._codes(dimension)
+        return int((rows >= 0).sum())
+
+    # =====================================================
+    #  REGION: gộp kết quả cấp NOC lên khu vực
+    # =====================================================
+
+    @staticmethod
+    def _check_level(level: str):
+        if level not in COUNTRY_LEVELS:
+            raise ValueError(f"level phải là một trong {COUNTRY_LEVELS}")
+
+    def _noc_regions(self) -> pd.Series:
+        """NOC -> Region, đọc 1 dòng mỗi NOC qua mã NOC (O(số NOC), không quét dữ liệu)."""
+        if REGION_COLUMN not in self.dataframe.columns:
+            raise ValueError("Dữ liệu chưa có cột Region (xem DataCleaner.add_region)")
+        _, rows = self._codes("NOC")
+        present = np.flatnonzero(rows >= 0)
+        regions = self.dataframe[REGION_COLUMN].iloc[rows[present]]
+        if isinstance(regions.dtype, pd.CategoricalDtype):
+            regions = regions.astype(regions.cat.categories.dtype)
+        return pd.Series(regions.to_numpy(), index=self._code_labels("NOC", present), name=REGION_COLUMN)
+
+    def _to_level(self, result, level: str):
+        """Gộp kết quả có index NOC (Series / DataFrame) lên level; level="NOC" giữ nguyên."""
+        self._check_level(level)
+        if level == "NOC":
+            return result
+        regions = pd.Index(self._noc_regions().reindex(result.index).to_numpy(), name=REGION_COLUMN)
+        return result.groupby(regions, sort=True).sum()
 
     def analyze_data_overview(self):
         overview = {}
         # Tổng số vận động viên (ID duy nhất)
         overview["total_athletes"] = self.dataframe["ID"].nunique()
         # Tổng số quốc gia (NOC duy nhất)
-        overview["total_countries"] = self.dataframe["NOC"].nunique()
+        overview["total_countries"] = self._nunique("NOC")
         # Tổng số kỳ Olympic (Year duy nhất)
-        overview["total_olympic_games"] = self.dataframe["Year"].nunique()
+        overview["total_olympic_games"] = self._nunique("Year")
         # Tổng số môn thể thao
-        overview["total_sports"] = self.dataframe["Sport"].nunique()
+        overview["total_sports"] = self._nunique("Sport")
         # Tổng số huy chương (không tính No Medal)
         if "Medal" in self.dataframe.columns:
             overview["total_medals"] = (
@@ -26,23 +284,23 @@ class DataAnalysis:
             overview["total_medals"] = 0
         return overview
 
-    def analyze_data_by_gender(self):
+    def analyze_data_by_gender(self, year_range: Optional[Tuple[int, int]] = None):
+        if year_range is not None:
+            return self._gender_in_year_range(year_range)
         result = {}
         # Số lượng vận động viên theo giới tính
-        gender_counts = self.dataframe["Sex"].value_counts()
+        counts = self._count_by("Sex")
+        gender_counts = counts.sort_values(ascending=False, kind="stable").rename("count")
 
         # Tỷ lệ %
         gender_percentage = (
-            self.dataframe["Sex"].value_counts(normalize=True) * 100
+            (gender_counts / gender_counts.sum()).rename("proportion") * 100
         ).round(2)
 
         # Số huy chương theo giới tính (không tính No Medal)
         if "Medal" in self.dataframe.columns:
-            medal_by_gender = (
-                self.dataframe[self.dataframe["Medal"] != "No Medal"]
-                .groupby("Sex")["Medal"]
-                .count()
-            )
+            codes, _ = self._codes("Medal")
+            medal_by_gender = self._count_by("Sex", (codes >= 0) & ~self._value_mask("Medal", [NO_MEDAL]), name="Medal")
         else:
             medal_by_gender = None
 
@@ -57,54 +315,246 @@ class DataAnalysis:
     #  MEDAL ANALYSIS
     # =====================================================
 
-    def medal_count(self):
+    def event_medal_table(self) -> pd.DataFrame:
+        """
+        Bảng huy chương cấp nội dung: 1 dòng / (Games, Sport, Event, NOC, Medal), tính 1 lần.
+        AthleteMedals = số VĐV nhận huy chương đó, EventMedals = 1 (huy chương chính thức).
+        """
+        if self._event_medals is None:
+            games = "Games" if "Games" in self.dataframe.columns else "Season"
+            keys = [c for c in ["Year", games, "Sport", "Event", "NOC", "Medal"] if c in self.dataframe.columns]
+            subset = self.dataframe[self.dataframe["Medal"].isin(MEDAL_TYPES)]
+            table = subset.groupby(keys, sort=False, dropna=False).size().reset_index(name="AthleteMedals")
+            table["EventMedals"] = 1
+            self._event_medals = table
+        return self._event_medals
+
+    @staticmethod
+    def _check_count_mode(count_mode: str):
+        if count_mode not in COUNT_MODES:
+            raise ValueError(f"count_mode phải là một trong {COUNT_MODES}")
+
+    def _medal_rows(self, count_mode: str = "athlete") -> pd.DataFrame:
+        """Các dòng huy chương theo cách đếm: từng VĐV hoặc bảng cấp nội dung."""
+        self._check_count_mode(count_mode)
+        if count_mode == "event":
+            return self.event_medal_table()
+        return self.dataframe[self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"])]
+
+    @staticmethod
+    def _cube_range(year_range, count_mode: str):
+        """
+        count_mode="event" không giới hạn năm -> (None, None): cộng cả trục năm của khối đếm event
+        (prefix sums, tính 1 lần) thay vì groupby / pivot bảng cấp nội dung mỗi lần gọi.
+        """
+        if year_range is None and count_mode == "event":
+            return (None, None)
+        return year_range
+
+    def _medal_counts_by(self, dimension: str, medals: Sequence[str] = MEDAL_TYPES) -> pd.Series:
+        """Kernel cho count_mode="athlete": số dòng huy chương theo dimension."""
+        return self._count_by(dimension, self._value_mask("Medal", medals), name="Medal")
+
+    def medal_count(self, year_range: Optional[Tuple[int, int]] = None, count_mode: str = "athlete"):
         """Tổng số Gold / Silver / Bronze"""
-        return self.dataframe[self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"])]["Medal"].value_counts()
-
-    def medals_by_country(self):
-        """Top quốc gia nhiều huy chương"""
-        return (
-            self.dataframe[self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"])]
-            .groupby("NOC")["Medal"]
-            .count()
-            .sort_values(ascending=False)
-        )
+        year_range = self._cube_range(year_range, count_mode)
+        if year_range is not None:
+            totals = self.year_range_counts("NOC", *year_range, count_mode=count_mode)[MEDAL_TYPES].sum()
+            totals = totals[totals > 0].rename_axis("Medal").rename("count")
+            return totals.sort_values(ascending=False)
+        self._check_count_mode(count_mode)
+        counts = self._medal_counts_by("Medal").rename("count")
+        return counts.sort_values(ascending=False, kind="stable")
 
-    def country_most_gold(self):
-        """Quốc gia nhiều Gold nhất"""
-        gold = self.dataframe[self.dataframe["Medal"] == "Gold"]
-        return gold.groupby("NOC")["Medal"].count().sort_values(ascending=False)
+    def medals_by_country(
+        self, year_range: Optional[Tuple[int, int]] = None, count_mode: str = "athlete", level: str = "NOC"
+    ):
+        """Top quốc gia nhiều huy chương (level="Region": theo khu vực)"""
+        self._check_level(level)
+        year_range = self._cube_range(year_range, count_mode)
+        if year_range is not None:
+            return self._range_medal_series(level, year_range, MEDAL_TYPES, count_mode).sort_values(ascending=False)
+        self._check_count_mode(count_mode)
+        return self._to_level(self._medal_counts_by("NOC"), level).sort_values(ascending=False)
 
-    def medals_by_year(self):
+    def country_most_gold(
+        self, year_range: Optional[Tuple[int, int]] = None, count_mode: str = "athlete", level: str = "NOC"
+    ):
+        """Quốc gia nhiều Gold nhất (level="Region": theo khu vực)"""
+        self._check_level(level)
+        year_range = self._cube_range(year_range, count_mode)
+        if year_range is not None:
+            return self._range_medal_series(level, year_range, ["Gold"], count_mode).sort_values(ascending=False)
+        self._check_count_mode(count_mode)
+        return self._to_level(self._medal_counts_by("NOC", ["Gold"]), level).sort_values(ascending=False)
+
+    def medals_by_year(self, year_range: Optional[Tuple[int, int]] = None, count_mode: str = "athlete"):
         """Huy chương theo năm"""
-        return (
-            self.dataframe[self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"])]
-            .groupby("Year")["Medal"]
-            .count()
-        )
+        year_range = self._cube_range(year_range, count_mode)
+        if year_range is not None:
+            cube, _, year_index = self._count_cube("NOC", count_mode=count_mode)
+            totals = pd.Series(cube.sum(axis=(0, 1)), index=year_index, name="Medal")
+            start, end = year_range
+            in_range = totals.to_numpy() > 0
+            if start is not None:
+                in_range &= year_index >= start
+            if end is not None:
+                in_range &= year_index <= end
+            return totals[in_range].astype(np.int64)
+        self._check_count_mode(count_mode)
+        return self._medal_counts_by("Year")
 
-    def medals_by_sport(self):
+    def medals_by_sport(self, year_range: Optional[Tuple[int, int]] = None, count_mode: str = "athlete"):
         """Huy chương theo môn"""
-        return (
-            self.dataframe[self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"])]
-            .groupby("Sport")["Medal"]
-            .count()
-            .sort_values(ascending=False)
-        )
+        year_range = self._cube_range(year_range, count_mode)
+        if year_range is not None:
+            return self._range_medal_series("Sport", year_range, MEDAL_TYPES, count_mode).sort_values(ascending=False)
+        self._check_count_mode(count_mode)
+        return self._medal_counts_by("Sport").sort_values(ascending=False)
 
-    def medal_tally_table(self):
-        """Bảng tổng sắp huy chương (pivot table)"""
-        subset = self.dataframe[self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"])]
-        medal_table = subset.pivot_table(
-            index="NOC",
-            columns="Medal",
-            values="Event",
-            aggfunc="count",
-            fill_value=0
-        )
+    def medal_tally_table(
+        self, year_range: Optional[Tuple[int, int]] = None, count_mode: str = "athlete", level: str = "NOC"
+    ):
+        """Bảng tổng sắp huy chương (pivot table); level="Region": theo khu vực"""
+        self._check_level(level)
+        range_counts = self._cube_range(year_range, count_mode)
+        if range_counts is not None:
+            counts = self.year_range_counts(level, *range_counts, count_mode=count_mode)[MEDAL_TYPES]
+            counts = counts[counts.sum(axis=1) > 0]
+            # Giữ thứ tự cột như pivot_table: chỉ loại có xuất hiện, theo alphabet
+            medal_table = counts[sorted(c for c in MEDAL_TYPES if counts[c].any())]
+            medal_table.columns.name = "Medal"
+        else:
+            self._check_count_mode(count_mode)
+            medal_table = self._to_level(self._medal_tally_kernel(), level)
         medal_table["Total"] = medal_table.sum(axis=1)
         return medal_table.sort_values("Gold", ascending=False)
 
+    def _medal_tally_kernel(self) -> pd.DataFrame:
+        """NOC × loại huy chương bằng 1 lần bincount 2 chiều (giống pivot_table đếm Event)."""
+        noc_codes, noc_rows = self._codes("NOC")
+        medal_codes, medal_rows = self._codes("Medal")
+        mask = self._value_mask("Medal", MEDAL_TYPES) & (noc_codes >= 0)
+        if "Event" in self.dataframe.columns:
+            mask &= self.dataframe["Event"].notna().to_numpy()
+        n_medal = len(medal_rows)
+        flat = noc_codes[mask].astype(np.int64) * n_medal + medal_codes[mask]
+        grid = np.bincount(flat, minlength=len(noc_rows) * n_medal).reshape(len(noc_rows), n_medal)
+        nocs = np.flatnonzero(grid.sum(axis=1))
+        medals = np.flatnonzero(grid.sum(axis=0))
+        return pd.DataFrame(
+            grid[np.ix_(nocs, medals)],
+            index=self._code_labels("NOC", nocs),
+            columns=self._code_labels("Medal", medals),
+        )
+
+    # =====================================================
+    #  YEAR RANGE: prefix sums theo kỳ Olympic
+    # =====================================================
+
+    @staticmethod
+    def _column_values(frame: pd.DataFrame, column: str) -> pd.Series:
+        """Giá trị 1 cột; "Games" được dựng từ Year + Season nếu dữ liệu không có."""
+        if column == "Games" and "Games" not in frame.columns:
+            return frame["Year"].astype("string") + " " + frame["Season"].astype("string")
+        return frame[column]
+
+    def _count_cube(
+        self,
+        dimension: str,
+        medals_only: bool = True,
+        count_mode: str = "athlete",
+        axis: str = "Year",
+    ):
+        """
+        Khối đếm (loại huy chương × giá trị dimension × giá trị axis), tính 1 lần bằng np.bincount.
+        medals_only=False: thêm lớp cuối đếm các dòng không có huy chương.
+        count_mode="event": đếm trên event_medal_table().
+        axis: trục thời gian, "Year" (mặc định) hoặc "Games".
+        """
+        self._check_count_mode(count_mode)
+        key = (dimension, medals_only, count_mode, axis)
+        if key not in self._cubes and dimension == REGION_COLUMN:
+            # Khối theo Region = gộp các hàng NOC của khối NOC, không quét lại dữ liệu
+            cube, noc_index, axis_index = self._count_cube("NOC", medals_only, count_mode, axis)
+            region_codes, region_index = pd.factorize(self._noc_regions().reindex(noc_index).to_numpy(), sort=True)
+            order = np.argsort(region_codes, kind="stable")
+            starts = np.searchsorted(region_codes[order], np.arange(len(region_index)))
+            rolled = np.add.reduceat(cube[:, order], starts, axis=1) if len(order) else cube
+            self._cubes[key] = (
+                rolled.astype(np.int32),
+                pd.Index(region_index, name=REGION_COLUMN),
+                axis_index,
+            )
+        if key not in self._cubes:
+            frame = self.event_medal_table() if count_mode == "event" else self.dataframe
+            axis_values = self._column_values(frame, axis)
+            medal_codes = pd.Categorical(frame["Medal"], categories=MEDAL_TYPES).codes.astype(np.int64)
+            valid = frame[dimension].notna().to_numpy() & axis_values.notna().to_numpy()
+            if medals_only:
+                valid &= medal_codes >= 0
+            else:
+                medal_codes[medal_codes < 0] = len(MEDAL_TYPES)
+            n_layers = len(MEDAL_TYPES) + (0 if medals_only else 1)
+            dim_codes, dim_index = pd.factorize(frame[dimension].to_numpy()[valid], sort=True)
+            axis_codes, axis_index = pd.factorize(axis_values.to_numpy()[valid], sort=True)
+            n_dim, n_axis = len(dim_index), len(axis_index)
+            flat = (medal_codes[valid] * n_dim + dim_codes) * n_axis + axis_codes
+            counts = np.bincount(flat, minlength=n_layers * n_dim * n_axis)
+            self._cubes[key] = (
+                counts.reshape(n_layers, n_dim, n_axis).astype(np.int32),
+                pd.Index(dim_index, name=dimension),
+                pd.Index(axis_index, name=axis),
+            )
+        return self._cubes[key]
+
+    def year_prefix_sums(self, dimension: str, count_mode: str = "athlete"):
+        """
+        Prefix sums theo Year: P[..., k] = tổng các kỳ trước vị trí k.
+        Trả về (prefix, dim_index, year_index); prefix có thêm cột 0 ở đầu.
+        """
+        key = (dimension, count_mode)
+        if key not in self._year_prefix:
+            cube, dim_index, year_index = self._count_cube(dimension, medals_only=False, count_mode=count_mode)
+            prefix = np.zeros(cube.shape[:2] + (cube.shape[2] + 1,), dtype=np.int64)
+            np.cumsum(cube, axis=2, out=prefix[:, :, 1:])
+            self._year_prefix[key] = (prefix, dim_index, year_index)
+        return self._year_prefix[key]
+
+    def year_range_counts(
+        self,
+        dimension: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        count_mode: str = "athlete",
+    ) -> pd.DataFrame:
+        """
+        Số dòng theo dimension trong khoảng năm [start, end] (None = không giới hạn).
+        Mỗi ô = P[hi] - P[lo], O(1). Cột: Gold, Silver, Bronze, No Medal.
+        """
+        prefix, dim_index, year_index = self.year_prefix_sums(dimension, count_mode)
+        years = year_index.to_numpy()
+        lo = 0 if start is None else np.searchsorted(years, start, side="left")
+        hi = len(years) if end is None else np.searchsorted(years, end, side="right")
+        hi = max(hi, lo)
+        counts = prefix[:, :, hi] - prefix[:, :, lo]
+        return pd.DataFrame(counts.T, index=dim_index, columns=MEDAL_TYPES + [NO_MEDAL])
+
+    def _range_medal_series(self, dimension: str, year_range, medals, count_mode: str = "athlete") -> pd.Series:
+        totals = self.year_range_counts(dimension, *year_range, count_mode=count_mode)[medals].sum(axis=1)
+        return totals[totals > 0].rename("Medal")
+
+    def _gender_in_year_range(self, year_range):
+        counts = self.year_range_counts("Sex", *year_range)
+        rows = counts.sum(axis=1)
+        rows = rows[rows > 0]
+        medals = counts[MEDAL_TYPES].sum(axis=1)
+        return {
+            "gender_counts": rows.sort_values(ascending=False).rename("count"),
+            "gender_percentage": (rows / rows.sum() * 100).sort_values(ascending=False).round(2).rename("proportion"),
+            "medal_by_gender": medals[medals > 0].rename("Medal"),
+        }
+
     # =====================================================
     #  AGE ANALYSIS
     # =====================================================
@@ -117,26 +567,46 @@ class DataAnalysis:
             "max": self.dataframe["Age"].max()
         }
 
+    def age_group_codes(self) -> np.ndarray:
+        """
+        Mã nhóm tuổi (int8) cho từng dòng, tính 1 lần rồi dùng lại.
+        Dùng cột AgeGroupCode có sẵn trong dataset nếu bin là mặc định.
+        """
+        if self._age_codes is None:
+            if AGE_GROUP_COLUMN in self.dataframe.columns and self.age_bins == AGE_BINS:
+                self._age_codes = self.dataframe[AGE_GROUP_COLUMN].to_numpy(dtype=np.int8)
+            else:
+                self._age_codes = bin_codes(self.dataframe["Age"], self.age_bins)
+        return self._age_codes
+
+    def _age_group_index(self, codes=None) -> pd.CategoricalIndex:
+        labels = self.age_labels if codes is None else [self.age_labels[c] for c in codes]
+        return pd.CategoricalIndex(labels, categories=self.age_labels, ordered=True, name="AgeGroup")
+
     def age_group_distribution(self):
         """Nhóm tuổi (U20, 20–30…)"""
-        bins = [0, 20, 30, 40, 50, 100]
-        labels = ["U20", "20-30", "30-40", "40-50", "Over 50"]
-        temp = self.dataframe.dropna(subset=["Age"]).copy()
-        temp["AgeGroup"] = pd.cut(temp["Age"], bins=bins, labels=labels, right=False)
-        return temp["AgeGroup"].value_counts()
+        codes = self.age_group_codes()
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.age_labels))
+        series = pd.Series(counts, index=self._age_group_index(), name="count")
+        return series.sort_values(ascending=False, kind="stable")
 
     def medal_ratio_by_age_group(self):
         """Tỷ lệ đạt huy chương theo tuổi"""
-        temp = self.dataframe.dropna(subset=["Age"]).copy()
-        bins = [0, 20, 30, 40, 50, 100]
-        labels = ["U20", "20-30", "30-40", "40-50", "Over 50"]
-        temp["AgeGroup"] = pd.cut(temp["Age"], bins=bins, labels=labels, right=False)
+        codes = self.age_group_codes()
+        valid = codes >= 0
+        n_groups = len(self.age_labels)
+
+        # Số VĐV duy nhất mỗi nhóm: đếm cặp (ID, nhóm) không trùng
+        ids = self.dataframe["ID"].to_numpy(dtype=np.int64)[valid]
+        pairs = np.unique(ids * n_groups + codes[valid])
+        participants = np.bincount(pairs % n_groups, minlength=n_groups)
 
-        participants = temp.groupby("AgeGroup")["ID"].nunique()
-        medals = temp[temp["Medal"].isin(["Gold", "Silver", "Bronze"])].groupby("AgeGroup")["Medal"].count()
+        is_medal = self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"]).to_numpy()
+        medals = np.bincount(codes[valid & is_medal], minlength=n_groups)
 
-        ratio = (medals / participants).fillna(0)
-        return ratio.round(4)
+        observed = np.flatnonzero(participants)
+        ratio = medals[observed] / participants[observed]
+        return pd.Series(ratio, index=self._age_group_index(observed)).round(4)
 
     def average_age_gold(self):
         """Tuổi trung bình người đạt Gold"""
@@ -150,8 +620,17 @@ class DataAnalysis:
 
     def physique_by_sport(self):
         """Chiều cao, cân nặng, BMI trung bình theo môn"""
-        valid = self.dataframe.dropna(subset=["Height", "Weight"])
-        stats = valid.groupby("Sport")[["Height", "Weight"]].mean()
+        codes, rows = self._codes("Sport")
+        height = self.dataframe["Height"].to_numpy(dtype=float)
+        weight = self.dataframe["Weight"].to_numpy(dtype=float)
+        valid = ~np.isnan(height) & ~np.isnan(weight) & (codes >= 0)
+        counts = np.bincount(codes[valid], minlength=len(rows))
+        present = np.flatnonzero(counts)
+        means = {
+            name: np.bincount(codes[valid], weights=values[valid], minlength=len(rows))[present] / counts[present]
+            for name, values in (("Height", height), ("Weight", weight))
+        }
+        stats = pd.DataFrame(means, index=self._code_labels("Sport", present))
         stats["BMI"] = stats["Weight"] / ((stats["Height"] / 100) ** 2)
         return stats.sort_values("Weight", ascending=False).round(2)
 
@@ -167,58 +646,629 @@ class DataAnalysis:
         result["BMI"] = result["Weight"] / ((result["Height"] / 100) ** 2)
         return result.round(2)
 
+    def _physique_split(self):
+        """Height/Weight/BMI từng dòng hợp lệ + mặt nạ có huy chương."""
+        valid = self.dataframe[["Height", "Weight"]].notna().all(axis=1).to_numpy()
+        values = _physique_values(self.dataframe)[valid]
+        is_medal = self.dataframe["Medal"].isin(MEDAL_TYPES).to_numpy()[valid]
+        return values, is_medal, valid
+
+    def medal_vs_non_medal_physique_ci(
+        self, n_boot: int = 2000, ci: float = 0.95, seed: int = 42
+    ) -> pd.DataFrame:
+        """
+        medal_vs_non_medal_physique kèm khoảng tin cậy bootstrap:
+        CI trung bình từng nhóm, chênh lệch (Medalist - Non-Medalist) và Cohen's d.
+        BMI trung bình tính từ Height/Weight trung bình; Cohen's d của BMI dùng BMI từng dòng.
+        """
+        values, is_medal, _ = self._physique_split()
+        stats = _physique_group_ci(values[is_medal], values[~is_medal], n_boot, ci, seed)
+        metrics = ["Height", "Weight", "BMI"]
+        table = pd.DataFrame(index=pd.Index(metrics, name="Metric"))
+        for name, (point, interval) in stats["Groups"].items():
+            table[name] = point
+            table[f"{name}_Low"], table[f"{name}_High"] = interval
+        table["Diff"] = stats["Diff"]
+        table["Diff_Low"], table["Diff_High"] = stats["Diff_CI"]
+        table = table.round(2)
+        table["Cohen_d"] = np.round(stats["d"], 3)
+        table["Cohen_d_Low"], table["Cohen_d_High"] = np.round(stats["d_CI"], 3)
+        return table
+
+    def physique_by_sport_ci(
+        self,
+        n_boot: int = 1000,
+        ci: float = 0.95,
+        seed: int = 42,
+        n_jobs: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        physique_by_sport kèm CI bootstrap cho Height/Weight/BMI và Cohen's d
+        (có huy chương vs không) trong từng môn.
+        Các môn được chia cho n_jobs tiến trình (None = số CPU; process pool "fork", không có fork
+        thì thread pool như write_country_reports). Mỗi môn có seed con riêng từ SeedSequence(seed),
+        kết quả không phụ thuộc n_jobs.
+        """
+        values, is_medal, valid = self._physique_split()
+        sport_codes, sports = pd.factorize(self.dataframe["Sport"].to_numpy()[valid], sort=True)
+        order = np.argsort(sport_codes, kind="stable")
+        bounds = np.searchsorted(sport_codes[order], np.arange(len(sports) + 1))
+        seeds = np.random.SeedSequence(seed).spawn(len(sports))
+        groups = [order[bounds[i]:bounds[i + 1]] for i in range(len(sports))]
+        medalists = [values[rows][is_medal[rows]] for rows in groups]
+        others = [values[rows][~is_medal[rows]] for rows in groups]
+        repeat = [n_boot] * len(sports), [ci] * len(sports)
+
+        workers = min(n_jobs or os.cpu_count() or 1, len(sports))
+        if workers > 1:
+            with process_pool_executor(workers) as pool:
+                # Gom vài môn / lần gửi để bớt chi phí pickle giữa các tiến trình
+                results = list(pool.map(_physique_group_ci, medalists, others, *repeat, seeds,
+                                        chunksize=max(1, len(sports) // (workers * 4))))
+        else:
+            results = list(map(_physique_group_ci, medalists, others, *repeat, seeds))
+
+        records = []
+        for stats in results:
+            record = {"N": stats["N"]}
+            for j, metric in enumerate(["Height", "Weight", "BMI"]):
+                record[metric] = stats["Mean"][j]
+                record[f"{metric}_Low"], record[f"{metric}_High"] = stats["Mean_CI"][:, j]
+            for j, metric in enumerate(["Height", "Weight", "BMI"]):
+                record[f"{metric}_d"] = stats["d"][j]
+                record[f"{metric}_d_Low"], record[f"{metric}_d_High"] = stats["d_CI"][:, j]
+            records.append(record)
+        table = pd.DataFrame(records, index=pd.Index(sports, name="Sport"))
+        d_cols = [c for c in table.columns if "_d" in c]
+        table[d_cols] = table[d_cols].round(3)
+        other = [c for c in table.columns if c not in d_cols and c != "N"]
+        table[other] = table[other].round(2)
+        return table.sort_values("Weight", ascending=False)
+
+    def physique_sketch(self, chunk_size: int = 100_000) -> PhysiqueSketch:
+        """Sketch Height/Weight/BMI theo Sport × Sex, xây 1 lần theo từng khối rồi giữ lại."""
+        if self._physique_sketch is None:
+            self._physique_sketch = PhysiqueSketch.from_frame(self.dataframe, chunk_size=chunk_size)
+        return self._physique_sketch
+
+    def physique_distribution(
+        self,
+        sports: Optional[Sequence[str]] = None,
+        sexes: Optional[Sequence[str]] = None,
+        by: Sequence[str] = ("Sport", "Sex"),
+    ) -> pd.DataFrame:
+        """N, Mean, Std, Min, P5/P25/P50/P75/P95, Max của Height/Weight/BMI theo by, lấy từ sketch."""
+        return self.physique_sketch().summary(sports=sports, sexes=sexes, by=by)
+
+    # =====================================================
+    #  ATHLETE SEARCH
+    # =====================================================
+
+    def athlete_index(self) -> AthleteIndex:
+        """Chỉ mục ID / tên VĐV, dựng 1 lần rồi giữ lại cho các lần tra cứu."""
+        if self._athlete_index is None:
+            self._athlete_index = AthleteIndex(self.dataframe, medal_types=MEDAL_TYPES)
+        return self._athlete_index
+
+    def search_athletes(self, query: str, limit: int = 10) -> pd.DataFrame:
+        """Typeahead theo ID hoặc tên: ID, Name, NOC, Sport, Entries, Medals."""
+        return self.athlete_index().search(query, limit=limit)
+
+    def athlete_profile(self, athlete_id: int) -> Optional[dict]:
+        """Tóm tắt + toàn bộ dòng thi đấu của 1 VĐV (None nếu không có ID)."""
+        return self.athlete_index().athlete(athlete_id)
+
+    def text_index(self, columns: Sequence[str] = ("Event", "Team")) -> TextIndex:
+        """Chỉ mục ngược token -> giá trị phân biệt -> dòng cho Event/Team, dựng 1 lần."""
+        key = tuple(columns)
+        if key not in self._text_indexes:
+            self._text_indexes[key] = TextIndex(self.dataframe, columns=key)
+        return self._text_indexes[key]
+
+    def search_rows(self, query: str, columns: Sequence[str] = ("Event", "Team")) -> pd.DataFrame:
+        """Các dòng có Event hoặc Team chứa mọi từ của query (theo tiền tố token)."""
+        return self.dataframe.iloc[self.text_index(columns).rows(query)]
+
     # =====================================================
     #  COUNTRY ANALYSIS
     # =====================================================
 
-    def medals_by_country_year(self):
-        """Huy chương theo quốc gia từng năm"""
-        return (
-            self.dataframe[self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"])]
-            .groupby(["Year", "NOC"])["Medal"]
-            .count()
-            .reset_index(name="Medal_Count")
-        )
+    def medal_matrix(
+        self, medal: str = "Total", count_mode: str = "athlete", level: str = "NOC", axis: str = "Year"
+    ) -> np.ndarray:
+        """
+        Ma trận NumPy NOC × Year (axis="Games": NOC × kỳ Olympic) cho 1 loại huy chương
+        ("Gold"/"Silver"/"Bronze"/"Total"). Hàng/cột tương ứng medal_matrix_axes(). level="Region": hàng là khu vực.
+        """
+        self._check_level(level)
+        self._check_axis(axis)
+        cube = self._count_cube(level, count_mode=count_mode, axis=axis)[0]
+        if medal == "Total":
+            return cube.sum(axis=0)
+        if medal not in MEDAL_TYPES:
+            raise ValueError(f"medal phải là một trong {MEDAL_TYPES + ['Total']}")
+        return cube[MEDAL_TYPES.index(medal)]
+
+    @staticmethod
+    def _check_axis(axis: str):
+        if axis not in TIME_AXES:
+            raise ValueError(f"axis phải là một trong {TIME_AXES}")
+
+    def medal_matrix_axes(self, count_mode: str = "athlete", level: str = "NOC", axis: str = "Year"):
+        """(noc_index, axis_index): ánh xạ hàng/cột của medal_matrix (cột là năm hoặc nhãn Games)."""
+        self._check_level(level)
+        self._check_axis(axis)
+        _, noc_index, axis_index = self._count_cube(level, count_mode=count_mode, axis=axis)
+        return noc_index, axis_index
+
+    def _matrix_frame(self, values, count_mode: str = "athlete", level: str = "NOC", axis: str = "Year") -> pd.DataFrame:
+        noc_index, axis_index = self.medal_matrix_axes(count_mode, level, axis)
+        return pd.DataFrame(values, index=noc_index, columns=axis_index)
+
+    def rank_by_year(
+        self, medal: str = "Total", count_mode: str = "athlete", level: str = "NOC", axis: str = "Year"
+    ) -> pd.DataFrame:
+        """
+        Thứ hạng mỗi NOC trong từng kỳ (1 = nhiều nhất, đồng hạng kiểu "min").
+        medal="Tally": xếp theo Gold, rồi Silver, rồi Bronze như bảng tổng sắp.
+        axis="Games": xếp hạng riêng từng kỳ (Summer / Winter cùng năm không gộp).
+        NOC không có huy chương trong kỳ đó -> NaN.
+        """
+        if medal == "Tally":
+            cube = [self.medal_matrix(m, count_mode, level, axis) for m in MEDAL_TYPES]
+            base = int(max(m.max(initial=0) for m in cube)) + 1
+            scores = (cube[0].astype(np.int64) * base + cube[1]) * base + cube[2]
+        else:
+            scores = self.medal_matrix(medal, count_mode, level, axis).astype(np.int64)
+        n_noc, n_year = scores.shape
+        if scores.size == 0:
+            return self._matrix_frame(scores.astype(float), count_mode, level, axis)
+        # Dịch mỗi cột 1 khoảng riêng để sort/searchsorted 1 lần cho mọi năm
+        offset = np.arange(n_year, dtype=np.int64) * (int(scores.max()) + 1)
+        shifted = scores + offset
+        ordered = np.sort(shifted, axis=None)
+        col_end = np.arange(1, n_year + 1) * n_noc
+        higher = col_end - np.searchsorted(ordered, shifted, side="right")
+        ranks = np.where(scores > 0, higher + 1, np.nan)
+        return self._matrix_frame(ranks, count_mode, level, axis)
+
+    def cumulative_medals(
+        self, medal: str = "Total", up_to_year: Optional[int] = None, count_mode: str = "athlete", level: str = "NOC",
+        axis: str = "Year",
+    ):
+        """
+        Tổng huy chương cộng dồn qua các kỳ (NOC × Year, axis="Games": NOC × kỳ Olympic).
+        up_to_year: trả về Series tổng mọi kỳ tới năm đó (tính cả năm đó).
+        """
+        cumulative = np.cumsum(self.medal_matrix(medal, count_mode, level, axis), axis=1)
+        if up_to_year is None:
+            return self._matrix_frame(cumulative, count_mode, level, axis)
+        noc_index, axis_index = self.medal_matrix_axes(count_mode, level, axis)
+        # Nhãn Games "<Year> <Season>" sắp theo năm trước -> năm của từng cột vẫn không giảm
+        years = axis_index.to_numpy() if axis == "Year" else pd.to_numeric(axis_index.astype(str).str[:4]).to_numpy()
+        pos = np.searchsorted(years, up_to_year, side="right") - 1
+        if pos < 0:
+            return pd.Series(0, index=noc_index, name="Medal_Count")
+        return pd.Series(cumulative[:, pos], index=noc_index, name="Medal_Count")
+
+    def rolling_medals(
+        self, window: int = 3, medal: str = "Total", count_mode: str = "athlete", level: str = "NOC", axis: str = "Year"
+    ) -> pd.DataFrame:
+        """Tổng huy chương trong cửa sổ `window` kỳ gần nhất (tính tới kỳ hiện tại)."""
+        if window < 1:
+            raise ValueError("window phải >= 1")
+        matrix = self.medal_matrix(medal, count_mode, level, axis)
+        padded = np.zeros((matrix.shape[0], matrix.shape[1] + 1), dtype=np.int64)
+        np.cumsum(matrix, axis=1, out=padded[:, 1:])
+        start = np.maximum(np.arange(matrix.shape[1]) + 1 - window, 0)
+        return self._matrix_frame(padded[:, 1:] - padded[:, start], count_mode, level, axis)
+
+    def medal_delta(
+        self, medal: str = "Total", periods: int = 1, count_mode: str = "athlete", level: str = "NOC", axis: str = "Year"
+    ) -> pd.DataFrame:
+        """Chênh lệch số huy chương so với `periods` kỳ trước (kỳ đầu -> NaN)."""
+        matrix = self.medal_matrix(medal, count_mode, level, axis).astype(float)
+        delta = np.full_like(matrix, np.nan)
+        if periods < matrix.shape[1]:
+            delta[:, periods:] = matrix[:, periods:] - matrix[:, :-periods]
+        return self._matrix_frame(delta, count_mode, level, axis)
 
-    def country_performance(self, noc_code):
-        """Thành tích theo năm của 1 quốc gia"""
-        country_dataframe = self.dataframe[
-            (self.dataframe["NOC"] == noc_code) &
-            (self.dataframe["Medal"].isin(["Gold", "Silver", "Bronze"]))
-        ]
-        return (
-            country_dataframe.groupby("Year")["Medal"]
-            .count()
-            .reset_index(name="Medal_Count")
+    def medals_by_country_year(self, count_mode: str = "athlete", level: str = "NOC"):
+        """Huy chương theo quốc gia (hoặc khu vực) từng năm"""
+        matrix = self.medal_matrix(count_mode=count_mode, level=level)
+        noc_index, year_index = self.medal_matrix_axes(count_mode, level)
+        year_pos, noc_pos = np.nonzero(matrix.T)
+        return pd.DataFrame({
+            "Year": year_index.to_numpy()[year_pos],
+            level: noc_index.to_numpy()[noc_pos],
+            "Medal_Count": matrix[noc_pos, year_pos].astype(np.int64),
+        })
+
+    def country_performance(self, noc_code, count_mode: str = "athlete", level: str = "NOC"):
+        """Thành tích theo năm của 1 quốc gia (level="Region": noc_code là tên khu vực)"""
+        noc_index, year_index = self.medal_matrix_axes(count_mode, level)
+        if noc_code not in noc_index:
+            return pd.DataFrame({"Year": year_index[:0].to_numpy(), "Medal_Count": np.array([], dtype=np.int64)})
+        row = self.medal_matrix(count_mode=count_mode, level=level)[noc_index.get_loc(noc_code)]
+        year_pos = np.flatnonzero(row)
+        return pd.DataFrame({
+            "Year": year_index.to_numpy()[year_pos],
+            "Medal_Count": row[year_pos].astype(np.int64),
+        })
+
+    def host_games_table(self) -> pd.DataFrame:
+        """
+        Bảng Games -> NOC chủ nhà cho các kỳ có trong dữ liệu (từ HOST_NOC_BY_GAMES).
+        Cột: Games, Year, Season, HostNOC, GamesCode (mã nguyên của Games, khớp trục Games
+        của các khối đếm).
+        """
+        _, _, games_index = self._count_cube("NOC", medals_only=False, axis="Games")
+        labels = games_index.astype(str)
+        parts = labels.str.split(" ", n=1)
+        return pd.DataFrame({
+            "Games": labels,
+            "Year": pd.to_numeric(parts.str[0], errors="coerce").astype("Int64"),
+            "Season": parts.str[1],
+            "HostNOC": labels.map(HOST_NOC_BY_GAMES),
+            "GamesCode": np.arange(len(labels)),
+        })
+
+    def host_country_years(self, city_to_noc: Optional[dict] = None):
+        """
+        Danh sách năm làm chủ nhà theo thành phố.
+        city_to_noc=None: dùng bảng chủ nhà có sẵn (mọi kỳ có trong HOST_NOC_BY_GAMES).
+        """
+        city_codes, city_index = pd.factorize(self.dataframe["City"])
+        year_codes, year_index = pd.factorize(self.dataframe["Year"])
+        if city_to_noc is None:
+            games = self._column_values(self.dataframe, "Games")
+            game_codes, game_index = pd.factorize(games)
+            is_host_game = np.asarray(pd.Index(game_index).map(HOST_NOC_BY_GAMES).notna())
+            keep = (game_codes >= 0) & is_host_game[game_codes]
+        else:
+            # Map trên các giá trị City duy nhất rồi join lại bằng mã nguyên
+            is_host_city = np.asarray(pd.Index(city_index).map(city_to_noc).notna())
+            keep = (city_codes >= 0) & is_host_city[city_codes]
+        keep &= (city_codes >= 0) & (year_codes >= 0)
+        pairs = np.unique(city_codes[keep].astype(np.int64) * len(year_index) + year_codes[keep])
+        hosts = pd.DataFrame({
+            "City": city_index[pairs // len(year_index)],
+            "Year": year_index[pairs % len(year_index)],
+        })
+        return hosts.sort_values("Year").groupby("City")["Year"].unique()
+
+    def home_advantage(self, window: int = 2, count_mode: str = "athlete") -> pd.DataFrame:
+        """
+        Lợi thế sân nhà: tỷ lệ huy chương của nước chủ nhà khi đăng cai so với trung bình
+        `window` kỳ cùng mùa trước/sau (chỉ tính các kỳ nước đó tham dự và không làm chủ nhà).
+        Tính 1 lần trên khối đếm NOC × Games, không quét lại dữ liệu dòng.
+        """
+        cube, noc_index, games_index = self._count_cube(
+            "NOC", medals_only=False, count_mode=count_mode, axis="Games"
         )
+        columns = ["Games", "Year", "Season", "HostNOC", "HostMedals", "HostShare",
+                   "SurroundingShare", "SurroundingGames", "Lift"]
+        hosts = self.host_games_table()
+        medals = cube[: len(MEDAL_TYPES)].sum(axis=0).astype(np.int64)
+        participated = cube.sum(axis=0) > 0
+        totals = medals.sum(axis=0)
+        share = np.divide(medals, totals, out=np.zeros(medals.shape), where=totals > 0)
+
+        # Sắp các kỳ theo (mùa, năm) để các kỳ cùng mùa nằm liền nhau
+        order = np.lexsort((hosts["Year"].to_numpy(dtype=float, na_value=np.nan), hosts["Season"].to_numpy()))
+        hosts = hosts.iloc[order].reset_index(drop=True)
+        share, medals, participated = share[:, order], medals[:, order], participated[:, order]
+        season_codes = pd.factorize(hosts["Season"])[0]
+        season_start = np.searchsorted(season_codes, season_codes, side="left")
+        season_end = np.searchsorted(season_codes, season_codes, side="right")
+
+        host_rows = noc_index.get_indexer(hosts["HostNOC"])
+        host_cols = np.flatnonzero(host_rows >= 0)
+        host_rows = host_rows[host_cols]
+        if len(host_cols) == 0:
+            return pd.DataFrame(columns=columns)
+        is_host = np.zeros(share.shape, dtype=bool)
+        is_host[host_rows, host_cols] = True
+
+        # Prefix sums theo trục Games của tỷ lệ và số kỳ hợp lệ (tham dự, không làm chủ nhà)
+        valid = participated & ~is_host
+        share_prefix = np.zeros((share.shape[0], share.shape[1] + 1))
+        np.cumsum(np.where(valid, share, 0.0), axis=1, out=share_prefix[:, 1:])
+        count_prefix = np.zeros((share.shape[0], share.shape[1] + 1), dtype=np.int64)
+        np.cumsum(valid, axis=1, out=count_prefix[:, 1:])
+        lo = np.maximum(host_cols - window, season_start[host_cols])
+        hi = np.minimum(host_cols + window + 1, season_end[host_cols])
+        around_sum = share_prefix[host_rows, hi] - share_prefix[host_rows, lo]
+        around_count = count_prefix[host_rows, hi] - count_prefix[host_rows, lo]
+        around_share = np.divide(around_sum, around_count, out=np.full(len(host_cols), np.nan), where=around_count > 0)
+        host_share = share[host_rows, host_cols]
 
-    def host_country_years(self, city_to_noc):
-        """Danh sách năm làm chủ nhà"""
-        host_dataframe = self.dataframe[self.dataframe["City"].map(city_to_noc).notna()]
-        return host_dataframe.groupby("City")["Year"].unique()
+        result = hosts.iloc[host_cols][["Games", "Year", "Season", "HostNOC"]].reset_index(drop=True)
+        result["HostMedals"] = medals[host_rows, host_cols]
+        result["HostShare"] = host_share.round(4)
+        result["SurroundingShare"] = around_share.round(4)
+        result["SurroundingGames"] = around_count
+        result["Lift"] = np.divide(host_share, around_share, out=np.full(len(host_cols), np.nan),
+                                   where=around_share > 0).round(2)
+        return result.sort_values(["Year", "Season"]).reset_index(drop=True)
+
+    # =====================================================
+    #  COUNTRY SIMILARITY: hồ sơ huy chương NOC × Sport
+    # =====================================================
+
+    def medal_profile_matrix(self, era_years: Optional[int] = None, count_mode: str = "athlete"):
+        """
+        Ma trận thưa NOC × Sport (hoặc NOC × (Sport, Era) nếu era_years, VD 20 năm/era).
+        Trả về (matrix, noc_index, feature_index); matrix là scipy.sparse CSR
+        (hoặc np.ndarray khi không có scipy).
+        """
+        rows = self._medal_rows(count_mode)
+        valid = rows["NOC"].notna().to_numpy() & rows["Sport"].notna().to_numpy()
+        noc_codes, noc_index = pd.factorize(rows["NOC"].to_numpy()[valid], sort=True)
+        cols, feature_index = pd.factorize(rows["Sport"].to_numpy()[valid], sort=True)
+        feature_index = pd.Index(feature_index, name="Sport")
+        if era_years:
+            eras = (rows["Year"].to_numpy()[valid] // era_years) * era_years
+            era_codes, era_index = pd.factorize(eras, sort=True)
+            cols = cols * len(era_index) + era_codes
+            feature_index = pd.MultiIndex.from_product([feature_index, era_index], names=["Sport", "Era"])
+        shape = (len(noc_index), len(feature_index))
+        sparse = _sparse()
+        if sparse is not None:
+            # Ô trùng (NOC, cột) được cộng dồn khi chuyển sang CSR
+            matrix = sparse.csr_matrix(
+                (np.ones(len(noc_codes), dtype=np.float64), (noc_codes, cols)), shape=shape
+            )
+        else:
+            flat = noc_codes.astype(np.int64) * shape[1] + cols
+            matrix = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape).astype(np.float64)
+        return matrix, pd.Index(noc_index, name="NOC"), feature_index
+
+    def medal_profiles(self, era_years: Optional[int] = None, count_mode: str = "athlete"):
+        """Hồ sơ huy chương chuẩn hóa L2 theo hàng (tính 1 lần), dùng cho cosine similarity."""
+        key = (era_years, count_mode)
+        if key not in self._profiles:
+            matrix, noc_index, feature_index = self.medal_profile_matrix(era_years, count_mode)
+            sparse = _sparse()
+            if sparse is not None:
+                norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+                profiles = sparse.diags(1.0 / np.where(norms > 0, norms, 1.0)) @ matrix
+                profiles = profiles.tocsr()
+            else:
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                profiles = matrix / np.where(norms > 0, norms, 1.0)
+            self._profiles[key] = (profiles, noc_index, feature_index)
+        return self._profiles[key]
+
+    def _cosine_rows(self, targets: np.ndarray, profiles) -> np.ndarray:
+        """Cosine similarity của các hàng targets với mọi NOC, 1 phép nhân ma trận."""
+        sims = profiles[targets] @ profiles.T
+        return sims.toarray() if hasattr(sims, "toarray") else np.asarray(sims)
+
+    def profile_similarity(
+        self, nocs: Sequence[str], era_years: Optional[int] = None, count_mode: str = "athlete"
+    ) -> pd.DataFrame:
+        """Ma trận cosine similarity giữa các NOC cho trước (bỏ NOC không có huy chương)."""
+        profiles, noc_index, _ = self.medal_profiles(era_years, count_mode)
+        positions = noc_index.get_indexer(list(nocs))
+        positions = positions[positions >= 0]
+        sims = self._cosine_rows(positions, profiles)[:, positions]
+        labels = noc_index[positions]
+        return pd.DataFrame(sims.round(4), index=labels, columns=labels)
+
+    def similar_countries(
+        self,
+        noc: Optional[Union[str, List[str]]] = None,
+        k: int = 5,
+        era_years: Optional[int] = None,
+        count_mode: str = "athlete",
+    ) -> pd.DataFrame:
+        """
+        Top-k NOC có hồ sơ huy chương giống nhất (cosine) cho 1, nhiều hoặc mọi NOC (noc=None).
+        Cột: NOC, Rank, Similar, Similarity.
+        """
+        profiles, noc_index, _ = self.medal_profiles(era_years, count_mode)
+        columns = ["NOC", "Rank", "Similar", "Similarity"]
+        if noc is None:
+            targets = np.arange(len(noc_index))
+        else:
+            targets = noc_index.get_indexer([noc] if isinstance(noc, str) else list(noc))
+            targets = targets[targets >= 0]
+        k = min(k, len(noc_index) - 1)
+        if len(targets) == 0 or k < 1:
+            return pd.DataFrame(columns=columns)
+
+        sims = self._cosine_rows(targets, profiles)
+        sims[np.arange(len(targets)), targets] = -np.inf
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(sims, top, axis=1), axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        return pd.DataFrame({
+            "NOC": np.repeat(noc_index.to_numpy()[targets], k),
+            "Rank": np.tile(np.arange(1, k + 1), len(targets)),
+            "Similar": noc_index.to_numpy()[top.ravel()],
+            "Similarity": np.take_along_axis(sims, top, axis=1).ravel().round(4),
+        }, columns=columns)
 
     def vietnam_analysis(self):
         """Phân tích riêng Việt Nam"""
-        dataframe_vn = self.dataframe[self.dataframe["NOC"] == "VIE"]
-        if dataframe_vn.empty:
+        report = self.country_reports().get("VIE")
+        if report is None:
             return None
 
-        medal_count = dataframe_vn[dataframe_vn["Medal"].isin(["Gold", "Silver", "Bronze"])].shape[0]
-        athlete_count = dataframe_vn["ID"].nunique()
-
+        summary = report["summary"].iloc[0]
         return {
-            "Total Athletes": athlete_count,
-            "Total Medals": medal_count
+            "Total Athletes": int(summary["Athletes"]),
+            "Total Medals": int(summary["Total"])
         }
 
+    # =====================================================
+    #  COUNTRY REPORTS: báo cáo cho mọi NOC trong 1 lượt
+    # =====================================================
+
+    def _medal_type_codes(self) -> np.ndarray:
+        """Chỉ số loại huy chương theo MEDAL_TYPES cho từng dòng (-1 = không huy chương)."""
+        codes, rows = self._codes("Medal")
+        present = np.flatnonzero(rows >= 0)
+        lookup = np.full(len(rows) + 1, -1, dtype=np.int64)
+        lookup[present] = pd.Categorical(self._code_labels("Medal", present), categories=MEDAL_TYPES).codes
+        return lookup[codes]
+
+    @staticmethod
+    def _noc_medal_grid(value_codes: np.ndarray, n_values: int, noc_codes, medal_types, n_noc):
+        """Khối (NOC × giá trị × loại huy chương) trên các dòng có huy chương, 1 lần bincount."""
+        valid = (medal_types >= 0) & (noc_codes >= 0) & (value_codes >= 0)
+        flat = (noc_codes[valid].astype(np.int64) * n_values + value_codes[valid]) * len(MEDAL_TYPES) + medal_types[valid]
+        counts = np.bincount(flat, minlength=n_noc * n_values * len(MEDAL_TYPES))
+        return counts.reshape(n_noc, n_values, len(MEDAL_TYPES))
+
+    @staticmethod
+    def _split_grid(grid: np.ndarray, labels: pd.Index, n_noc: int) -> List[pd.DataFrame]:
+        """Tách khối (NOC × giá trị × loại) thành bảng Gold/Silver/Bronze/Total cho từng NOC."""
+        totals = grid.sum(axis=2)
+        noc_idx, value_idx = np.nonzero(totals)
+        table = pd.DataFrame(grid[noc_idx, value_idx], columns=MEDAL_TYPES, index=labels[value_idx])
+        table["Total"] = totals[noc_idx, value_idx]
+        bounds = np.searchsorted(noc_idx, np.arange(n_noc + 1))
+        return [table.iloc[bounds[i]:bounds[i + 1]] for i in range(n_noc)]
+
+    def country_reports(self, top_athletes: int = 10) -> dict:
+        """
+        Báo cáo cho mọi NOC từ các bảng đếm dùng chung (mỗi loại 1 lần bincount trên mã),
+        thay vì lọc lại dataframe cho từng nước. Mỗi NOC có:
+        summary (1 dòng), medals_by_sport, medals_by_year, top_athletes.
+        """
+        if top_athletes in self._country_reports:
+            return self._country_reports[top_athletes]
+        noc_codes, noc_rows = self._codes("NOC")
+        n_noc = len(noc_rows)
+        nocs = self._code_labels("NOC", np.arange(n_noc)) if n_noc else pd.Index([], name="NOC")
+        medal_types = self._medal_type_codes()
+        has_noc = noc_codes >= 0
+
+        # Số dòng, số VĐV (cặp NOC, ID duy nhất), năm đầu / cuối
+        entries = np.bincount(noc_codes[has_noc], minlength=n_noc)
+        ids = self.dataframe["ID"].to_numpy(dtype=np.int64)
+        # Khóa cặp (NOC, ID) gói vào 1 số nguyên
+        id_span = int(ids.max(initial=0)) + 1
+        pair_keys = noc_codes.astype(np.int64) * id_span + ids
+        athletes = np.bincount(np.unique(pair_keys[has_noc]) // id_span, minlength=n_noc)
+        years = self.dataframe["Year"].to_numpy(dtype=float)
+        first_year = np.full(n_noc, np.inf)
+        last_year = np.full(n_noc, -np.inf)
+        np.minimum.at(first_year, noc_codes[has_noc], years[has_noc])
+        np.maximum.at(last_year, noc_codes[has_noc], years[has_noc])
+
+        # Huy chương theo môn / năm / kỳ Games
+        sport_codes, sport_rows = self._codes("Sport")
+        by_sport = self._noc_medal_grid(sport_codes, len(sport_rows), noc_codes, medal_types, n_noc)
+        year_codes, year_rows = self._codes("Year")
+        by_year = self._noc_medal_grid(year_codes, len(year_rows), noc_codes, medal_types, n_noc)
+        games_codes, games_index = pd.factorize(self._column_values(self.dataframe, "Games"), sort=True)
+        by_games = self._noc_medal_grid(games_codes, len(games_index), noc_codes, medal_types, n_noc).sum(axis=2)
+        sport_tables = self._split_grid(by_sport, self._code_labels("Sport", np.arange(len(sport_rows))), n_noc)
+        year_tables = self._split_grid(by_year, self._code_labels("Year", np.arange(len(year_rows))), n_noc)
+        medal_totals = by_sport.sum(axis=1)
+
+        # Top VĐV: đếm theo cặp (NOC, ID) trên các dòng huy chương
+        is_medal = has_noc & (medal_types >= 0)
+        medal_positions = np.flatnonzero(is_medal)
+        keys, inverse = np.unique(pair_keys[is_medal], return_inverse=True)
+        pairs = np.column_stack([keys // id_span, keys % id_span])
+        per_pair = np.bincount(
+            inverse * len(MEDAL_TYPES) + medal_types[is_medal], minlength=len(pairs) * len(MEDAL_TYPES)
+        ).reshape(len(pairs), len(MEDAL_TYPES))
+        name_rows = np.empty(len(pairs), dtype=np.intp)
+        name_rows[inverse] = medal_positions
+        order = np.lexsort((pairs[:, 1], -per_pair[:, 0], -per_pair.sum(axis=1), pairs[:, 0]))
+        pairs, per_pair, name_rows = pairs[order], per_pair[order], name_rows[order]
+        starts = np.searchsorted(pairs[:, 0], np.arange(n_noc + 1))
+        rank = np.arange(len(pairs)) - starts[pairs[:, 0]]
+        keep = rank < top_athletes
+        name_column = "Name" if "Name" in self.dataframe.columns else "ID"
+        top = pd.DataFrame({
+            "Rank": rank[keep] + 1,
+            "ID": pairs[keep, 1],
+            "Name": self.dataframe[name_column].to_numpy()[name_rows[keep]],
+            "Sport": self.dataframe["Sport"].to_numpy()[name_rows[keep]],
+        })
+        top[MEDAL_TYPES] = per_pair[keep]
+        top["Total"] = per_pair[keep].sum(axis=1)
+        top_bounds = np.searchsorted(pairs[keep, 0], np.arange(n_noc + 1))
+
+        reports = {}
+        for i, noc in enumerate(nocs):
+            if entries[i] == 0:
+                continue
+            best = int(np.argmax(by_games[i])) if by_games[i].any() else None
+            summary = {
+                "NOC": noc,
+                "Athletes": int(athletes[i]),
+                "Entries": int(entries[i]),
+                **{medal: int(medal_totals[i, j]) for j, medal in enumerate(MEDAL_TYPES)},
+                "Total": int(medal_totals[i].sum()),
+                "BestGames": games_index[best] if best is not None else None,
+                "BestGamesMedals": int(by_games[i, best]) if best is not None else 0,
+                "FirstYear": int(first_year[i]),
+                "LastYear": int(last_year[i]),
+            }
+            reports[noc] = {
+                "summary": pd.DataFrame([summary]),
+                "medals_by_sport": sport_tables[i].sort_values("Total", ascending=False, kind="stable"),
+                "medals_by_year": year_tables[i],
+                "top_athletes": top.iloc[top_bounds[i]:top_bounds[i + 1]].reset_index(drop=True),
+            }
+        self._country_reports[top_athletes] = reports
+        return reports
+
+    def country_fingerprints(self) -> pd.Series:
+        """
+        Dấu vân tay dữ liệu từng NOC: số dòng + tổng hash các dòng (không phụ thuộc thứ tự).
+        Bỏ các cột mã suy ra (mã đổi khi nước khác thêm giá trị mới).
+        """
+        noc_codes, noc_rows = self._codes("NOC")
+        derived = set(DIMENSION_CODE_COLUMNS.values()) | {AGE_GROUP_COLUMN}
+        columns = [c for c in self.dataframe.columns if c not in derived]
+        hashes = pd.util.hash_pandas_object(self.dataframe[columns], index=False).to_numpy()
+        valid = noc_codes >= 0
+        totals = np.zeros(len(noc_rows), dtype=np.uint64)
+        np.add.at(totals, noc_codes[valid], hashes[valid])
+        counts = np.bincount(noc_codes[valid], minlength=len(noc_rows))
+        present = np.flatnonzero(counts)
+        return pd.Series(
+            [f"{counts[i]}-{totals[i]:016x}" for i in present],
+            index=self._code_labels("NOC", present),
+            name="Fingerprint",
+        )
+
     # =====================================================
     #  INGEST: chạy full phân tích và xuất CSV
     # =====================================================
 
+    @staticmethod
+    def _result_frame(obj, index: bool = False) -> pd.DataFrame:
+        """Đưa kết quả (DataFrame, Series, dict, giá trị) về bảng đúng như khi ghi CSV."""
+        if isinstance(obj, pd.DataFrame):
+            return obj.reset_index() if index else obj
+        if isinstance(obj, pd.Series):
+            return obj.to_frame().reset_index()
+        if isinstance(obj, dict):
+            return pd.DataFrame([obj])
+        return pd.DataFrame([{"value": obj}])
+
     def _save_result(self, obj, filepath: Path, index: bool = False):
-        """Ghi kết quả (DataFrame, Series, dict) ra CSV."""
+        """
+        Ghi kết quả (DataFrame, Series, dict) ra CSV; trong ingest có store_path thì
+        gom thêm vào kho kết quả, tên bảng = đường dẫn tương đối (vd. medal_medal_count).
+        """
         if obj is None:
             return
+        if self._ingest_tables is not None:
+            name = "_".join(filepath.relative_to(self._ingest_root).with_suffix("").parts)
+            self._ingest_tables[name] = self._result_frame(obj, index)
+            self._ingest_sources[name] = filepath.relative_to(self._ingest_root).as_posix()
+        if not self._ingest_csv:
+            return
         if isinstance(obj, pd.DataFrame):
             obj.to_csv(filepath, index=index)
         elif isinstance(obj, pd.Series):
@@ -233,11 +1283,35 @@ class DataAnalysis:
         self,
         output_dir: str = "output/csv/analysis",
         top_noc_count: int = 20,
+        store_path: Optional[str] = None,
+        write_csv: bool = True,
     ) -> "DataAnalysis":
+        """
+        Chạy full phân tích, xuất cây CSV vào output_dir (write_csv=False để bỏ qua).
+        store_path: thêm kho kết quả SQLite (mỗi kết quả 1 bảng, index theo cột khóa),
+        ghi 1 lần trong 1 transaction ở cuối.
+        """
         root_dir = Path(__file__).resolve().parent.parent
         out_path = root_dir / output_dir
         out_path.mkdir(parents=True, exist_ok=True)
         print(f"Analysis output folder: {out_path}")
+        self._ingest_root = out_path
+        self._ingest_csv = write_csv
+        self._ingest_tables = {} if store_path is not None else None
+        self._ingest_sources = {}
+        try:
+            self._ingest_all(out_path, top_noc_count)
+            if self._ingest_tables is not None:
+                store_file = root_dir / store_path
+                ResultsStore(store_file).write(self._ingest_tables, self._ingest_sources)
+                print(f"  Saved: {len(self._ingest_tables)} tables -> {store_file.name}")
+        finally:
+            self._ingest_tables = None
+            self._ingest_csv = True
+        print("Ingest done: all analysis CSVs written in subfolders.")
+        return self
+
+    def _ingest_all(self, out_path: Path, top_noc_count: int):
 
         # 1. Overview -> output/csv/overview/
         overview_path = out_path / "overview"
@@ -252,14 +1326,11 @@ class DataAnalysis:
         gender_path.mkdir(parents=True, exist_ok=True)
         gender = self.analyze_data_by_gender()
         if gender.get("gender_counts") is not None:
-            gender["gender_counts"].to_frame("count").to_csv(gender_path / "gender_counts.csv", index=True)
-            print(f"  Saved: gender/gender_counts.csv")
+            self._save_result(gender["gender_counts"].to_frame("count"), gender_path / "gender_counts.csv", index=True)
         if gender.get("gender_percentage") is not None:
-            gender["gender_percentage"].to_frame("percentage").to_csv(gender_path / "gender_percentage.csv", index=True)
-            print(f"  Saved: gender/gender_percentage.csv")
+            self._save_result(gender["gender_percentage"].to_frame("percentage"), gender_path / "gender_percentage.csv", index=True)
         if gender.get("medal_by_gender") is not None:
-            gender["medal_by_gender"].to_frame("medal_count").to_csv(gender_path / "medal_by_gender.csv", index=True)
-            print(f"  Saved: gender/medal_by_gender.csv")
+            self._save_result(gender["medal_by_gender"].to_frame("medal_count"), gender_path / "medal_by_gender.csv", index=True)
 
         # 3. Medal -> output/csv/medal/
         medal_path = out_path / "medal"
@@ -270,6 +1341,14 @@ class DataAnalysis:
         self._save_result(self.medals_by_year(), medal_path / "medals_by_year.csv", index=True)
         self._save_result(self.medals_by_sport(), medal_path / "medals_by_sport.csv", index=True)
         self._save_result(self.medal_tally_table(), medal_path / "medal_tally_table.csv", index=True)
+        # Đếm theo nội dung: bảng cấp nội dung tính 1 lần, huy chương đồng đội chỉ tính 1
+        self._save_result(self.event_medal_table(), medal_path / "event_medals.csv")
+        self._save_result(self.medals_by_country(count_mode="event"), medal_path / "medals_by_country_event.csv", index=True)
+        self._save_result(self.medal_tally_table(count_mode="event"), medal_path / "medal_tally_table_event.csv", index=True)
+        # Theo khu vực (gộp NOC lịch sử) nếu dữ liệu có cột Region
+        if REGION_COLUMN in self.dataframe.columns:
+            self._save_result(self.medals_by_country(level=REGION_COLUMN), medal_path / "medals_by_region.csv", index=True)
+            self._save_result(self.medal_tally_table(level=REGION_COLUMN), medal_path / "medal_tally_table_region.csv", index=True)
 
         # 4. Age -> output/csv/age/
         age_path = out_path / "age"
@@ -284,17 +1363,32 @@ class DataAnalysis:
         physique_path.mkdir(parents=True, exist_ok=True)
         self._save_result(self.physique_by_sport(), physique_path / "physique_by_sport.csv", index=True)
         self._save_result(self.medal_vs_non_medal_physique(), physique_path / "medal_vs_non_medal_physique.csv", index=True)
+        self._save_result(self.medal_vs_non_medal_physique_ci(), physique_path / "medal_vs_non_medal_physique_ci.csv", index=True)
+        self._save_result(self.physique_by_sport_ci(), physique_path / "physique_by_sport_ci.csv", index=True)
+        self._save_result(self.physique_distribution(), physique_path / "physique_distribution_by_sport_sex.csv", index=True)
 
         # 6. Country -> output/csv/country/
         country_path = out_path / "country"
         country_path.mkdir(parents=True, exist_ok=True)
         self._save_result(self.medals_by_country_year(), country_path / "medals_by_country_year.csv")
+        if REGION_COLUMN in self.dataframe.columns:
+            self._save_result(self.medals_by_country_year(level=REGION_COLUMN), country_path / "medals_by_region_year.csv")
+        self._save_result(self.home_advantage(), country_path / "home_advantage.csv")
+        self._save_result(self.similar_countries(k=5), country_path / "similar_countries.csv")
         try:
             top_noc = self.medals_by_country().head(top_noc_count).index.tolist()
+            performances = []
             for noc in top_noc:
                 perf = self.country_performance(noc)
                 safe_name = noc.replace("/", "_").replace("\\", "_")
-                self._save_result(perf, country_path / f"country_performance_{safe_name}.csv")
+                if self._ingest_csv:
+                    perf.to_csv(country_path / f"country_performance_{safe_name}.csv", index=False)
+                    print(f"  Saved: country_performance_{safe_name}.csv")
+                performances.append(perf.assign(NOC=noc))
+            # Kho kết quả: gộp các file từng NOC thành 1 bảng có cột NOC
+            if self._ingest_tables is not None and performances:
+                self._ingest_tables["country_country_performance"] = pd.concat(performances, ignore_index=True)
+                self._ingest_sources["country_country_performance"] = "country/country_performance_*.csv"
         except Exception:
             pass
 
@@ -305,5 +1399,17 @@ class DataAnalysis:
         if vn is not None:
             self._save_result(pd.DataFrame([vn]), vietnam_path / "vietnam_analysis.csv")
 
-        print("Ingest done: all analysis CSVs written in subfolders.")
-        return self
\ No newline at end of file
+        # 8. Báo cáo từng NOC -> output/csv/country_reports/<NOC>/ (chỉ sinh lại nước có dữ liệu đổi)
+        if self._ingest_csv:
+            write_country_reports(self, out_path / "country_reports")
+        if self._ingest_tables is not None:
+            reports = self.country_reports()
+            for part in ("summary", "medals_by_sport", "medals_by_year", "top_athletes"):
+                frames = [
+                    report[part].reset_index() if part.startswith("medals_by") else report[part]
+                    for report in reports.values()
+                ]
+                frames = [f.assign(NOC=noc) if "NOC" not in f.columns else f for noc, f in zip(reports, frames)]
+                name = f"country_reports_{part}"
+                self._ingest_tables[name] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+                self._ingest_sources[name] = f"country_reports/<NOC>/{part}.csv"
\ No newline at end of file
@@ -0,0 +1,276 @@
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Số phần tử lấy mẫu khi ước lượng cột chuỗi (deep=True quét mọi phần tử, quá chậm)
+SIZE_SAMPLE = 1000
+
+
+def _column_bytes(values: pd.Series) -> int:
+    if not (pd.api.types.is_object_dtype(values.dtype) or pd.api.types.is_string_dtype(values.dtype)):
+        return int(values.memory_usage(index=False, deep=False))
+    n = len(values)
+    if n == 0:
+        return 0
+    sample = values.iloc[np.linspace(0, n - 1, min(n, SIZE_SAMPLE)).astype(np.intp)]
+    per_value = sum(sys.getsizeof(v) for v in sample) / len(sample)
+    # Con trỏ 8 byte / dòng + chuỗi ước lượng theo mẫu
+    return int(n * (per_value + 8))
+
+
+def estimate_size(obj: Any, shared: Iterable[Any] = (), _seen: Optional[set] = None) -> int:
+    """
+    Ước lượng số byte mà obj giữ (DataFrame, mảng, dict/list, component Dash, Figure plotly,
+    đối tượng có __dict__ như DataAnalysis). Các đối tượng trong shared (vd. dataset đầy đủ đã
+    cache riêng) và đối tượng gặp lại không tính thêm.
+    """
+    if _seen is None:
+        _seen = {id(o) for o in shared}
+    if id(obj) in _seen or obj is None:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, pd.DataFrame):
+        return sum(_column_bytes(obj[c]) for c in obj.columns) + estimate_size(obj.index, shared, _seen)
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return _column_bytes(pd.Series(obj) if isinstance(obj, pd.Index) else obj)
+    if isinstance(obj, (str, bytes, int, float, bool)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_size(k, shared, _seen) + estimate_size(v, shared, _seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(v, shared, _seen) for v in obj)
+    # Component Dash / Figure plotly: kích thước cây JSON mà chúng sẽ gửi đi
+    if hasattr(obj, "to_plotly_json"):
+        return estimate_size(obj.to_plotly_json(), shared, _seen)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + estimate_size(vars(obj), shared, _seen)
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """
+    Cache LRU giới hạn theo bộ nhớ (tổng byte ước lượng của các giá trị), an toàn đa luồng.
+    Đếm hit/miss/eviction; invalidate(predicate) xóa các khóa thỏa điều kiện (vd. khi dataset nạp lại).
+    Giá trị lớn hơn cả ngân sách thì không lưu. entries() / evict(key) cho MemoryBudget.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = estimate_size):
+        self.max_bytes = int(max_bytes)
+        self.sizeof = sizeof
+        # key -> (value, size, lần dùng cuối theo time.monotonic())
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        # Tiến trình con fork (vd. background callback) có thể nhận khóa đang bị 1 thread khác giữ
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_lock())
+
+    def _reset_lock(self):
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries[key] = (entry[0], entry[1], time.monotonic())
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> bool:
+        """Lưu value; trả về False nếu value vượt ngân sách (không lưu)."""
+        size = self.sizeof(value) if size is None else int(size)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return True
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], cacheable: Callable[[Any], bool] = None) -> Any:
+        """Trả về giá trị đã cache hoặc tính bằng compute() (ngoài khóa) rồi lưu nếu cacheable."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        if cacheable is None or cacheable(value):
+            self.put(key, value)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Xóa các khóa thỏa predicate (None = xóa hết); trả về số mục đã xóa."""
+        with self._lock:
+            keys = [k for k in self._entries if predicate is None or predicate(k)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[1]
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def entries(self) -> list:
+        """[(key, bytes, lần dùng cuối)] theo thứ tự dùng lâu nhất trước."""
+        with self._lock:
+            return [(key, size, used) for key, (_, size, used) in self._entries.items()]
+
+    def evict(self, key: Hashable) -> bool:
+        """Bỏ 1 mục (do ngân sách bộ nhớ chung); False nếu không còn."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[1]
+            self.evictions += 1
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class MemoryBudget:
+    """
+    Ngân sách bộ nhớ chung cho nhiều kho (dataset, phân tích kèm chỉ mục / khối đếm, cache kết quả).
+    Mỗi kho có entries() -> [(key, bytes, lần dùng cuối)] và evict(key). enforce() bỏ các mục không
+    dùng quá idle_seconds, rồi bỏ mục dùng lâu nhất (so trên mọi kho) cho tới khi tổng <= max_bytes.
+    register(..., idle_exempt=pred): mục có pred(key) đúng (vd. dataset chính) không bị bỏ vì idle,
+    chỉ bị bỏ khi vượt ngân sách byte.
+    start() chạy enforce() định kỳ trong luồng nền (tự chạy lại trong tiến trình con sau fork).
+    """
+
+    def __init__(self, max_bytes: int, idle_seconds: Optional[float] = None):
+        self.max_bytes = int(max_bytes)
+        self.idle_seconds = idle_seconds
+        self.stores: "OrderedDict[str, Any]" = OrderedDict()
+        self._idle_exempt: Dict[str, Callable[[Hashable], bool]] = {}
+        self._lock = threading.Lock()
+        self._interval: Optional[float] = None
+        self._stop = threading.Event()
+        self.evictions = self.idle_evictions = 0
+        self.last_enforced: Optional[float] = None
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        # Luồng định kỳ của tiến trình cha không sang tiến trình con
+        if self._interval is not None and not self._stop.is_set():
+            self._spawn()
+
+    def register(self, name: str, store: Any, idle_exempt: Optional[Callable[[Hashable], bool]] = None) -> Any:
+        self.stores[name] = store
+        if idle_exempt is not None:
+            self._idle_exempt[name] = idle_exempt
+        return store
+
+    def _is_idle(self, name: str, key: Hashable, used: float, now: float) -> bool:
+        if self.idle_seconds is None or now - used <= self.idle_seconds:
+            return False
+        exempt = self._idle_exempt.get(name)
+        return exempt is None or not exempt(key)
+
+    def _entries(self) -> list:
+        return [(used, name, key, size) for name, store in self.stores.items() for key, size, used in store.entries()]
+
+    def usage(self) -> dict:
+        """Số byte từng kho."""
+        usage = {name: 0 for name in self.stores}
+        for _, name, _, size in self._entries():
+            usage[name] += size
+        return usage
+
+    def enforce(self) -> int:
+        """Bỏ mục idle / dùng lâu nhất cho tới khi đủ ngân sách; trả về số mục đã bỏ."""
+        if not self._lock.acquire(blocking=False):
+            # Luồng khác đang dọn
+            return 0
+        try:
+            now = time.monotonic()
+            entries = sorted(self._entries(), key=lambda entry: entry[0])
+            total = sum(entry[3] for entry in entries)
+            evicted = 0
+            for used, name, key, size in entries:
+                idle = self._is_idle(name, key, used, now)
+                # Tổng đã vừa: chỉ còn bỏ mục idle (mục miễn idle cũ hơn có thể đứng trước mục idle)
+                if not idle and total <= self.max_bytes:
+                    if self.idle_seconds is None or now - used <= self.idle_seconds:
+                        break
+                    continue
+                if self.stores[name].evict(key):
+                    evicted += 1
+                    self.idle_evictions += idle
+                    # Bỏ 1 mục có thể kéo theo mục khác (dataset -> phân tích, kết quả) -> đo lại
+                    total = sum(entry[3] for entry in self._entries())
+            self.evictions += evicted
+            self.last_enforced = time.time()
+            return evicted
+        finally:
+            self._lock.release()
+
+    def start(self, interval: float) -> None:
+        """Gọi enforce() mỗi interval giây trong luồng daemon."""
+        self._interval = interval
+        self._spawn()
+
+    def _spawn(self):
+        def run():
+            while not self._stop.wait(self._interval):
+                try:
+                    self.enforce()
+                except Exception as e:
+                    print(f"[MemoryBudget] Lỗi khi dọn bộ nhớ: {e}")
+
+        threading.Thread(target=run, name="memory-budget", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        usage = self.usage()
+        return {
+            "bytes": sum(usage.values()),
+            "max_bytes": self.max_bytes,
+            "stores": usage,
+            "idle_seconds": self.idle_seconds,
+            "evictions": self.evictions,
+            "idle_evictions": self.idle_evictions,
+            "last_enforced": self.last_enforced,
+        }
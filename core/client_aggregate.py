@@ -0,0 +1,45 @@
+import base64
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+# Các chiều của bảng đếm gửi cho trình duyệt (lọc + gộp lại phía client)
+AGGREGATE_DIMENSIONS = ("Year", "NOC", "Sport", "Sex", "Medal")
+_UNSIGNED = (np.uint8, np.uint16, np.uint32)
+
+
+def encode_column(values: np.ndarray) -> dict:
+    """Mảng số nguyên không âm -> {"dtype", "data" (base64, little-endian)} với kiểu nhỏ nhất đủ chứa."""
+    values = np.asarray(values)
+    top = int(values.max()) if len(values) else 0
+    dtype = np.dtype(next(t for t in _UNSIGNED if top <= np.iinfo(t).max)).newbyteorder("<")
+    return {"dtype": dtype.name, "data": base64.b64encode(values.astype(dtype).tobytes()).decode("ascii")}
+
+
+def _plain(value):
+    """Giá trị numpy -> kiểu Python cho JSON (số giữ nguyên là số để client so với giá trị bộ lọc)."""
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def build_count_aggregate(dataframe: pd.DataFrame, dimensions: Sequence[str] = AGGREGATE_DIMENSIONS) -> dict:
+    """
+    Bảng đếm số dòng theo tổ hợp các chiều, dạng cột: dims[chiều] = danh sách giá trị (đã sắp xếp,
+    None = thiếu), codes[chiều] = mã của từng tổ hợp, counts = số dòng. Chỉ giữ tổ hợp có xuất hiện.
+    """
+    dimensions = [d for d in dimensions if d in dataframe.columns]
+    codes, uniques = [], []
+    for dimension in dimensions:
+        dim_codes, dim_uniques = pd.factorize(dataframe[dimension], sort=True)
+        # Giá trị thiếu (-1) -> mã cuối cùng
+        codes.append(np.where(dim_codes < 0, len(dim_uniques), dim_codes))
+        uniques.append([_plain(v) for v in dim_uniques] + ([None] if (dim_codes < 0).any() else []))
+    combos, counts = np.unique(np.column_stack(codes), axis=0, return_counts=True)
+    return {
+        "rows": int(len(dataframe)),
+        "dims": dict(zip(dimensions, uniques)),
+        "codes": {dimension: encode_column(combos[:, i]) for i, dimension in enumerate(dimensions)},
+        "counts": encode_column(counts),
+    }
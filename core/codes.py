@@ -0,0 +1,62 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+# Hằng số và hàm mã hóa dùng chung cho data_cleaner, analysis và app_dash.
+# Chỉ phụ thuộc numpy/pandas để app_dash import được mà không kéo theo core.analysis.
+
+# Nhóm tuổi mặc định: khoảng [a, b) giống pd.cut(..., right=False)
+AGE_BINS = [0, 20, 30, 40, 50, 100]
+AGE_LABELS = ["U20", "20-30", "30-40", "40-50", "Over 50"]
+# Cột mã nhóm tuổi (int8, -1 = không thuộc nhóm nào), tính 1 lần khi làm sạch / nạp dataset
+AGE_GROUP_COLUMN = "AgeGroupCode"
+
+# Cột mã số nguyên của các chiều hay group-by: mã = thứ hạng trong các giá trị đã sắp xếp
+# (int32, NaN -> -1). Các tổng hợp chính đếm bằng np.bincount trên mã thay vì hash chuỗi.
+DIMENSION_CODE_COLUMNS = {
+    "NOC": "NOCCode",
+    "Sport": "SportCode",
+    "Year": "YearCode",
+    "Sex": "SexCode",
+    "Medal": "MedalCode",
+    "Region": "RegionCode",
+}
+# Cột mã chỉ dùng trong bộ nhớ: không ghi ra cleaned_data.csv, tính lại khi nạp
+CODE_COLUMNS = (AGE_GROUP_COLUMN,) + tuple(DIMENSION_CODE_COLUMNS.values())
+# Cột khu vực (gộp các NOC lịch sử: URS/RUS, GDR/FRG/GER...)
+REGION_COLUMN = "Region"
+
+
+def bin_codes(values, edges: Sequence[float]) -> np.ndarray:
+    """
+    Gán mã bin [edges[i], edges[i+1]) bằng np.searchsorted.
+    Trả về mảng int8; NaN hoặc ngoài khoảng -> -1.
+    """
+    edges = np.asarray(edges, dtype=float)
+    values = np.asarray(values, dtype=float)
+    codes = np.searchsorted(edges, values, side="right") - 1
+    codes[(codes >= len(edges) - 1) | np.isnan(values)] = -1
+    return codes.astype(np.int8)
+
+
+def dimension_codes(values) -> np.ndarray:
+    """Mã int32 theo thứ tự giá trị đã sắp xếp (pd.factorize sort=True); NaN -> -1."""
+    return pd.factorize(values, sort=True)[0].astype(np.int32)
+
+
+def region_categorical(noc_codes: np.ndarray, noc_values, noc_regions) -> pd.Categorical:
+    """
+    Region từng dòng bằng join ở mức mã: tra bảng NOC -> region trên các NOC phân biệt
+    (noc_values[c] là NOC của mã c), rồi gather theo mã NOC của dòng — không so chuỗi theo dòng.
+    NOC không có trong bảng (hoặc region trống) giữ nguyên mã NOC. Mã Categorical = thứ hạng
+    region đã sắp xếp, khớp dimension_codes(Region).
+    """
+    noc_values = pd.Index(noc_values)
+    regions = pd.Series(noc_values.map(pd.Series(noc_regions)), dtype=object)
+    regions = regions.where(regions.notna(), pd.Series(noc_values.astype(str), dtype=object))
+    region_of_noc, region_values = pd.factorize(regions.to_numpy(), sort=True)
+    # Ô cuối = -1 cho NOC thiếu (mã -1)
+    lookup = np.append(region_of_noc, -1).astype(np.int32)
+    codes = lookup[np.asarray(noc_codes, dtype=np.int64)]
+    return pd.Categorical.from_codes(codes, categories=pd.Index(region_values).astype(str))
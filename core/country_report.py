@@ -0,0 +1,110 @@
+import json
+import multiprocessing
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+# Tăng khi đổi nội dung / định dạng báo cáo để buộc sinh lại toàn bộ
+REPORT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+REPORT_FILES = ("summary", "medals_by_sport", "medals_by_year", "top_athletes")
+
+
+def safe_noc_name(noc: str) -> str:
+    return str(noc).replace("/", "_").replace("\\", "_")
+
+
+def _write_country_report(task) -> str:
+    """Ghi các CSV báo cáo của 1 NOC vào thư mục riêng (chạy trong tiến trình con)."""
+    noc, report, folder = task
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    for name in REPORT_FILES:
+        frame = report[name]
+        keep_index = name in ("medals_by_sport", "medals_by_year")
+        frame.to_csv(folder / f"{name}.csv", index=keep_index)
+    return noc
+
+
+def _load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == REPORT_VERSION else {}
+
+
+def process_pool_executor(max_workers: Optional[int]):
+    """
+    Process pool với start method "fork" nếu có. main.py chạy pipeline ngay khi import,
+    nên spawn/forkserver sẽ chạy lại pipeline trong tiến trình con -> khi đó dùng thread pool.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def write_country_reports(
+    analysis,
+    output_dir,
+    nocs: Optional[Sequence[str]] = None,
+    incremental: bool = True,
+    max_workers: Optional[int] = None,
+    top_athletes: int = 10,
+) -> List[str]:
+    """
+    Sinh báo cáo cho mọi NOC (hoặc nocs) vào output_dir/<NOC>/*.csv.
+    Bảng đếm dùng chung tính 1 lần qua analysis.country_reports(); việc ghi CSV chia cho process pool.
+    incremental=True: chỉ sinh lại nước có dấu vân tay dữ liệu đổi so với manifest.json
+    (hoặc thiếu thư mục); tham số dựng báo cáo (top_athletes) khác lần trước thì sinh lại toàn bộ.
+    Trả về danh sách NOC đã sinh lại.
+    """
+    out_path = Path(output_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_path / MANIFEST_NAME
+    params = {"top_athletes": top_athletes}
+    manifest = _load_manifest(manifest_path) if incremental else {}
+    previous = manifest.get("fingerprints", {}) if manifest.get("params") == params else {}
+
+    fingerprints = analysis.country_fingerprints()
+    targets = list(fingerprints.index) if nocs is None else [n for n in nocs if n in fingerprints.index]
+    stale = [
+        noc for noc in targets
+        if previous.get(noc) != fingerprints[noc] or not (out_path / safe_noc_name(noc)).exists()
+    ]
+
+    if stale:
+        reports = analysis.country_reports(top_athletes=top_athletes)
+        tasks = [(noc, reports[noc], str(out_path / safe_noc_name(noc))) for noc in stale]
+        if max_workers == 1 or len(tasks) == 1:
+            written = [_write_country_report(task) for task in tasks]
+        else:
+            with process_pool_executor(max_workers) as pool:
+                written = list(pool.map(_write_country_report, tasks, chunksize=max(1, len(tasks) // 32)))
+    else:
+        written = []
+
+    # Cập nhật manifest; chạy toàn bộ thì xóa báo cáo của NOC không còn trong dữ liệu
+    current = dict(previous)
+    current.update({noc: fingerprints[noc] for noc in targets})
+    if nocs is None:
+        for noc in set(current) - set(fingerprints.index):
+            shutil.rmtree(out_path / safe_noc_name(noc), ignore_errors=True)
+            del current[noc]
+    manifest_path.write_text(
+        json.dumps({"version": REPORT_VERSION, "params": params, "fingerprints": current}, indent=1, sort_keys=True),
+        encoding="utf-8",
+    )
+
+    if written:
+        # Bảng tóm tắt tất cả NOC (tính từ các báo cáo đã có trong bộ nhớ)
+        reports = analysis.country_reports(top_athletes=top_athletes)
+        summary = pd.concat([reports[noc]["summary"] for noc in fingerprints.index], ignore_index=True)
+        summary.to_csv(out_path / "summary_all.csv", index=False)
+    print(f"  Saved: {len(written)} country reports -> {out_path.name}/ (giữ nguyên {len(targets) - len(written)})")
+    return written
@@ -4,6 +4,17 @@ import pandas as pd
 import numpy as np
 from typing import Optional, List, Union, Callable
 
+from core.codes import (
+    AGE_BINS,
+    AGE_GROUP_COLUMN,
+    CODE_COLUMNS,
+    DIMENSION_CODE_COLUMNS,
+    REGION_COLUMN,
+    bin_codes,
+    dimension_codes,
+    region_categorical,
+)
+
 try:
     from sklearn.preprocessing import StandardScaler
     HAS_SKLEARN = True
@@ -307,6 +318,52 @@ class DataCleaner:
         self._log("clean_event_name: Cắt bỏ Sport lặp ở đầu Event")
         return self
 
+    def add_age_group_codes(self) -> "DataCleaner":
+        """
+        Thêm cột AgeGroupCode (int8) theo AGE_BINS để các phân tích tuổi dùng lại,
+        không phải pd.cut lại mỗi lần. Tuổi NaN/ngoài khoảng -> -1.
+        """
+        if "Age" not in self.dataFrame.columns:
+            return self
+        self.dataFrame[AGE_GROUP_COLUMN] = bin_codes(self.dataFrame["Age"], AGE_BINS)
+        self._log(f"add_age_group_codes: Mã hóa nhóm tuổi theo bins {AGE_BINS}")
+        return self
+
+    def add_dimension_codes(self) -> "DataCleaner":
+        """
+        Thêm cột mã số nguyên (int32) cho NOC, Sport, Year, Sex, Medal theo DIMENSION_CODE_COLUMNS.
+        Mã = thứ hạng giá trị đã sắp xếp, NaN -> -1; DataAnalysis đếm trên các cột này.
+        """
+        added = []
+        for dimension, column in DIMENSION_CODE_COLUMNS.items():
+            if dimension in self.dataFrame.columns:
+                self.dataFrame[column] = dimension_codes(self.dataFrame[dimension])
+                added.append(column)
+        self._log(f"add_dimension_codes: Thêm cột mã {added}")
+        return self
+
+    def add_region(self, noc_regions) -> "DataCleaner":
+        """
+        Thêm cột Region (categorical) + RegionCode từ bảng NOC -> region (FileManager.read_noc_regions).
+        Join ở mức mã: tra bảng trên các NOC phân biệt rồi gather theo NOCCode; NOC không có
+        trong bảng giữ nguyên mã NOC làm region.
+        """
+        if noc_regions is None or "NOC" not in self.dataFrame.columns:
+            return self
+        noc_column = DIMENSION_CODE_COLUMNS["NOC"]
+        if noc_column in self.dataFrame.columns:
+            noc_codes = self.dataFrame[noc_column].to_numpy()
+        else:
+            noc_codes = dimension_codes(self.dataFrame["NOC"])
+        # Mã NOC = thứ hạng trong các NOC đã sắp xếp -> noc_values[c] là NOC của mã c
+        noc_values = np.sort(self.dataFrame["NOC"].dropna().unique())
+        regions = region_categorical(noc_codes, noc_values, noc_regions)
+        self.dataFrame[REGION_COLUMN] = regions
+        self.dataFrame[DIMENSION_CODE_COLUMNS[REGION_COLUMN]] = regions.codes.astype(np.int32)
+        unmatched = int((~pd.Index(noc_values).isin(pd.Series(noc_regions).index)).sum())
+        self._log(f"add_region: {len(regions.categories)} khu vực từ {len(noc_values)} NOC ({unmatched} NOC không có trong bảng)")
+        return self
+
     def scale_data(self, numeric_cols: Optional[List[str]] = None) -> "DataCleaner":
         """
         Chuẩn hóa các cột số (Age, Height, Weight) bằng StandardScaler.
@@ -379,6 +436,7 @@ class DataCleaner:
         use_group_imputation: bool = True,
         handle_outliers: str = "clip",  # "clip" | "remove" | "none"
         clip_to_valid: bool = True,
+        noc_regions=None,
     ) -> "DataCleaner":
         """
         Pipeline làm sạch đầy đủ cho athlete_events.csv.
@@ -388,6 +446,7 @@ class DataCleaner:
         - use_group_imputation: Điền theo nhóm Sport+Sex
         - handle_outliers: 'clip' (gán về biên), 'remove' (xóa), 'none'
         - clip_to_valid: Clip vào khoảng hợp lệ (Age 5-100, Height 100-250, Weight 25-300)
+        - noc_regions: bảng NOC -> region (FileManager.read_noc_regions); có thì thêm cột Region
         """
         self._cleaning_log = []
 
@@ -440,6 +499,15 @@ class DataCleaner:
         if "Weight" in self.dataFrame.columns:
             self.dataFrame["Weight"] = self.dataFrame["Weight"].astype(float)
 
+        # 10. Mã hóa nhóm tuổi (tính 1 lần, giữ trong bộ nhớ)
+        self.add_age_group_codes()
+
+        # 11. Mã số nguyên cho các chiều group-by (NOC, Sport, Year, Sex, Medal)
+        self.add_dimension_codes()
+
+        # 12. Khu vực từ NOC (join trên mã NOC vừa tạo)
+        self.add_region(noc_regions)
+
         self._log("run_full_olympic_cleaning: Hoàn tất pipeline")
 
 
@@ -453,6 +521,10 @@ class DataCleaner:
     def get_data(self) -> pd.DataFrame:
         return self.dataFrame
 
+    def get_export_data(self) -> pd.DataFrame:
+        """Dataset để ghi ra cleaned_data.csv: bỏ các cột mã nội bộ (CODE_COLUMNS), app_dash tính lại khi nạp."""
+        return self.dataFrame.drop(columns=[c for c in CODE_COLUMNS if c in self.dataFrame.columns])
+
     def get_cleaning_log(self) -> List[str]:
         return self._cleaning_log.copy()
 
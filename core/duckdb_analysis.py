@@ -0,0 +1,148 @@
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from core.analysis import DataAnalysis, MEDAL_TYPES, NO_MEDAL
+
+# duckdb là tùy chọn; không có thì create_analysis quay về engine pandas
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except ImportError:
+    HAS_DUCKDB = False
+
+TABLE_NAME = "athletes"
+
+
+def _sql_literal(value) -> str:
+    """Chuỗi SQL có nháy đơn (VIEW/COPY không nhận tham số ?)."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class DuckDBAnalysis(DataAnalysis):
+    """
+    DataAnalysis chạy các tổng hợp chính bằng DuckDB trong tiến trình (đa luồng),
+    trên file Parquet đã làm sạch hoặc trực tiếp trên DataFrame.
+    Cùng tên hàm, cùng kiểu trả về pandas; các phần còn lại (khoảng năm, ma trận,
+    báo cáo quốc gia...) dùng lại cài đặt NumPy của DataAnalysis.
+    """
+
+    def __init__(
+        self,
+        dataframe: Optional[pd.DataFrame] = None,
+        parquet_path: Optional[Union[str, Path]] = None,
+        threads: Optional[int] = None,
+        **kwargs,
+    ):
+        if not HAS_DUCKDB:
+            raise ImportError("Cần cài duckdb để dùng DuckDBAnalysis (pip install duckdb)")
+        if dataframe is None and parquet_path is None:
+            raise ValueError("Cần dataframe hoặc parquet_path")
+        self.connection = duckdb.connect(database=":memory:")
+        if threads is not None:
+            self.connection.execute(f"SET threads TO {int(threads)}")
+        self.parquet_path = Path(parquet_path) if parquet_path is not None else None
+        if self.parquet_path is not None:
+            if dataframe is not None:
+                self._write_parquet(dataframe, self.parquet_path)
+            self.connection.execute(
+                f"CREATE VIEW {TABLE_NAME} AS SELECT * FROM read_parquet({_sql_literal(self.parquet_path)})"
+            )
+            if dataframe is None:
+                dataframe = self.connection.execute(f"SELECT * FROM {TABLE_NAME}").df()
+        else:
+            self.connection.register(TABLE_NAME, dataframe)
+        super().__init__(dataframe, **kwargs)
+
+    @classmethod
+    def from_parquet(cls, parquet_path: Union[str, Path], **kwargs) -> "DuckDBAnalysis":
+        """Mở trực tiếp file Parquet đã làm sạch."""
+        return cls(parquet_path=parquet_path, **kwargs)
+
+    def _write_parquet(self, dataframe: pd.DataFrame, path: Path):
+        """Ghi DataFrame ra Parquet bằng chính DuckDB (không cần pyarrow)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection.register("_export", dataframe)
+        self.connection.execute(f"COPY _export TO {_sql_literal(path)} (FORMAT PARQUET)")
+        self.connection.unregister("_export")
+
+    def _query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        return self.connection.execute(sql, list(params)).df()
+
+    def _keyed_series(self, result: pd.DataFrame, dimension: str, name: str) -> pd.Series:
+        """Series (key -> n) với index mang đúng dtype cột gốc như groupby của pandas."""
+        index = pd.Index(result["key"].to_numpy(), name=dimension).astype(self.dataframe[dimension].dtype)
+        return pd.Series(result["n"].to_numpy(dtype=np.int64), index=index, name=name)
+
+    # ---------- Các tổng hợp chạy trên DuckDB ----------
+
+    def analyze_data_overview(self):
+        has_medal = "Medal" in self.dataframe.columns
+        medal_expr = f"count(\"Medal\") FILTER (WHERE \"Medal\" <> '{NO_MEDAL}')" if has_medal else "0"
+        row = self.connection.execute(f"""
+            SELECT count(DISTINCT "ID"), count(DISTINCT "NOC"), count(DISTINCT "Year"),
+                   count(DISTINCT "Sport"), {medal_expr}
+            FROM {TABLE_NAME}
+        """).fetchone()
+        keys = ["total_athletes", "total_countries", "total_olympic_games", "total_sports", "total_medals"]
+        return {key: int(value) for key, value in zip(keys, row)}
+
+    def analyze_data_by_gender(self, year_range: Optional[Tuple[int, int]] = None):
+        if year_range is not None:
+            return super().analyze_data_by_gender(year_range)
+        counts = self._keyed_series(self._query(f"""
+            SELECT "Sex" AS key, count(*) AS n FROM {TABLE_NAME}
+            WHERE "Sex" IS NOT NULL GROUP BY 1 ORDER BY 1
+        """), "Sex", "count")
+        gender_counts = counts.sort_values(ascending=False, kind="stable")
+        result = {
+            "gender_counts": gender_counts,
+            "gender_percentage": ((gender_counts / gender_counts.sum()).rename("proportion") * 100).round(2),
+            "medal_by_gender": None,
+        }
+        if "Medal" in self.dataframe.columns:
+            result["medal_by_gender"] = self._keyed_series(self._query(f"""
+                SELECT "Sex" AS key, count(*) AS n FROM {TABLE_NAME}
+                WHERE "Sex" IS NOT NULL AND "Medal" IS NOT NULL AND "Medal" <> ?
+                GROUP BY 1 ORDER BY 1
+            """, [NO_MEDAL]), "Sex", "Medal")
+        return result
+
+    def _medal_counts_by(self, dimension: str, medals: Sequence[str] = MEDAL_TYPES) -> pd.Series:
+        placeholders = ", ".join("?" for _ in medals)
+        result = self._query(f"""
+            SELECT "{dimension}" AS key, count(*) AS n FROM {TABLE_NAME}
+            WHERE "Medal" IN ({placeholders}) AND "{dimension}" IS NOT NULL
+            GROUP BY 1 ORDER BY 1
+        """, list(medals))
+        return self._keyed_series(result, dimension, "Medal")
+
+    def _medal_tally_kernel(self) -> pd.DataFrame:
+        placeholders = ", ".join("?" for _ in MEDAL_TYPES)
+        event_filter = 'AND "Event" IS NOT NULL' if "Event" in self.dataframe.columns else ""
+        result = self._query(f"""
+            SELECT "NOC", "Medal", count(*) AS n FROM {TABLE_NAME}
+            WHERE "Medal" IN ({placeholders}) AND "NOC" IS NOT NULL {event_filter}
+            GROUP BY 1, 2
+        """, MEDAL_TYPES)
+        table = result.pivot(index="NOC", columns="Medal", values="n").fillna(0).astype(np.int64)
+        table = table.sort_index().sort_index(axis=1)
+        table.index = table.index.astype(self.dataframe["NOC"].dtype)
+        table.columns = pd.Index(table.columns, name="Medal").astype(self.dataframe["Medal"].dtype)
+        return table
+
+    def physique_by_sport(self):
+        """Chiều cao, cân nặng, BMI trung bình theo môn"""
+        result = self._query(f"""
+            SELECT "Sport", avg("Height") AS "Height", avg("Weight") AS "Weight" FROM {TABLE_NAME}
+            WHERE "Sport" IS NOT NULL
+              AND "Height" IS NOT NULL AND NOT isnan("Height")
+              AND "Weight" IS NOT NULL AND NOT isnan("Weight")
+            GROUP BY 1 ORDER BY 1
+        """)
+        stats = result.set_index("Sport")[["Height", "Weight"]].astype(float)
+        stats.index = stats.index.astype(self.dataframe["Sport"].dtype)
+        stats["BMI"] = stats["Weight"] / ((stats["Height"] / 100) ** 2)
+        return stats.sort_values("Weight", ascending=False).round(2)
@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+from core.analysis import DataAnalysis
+from core.duckdb_analysis import HAS_DUCKDB, DuckDBAnalysis
+
+ENGINES = ("pandas", "duckdb")
+# Chọn engine qua biến môi trường, vd. OLYMPIC_ANALYSIS_ENGINE=duckdb python main.py
+ANALYSIS_ENGINE = os.environ.get("OLYMPIC_ANALYSIS_ENGINE", "pandas").lower()
+# File Parquet đã làm sạch mà engine DuckDB đọc (tương đối theo thư mục gốc dự án)
+CLEANED_PARQUET = "output/parquet/cleaned_data.parquet"
+
+
+def create_analysis(
+    dataframe: pd.DataFrame,
+    engine: Optional[str] = None,
+    parquet_path: Optional[Union[str, Path]] = None,
+    **kwargs,
+) -> DataAnalysis:
+    """
+    Tạo đối tượng phân tích theo engine ("pandas" | "duckdb", mặc định ANALYSIS_ENGINE).
+    duckdb + parquet_path: ghi dataframe ra Parquet rồi truy vấn trên file đó.
+    Chưa cài duckdb thì quay về pandas.
+    """
+    engine = (engine or ANALYSIS_ENGINE).lower()
+    if engine not in ENGINES:
+        raise ValueError(f"engine phải là một trong {ENGINES}")
+    if engine == "duckdb":
+        if HAS_DUCKDB:
+            if parquet_path is not None:
+                parquet_path = Path(__file__).resolve().parent.parent / parquet_path
+            return DuckDBAnalysis(dataframe, parquet_path=parquet_path, **kwargs)
+        print("[Engine] Chưa cài duckdb -> dùng pandas")
+    return DataAnalysis(dataframe, **kwargs)
@@ -22,6 +22,27 @@ class FileManager:
             print(f"Error reading file {self.file_path}: {e}")
             return None
 
+    def read_noc_regions(self, file_path="data/noc_regions.csv"):
+        """
+        Đọc bảng NOC -> region (noc_regions.csv: cột NOC, region) nếu có.
+        Trả về Series index NOC; không có file thì trả về None (region là tùy chọn).
+        """
+        try:
+            path = self.find_root_file(file_path)
+        except FileNotFoundError:
+            return None
+        try:
+            regions = pd.read_csv(path)
+        except Exception as e:
+            print(f"Error reading file {path}: {e}")
+            return None
+        regions = regions.dropna(subset=["NOC", "region"]).drop_duplicates("NOC")
+        mapping = pd.Series(regions["region"].to_numpy(), index=regions["NOC"].to_numpy(), name="Region")
+        # noc_regions.csv ghi Singapore là SIN, athlete_events.csv dùng SGP
+        if "SIN" in mapping.index and "SGP" not in mapping.index:
+            mapping["SGP"] = mapping["SIN"]
+        return mapping
+
     def save_data(self, dataFrame, relative_path):
     # Lấy root project (BTL_PYTHON)
         root_dir = Path(__file__).resolve().parent.parent
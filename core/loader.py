@@ -0,0 +1,259 @@
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+IDLE, LOADING, READY, ERROR = "idle", "loading", "ready", "error"
+
+
+class _Flight:
+    """1 lần nạp đang chạy: các luồng khác chờ done rồi đọc value / error."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        # invalidate() trong lúc nạp: vẫn trả cho các luồng đang chờ nhưng không lưu lại
+        self.stale = False
+
+
+class SingleFlightLoader:
+    """
+    Nạp giá trị theo khóa (vd. "cleaned" / "raw"), an toàn đa luồng và single-flight:
+    nhiều luồng cùng xin 1 khóa chưa có thì chỉ 1 luồng nạp, các luồng còn lại chờ kết quả đó.
+    Khóa khác nhau nạp song song. load(key, report) gọi report("giai đoạn") để báo tiến độ;
+    on_loaded(key, value, seconds) chạy trước khi giá trị được công bố. Lỗi trả cho mọi luồng
+    đang chờ, lần get sau nạp lại. entries() / evict(key) cho MemoryBudget: sizeof(key, value) đo lại
+    mỗi lần (giá trị có thể lớn dần, vd. chỉ mục dựng muộn), on_evicted(key) dọn các thứ phụ thuộc.
+    reload(key) dựng giá trị mới trong khi get() vẫn trả giá trị cũ, xong thì thay 1 lần.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Hashable, Callable[[str], None]], Any],
+        on_loaded: Optional[Callable[[Hashable, Any, float], None]] = None,
+        sizeof: Optional[Callable[[Hashable, Any], int]] = None,
+        on_evicted: Optional[Callable[[Hashable], None]] = None,
+        keep_state: bool = True,
+    ):
+        self._load = load
+        self._on_loaded = on_loaded
+        self._sizeof = sizeof
+        self._on_evicted = on_evicted
+        # False: khóa bị bỏ thì quên hẳn (khóa là đối tượng lớn, vd. thế hệ dữ liệu) thay vì ghi "idle"
+        self._keep_state = keep_state
+        self._lock = threading.Lock()
+        self._values: Dict[Hashable, Any] = {}
+        # key -> lần dùng cuối (time.monotonic()) / số byte đo lần gần nhất
+        self._used: Dict[Hashable, float] = {}
+        self._sizes: Dict[Hashable, int] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._reloads: Dict[Hashable, _Flight] = {}
+        self._states: Dict[Hashable, dict] = {}
+        # Tiến trình con fork (worker gunicorn) không có luồng nạp nền của cha -> bỏ lượt đang dở
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        for key in list(self._flights):
+            self._flights.pop(key)
+            self._states[key] = {"status": IDLE}
+        for key in list(self._reloads):
+            self._reloads.pop(key)
+            self._states[key].pop("reloading", None)
+
+    def get(self, key: Hashable) -> Any:
+        """Giá trị của key; chưa có thì nạp (hoặc chờ lượt nạp đang chạy)."""
+        with self._lock:
+            if key in self._values:
+                self._used[key] = time.monotonic()
+                return self._values[key]
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+                self._states[key] = {"status": LOADING, "stage": None, "started": time.time()}
+        if owner:
+            self._run(key, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _report(self, key: Hashable, flight: _Flight, stage: str):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                self._states[key]["stage"] = stage
+            elif self._reloads.get(key) is flight and "reloading" in self._states[key]:
+                self._states[key]["reloading"]["stage"] = stage
+
+    def _run(self, key: Hashable, flight: _Flight):
+        started = time.perf_counter()
+        try:
+            value = self._load(key, lambda stage: self._report(key, flight, stage))
+            if self._on_loaded is not None:
+                self._on_loaded(key, value, time.perf_counter() - started)
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                if self._flights.get(key) is not flight:
+                    return
+                self._flights.pop(key)
+                self._states[key] = {"status": ERROR, "error": str(e), "seconds": round(time.perf_counter() - started, 3)}
+        else:
+            flight.value = value
+            with self._lock:
+                if flight.stale:
+                    return
+                self._flights.pop(key)
+                self._values[key] = value
+                self._used[key] = time.monotonic()
+                self._states[key] = {"status": READY, "seconds": round(time.perf_counter() - started, 3), "loaded_at": time.time()}
+        finally:
+            flight.done.set()
+
+    def reload(self, key: Hashable, prepare: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Nạp lại key trong luồng gọi; trong lúc đó get() vẫn trả giá trị cũ. Nạp xong và prepare(value)
+        xong (vd. dựng sẵn chỉ mục) mới thay giá trị, 1 lần. Chưa có giá trị -> như get();
+        đang có lượt nạp lại key -> chờ lượt đó. invalidate() trong lúc nạp lại -> không thay.
+        """
+        with self._lock:
+            loaded = key in self._values
+            if loaded:
+                flight = self._reloads.get(key)
+                owner = flight is None
+                if owner:
+                    flight = self._reloads[key] = _Flight()
+                    self._states[key]["reloading"] = {"stage": None, "started": time.time()}
+        if not loaded:
+            return self.get(key)
+        if not owner:
+            flight.done.wait()
+        else:
+            started = time.perf_counter()
+            try:
+                value = self._load(key, lambda stage: self._report(key, flight, stage))
+                if prepare is not None:
+                    prepare(value)
+                if self._on_loaded is not None:
+                    self._on_loaded(key, value, time.perf_counter() - started)
+            except BaseException as e:
+                flight.error = e
+                with self._lock:
+                    if self._reloads.get(key) is flight:
+                        self._reloads.pop(key)
+                        self._states[key].pop("reloading", None)
+                        self._states[key]["reload_error"] = str(e)
+            else:
+                flight.value = value
+                with self._lock:
+                    if self._reloads.get(key) is flight:
+                        self._reloads.pop(key)
+                        self._values[key] = value
+                        self._used[key] = time.monotonic()
+                        self._sizes.pop(key, None)
+                        self._states[key] = {"status": READY, "seconds": round(time.perf_counter() - started, 3), "loaded_at": time.time()}
+            finally:
+                flight.done.set()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def peek(self, key: Hashable) -> Any:
+        """Giá trị đã nạp hoặc None (không nạp, không chờ)."""
+        return self._values.get(key)
+
+    def values(self) -> Dict[Hashable, Any]:
+        with self._lock:
+            return dict(self._values)
+
+    def preload(self, keys: Iterable[Hashable]) -> List[threading.Thread]:
+        """Nạp nền các khóa chưa có (mỗi khóa 1 luồng daemon); lỗi ghi vào state()."""
+        def run(key):
+            try:
+                self.get(key)
+            except Exception as e:
+                print(f"[Loader] Nạp {key} lỗi: {e}")
+
+        threads = []
+        for key in keys:
+            if key in self._values or key in self._flights:
+                continue
+            thread = threading.Thread(target=run, args=(key,), name=f"preload-{key}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def wait(self, keys: Optional[Iterable[Hashable]] = None, timeout: Optional[float] = None) -> bool:
+        """Chờ các lượt nạp đang chạy (của keys, None = tất cả); False nếu hết timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            flights = [f for k, f in self._flights.items() if keys is None or k in keys]
+        for flight in flights:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not flight.done.wait(remaining):
+                return False
+        return True
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Bỏ giá trị đã nạp của key (None = mọi khóa); lượt nạp đang chạy không được lưu, lần get sau nạp lại."""
+        with self._lock:
+            for k in ([key] if key is not None else {*self._values, *self._flights}):
+                self._values.pop(k, None)
+                self._sizes.pop(k, None)
+                self._reloads.pop(k, None)
+                self._used.pop(k, None)
+                flight = self._flights.pop(k, None)
+                if flight is not None:
+                    flight.stale = True
+                self._forget(k, {"status": IDLE})
+
+    def _forget(self, key: Hashable, state: dict):
+        if self._keep_state or key in self._flights or key in self._reloads:
+            self._states[key] = state
+        else:
+            self._states.pop(key, None)
+
+    def entries(self) -> list:
+        """[(key, bytes, lần dùng cuối)] của các giá trị đã nạp (không có sizeof -> rỗng)."""
+        if self._sizeof is None:
+            return []
+        with self._lock:
+            loaded = [(key, value, self._used.get(key, 0.0)) for key, value in self._values.items()]
+        entries = [(key, int(self._sizeof(key, value)), used) for key, value, used in loaded]
+        with self._lock:
+            self._sizes.update((key, size) for key, size, _ in entries if key in self._values)
+        return entries
+
+    def evict(self, key: Hashable) -> bool:
+        """Bỏ giá trị đã nạp (do ngân sách bộ nhớ); lượt nạp đang chạy không bị ảnh hưởng."""
+        with self._lock:
+            if key not in self._values:
+                return False
+            del self._values[key]
+            self._sizes.pop(key, None)
+            self._used.pop(key, None)
+            self._forget(key, {"status": IDLE, "evicted_at": time.time()})
+        if self._on_evicted is not None:
+            self._on_evicted(key)
+        return True
+
+    def state(self) -> Dict[Hashable, dict]:
+        """Trạng thái từng khóa: status (idle/loading/ready/error), stage, elapsed / seconds, error, reloading."""
+        now = time.time()
+        with self._lock:
+            states = {key: dict(state) for key, state in self._states.items()}
+            for key, size in self._sizes.items():
+                states[key]["bytes"] = size
+            for state in states.values():
+                if "reloading" in state:
+                    state["reloading"] = dict(state["reloading"], elapsed=round(now - state["reloading"]["started"], 1))
+        for state in states.values():
+            if state["status"] == LOADING:
+                state["elapsed"] = round(now - state["started"], 1)
+        return states
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+# Đổi khi cấu trúc file metadata đổi -> file cũ bị bỏ qua
+METADATA_VERSION = 1
+# Số byte đầu / cuối file đưa vào dấu vân tay (không đọc cả file)
+FINGERPRINT_BYTES = 1 << 16
+# Cột -> danh sách giá trị phân biệt (đã sắp xếp) cho các dropdown của dashboard
+OPTION_COLUMNS = {"years": "Year", "nocs": "NOC", "sports": "Sport", "sexes": "Sex", "medals": "Medal"}
+
+
+def metadata_path(csv_path: Union[str, Path]) -> Path:
+    """File metadata đi kèm CSV: cleaned_data.csv -> cleaned_data.meta.json."""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + ".meta.json")
+
+
+def dataset_fingerprint(csv_path: Union[str, Path]) -> str:
+    """Dấu vân tay rẻ của file: kích thước + mtime + băm 64 KB đầu và cuối."""
+    csv_path = Path(csv_path)
+    stat = csv_path.stat()
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(csv_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, stat.st_size - FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build_metadata(dataframe: pd.DataFrame, csv_path: Optional[Union[str, Path]] = None) -> dict:
+    """Số dòng, khoảng năm, giá trị dropdown, có cột Region không (+ dấu vân tay nếu có csv_path)."""
+    metadata = {
+        "version": METADATA_VERSION,
+        "rows": int(len(dataframe)),
+        "columns": [str(c) for c in dataframe.columns],
+        "has_region": "Region" in dataframe.columns,
+        "fingerprint": dataset_fingerprint(csv_path) if csv_path is not None else None,
+    }
+    for key, column in OPTION_COLUMNS.items():
+        values = dataframe[column].dropna().unique() if column in dataframe.columns else []
+        metadata[key] = sorted(v.item() if hasattr(v, "item") else str(v) for v in values)
+    years = metadata["years"]
+    metadata["year_min"], metadata["year_max"] = (int(years[0]), int(years[-1])) if years else (None, None)
+    return metadata
+
+
+def write_metadata(dataframe: pd.DataFrame, csv_path: Union[str, Path]) -> Path:
+    """Ghi metadata cạnh CSV (gọi ngay sau khi ghi CSV để dấu vân tay khớp)."""
+    path = metadata_path(csv_path)
+    # Ghi file tạm rồi đổi tên: tiến trình khác (worker nạp lại nóng) không đọc phải file ghi dở
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(build_metadata(dataframe, csv_path), ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+    print(f"Saved to: {path}")
+    return path
+
+
+def read_metadata(csv_path: Union[str, Path]) -> Optional[dict]:
+    """Metadata của CSV nếu có và còn khớp (cùng phiên bản, cùng dấu vân tay); không thì None."""
+    csv_path, path = Path(csv_path), metadata_path(csv_path)
+    if not (csv_path.exists() and path.exists()):
+        return None
+    try:
+        metadata = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if metadata.get("version") != METADATA_VERSION or metadata.get("fingerprint") != dataset_fingerprint(csv_path):
+        return None
+    return metadata
@@ -0,0 +1,133 @@
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Bảng danh mục: mỗi kết quả phân tích 1 dòng
+CATALOG_TABLE = "_results"
+# Cột khóa được đánh index nếu bảng có
+KEY_COLUMNS = ("NOC", "Region", "Sport", "Year", "Games", "Sex", "Medal", "Metric", "Event", "ID")
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _records(frame: pd.DataFrame):
+    """Các dòng dạng tuple Python thuần (NaN/NA -> NULL) cho executemany."""
+    columns = []
+    for name in frame.columns:
+        values = np.array(frame[name].astype(object), dtype=object)
+        values[pd.isna(frame[name]).to_numpy()] = None
+        if pd.api.types.is_integer_dtype(frame[name].dtype) or pd.api.types.is_bool_dtype(frame[name].dtype):
+            values = [None if v is None else int(v) for v in values]
+        elif pd.api.types.is_float_dtype(frame[name].dtype):
+            values = [None if v is None else float(v) for v in values]
+        else:
+            values = [None if v is None else str(v) for v in values]
+        columns.append(values)
+    return zip(*columns) if columns else iter(())
+
+
+class ResultsStore:
+    """
+    Kho kết quả phân tích gộp trong 1 file SQLite: mỗi kết quả 1 bảng, index trên cột khóa
+    (NOC, Sport, Year, ...), danh mục trong bảng _results. Mỗi lần ghi là 1 ảnh chụp đầy đủ
+    của 1 lần ingest, trong 1 transaction.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: tự quản lý BEGIN/COMMIT để cả lần ghi là 1 transaction
+        return sqlite3.connect(self.path, isolation_level=None)
+
+    def write(self, tables: Dict[str, pd.DataFrame], sources: Optional[Dict[str, str]] = None) -> "ResultsStore":
+        """
+        Thay toàn bộ kho bằng các bảng này trong 1 transaction: bảng của lần ghi trước không còn
+        trong tables bị xóa, danh mục dựng lại. Lỗi giữa chừng thì rollback, kho cũ giữ nguyên.
+        sources: tên bảng -> đường dẫn CSV tương ứng (ghi vào danh mục).
+        """
+        sources = sources or {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            existing = [
+                row[0] for row in
+                conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+            ]
+            # Kết quả lần ingest này không sinh ra nữa -> xóa, tránh trông như vẫn còn hiệu lực
+            for name in existing:
+                if name not in tables:
+                    conn.execute(f"DROP TABLE {_quote(name)}")
+            conn.execute(
+                f"CREATE TABLE {CATALOG_TABLE} "
+                "(name TEXT PRIMARY KEY, rows INTEGER, key_columns TEXT, csv_path TEXT)"
+            )
+            for name, frame in tables.items():
+                table = _quote(name)
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                columns = ", ".join(f"{_quote(c)} {_sql_type(frame[c].dtype)}" for c in frame.columns)
+                conn.execute(f"CREATE TABLE {table} ({columns})")
+                placeholders = ", ".join("?" for _ in frame.columns)
+                conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", _records(frame))
+                # Cột đếm trùng tên khóa (vd. Series "Medal" = số huy chương) thì không đánh index
+                keys = [
+                    c for c in KEY_COLUMNS
+                    if c in frame.columns and (c in ("Year", "ID") or not pd.api.types.is_numeric_dtype(frame[c].dtype))
+                ]
+                for column in keys:
+                    conn.execute(f"CREATE INDEX {_quote(f'ix_{name}_{column}')} ON {table} ({_quote(column)})")
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {CATALOG_TABLE} VALUES (?, ?, ?, ?)",
+                    (name, len(frame), ",".join(keys), sources.get(name)),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self
+
+    def tables(self) -> pd.DataFrame:
+        """Danh mục các kết quả trong kho."""
+        return self.query(f"SELECT * FROM {CATALOG_TABLE} ORDER BY name")
+
+    def read(self, name: str, columns: Optional[Sequence[str]] = None, **filters) -> pd.DataFrame:
+        """
+        Đọc 1 kết quả bằng 1 truy vấn; filters lọc bằng nhau theo cột (giá trị list -> IN),
+        vd. store.read("country_country_performance", NOC="VIE").
+        """
+        selected = ", ".join(_quote(c) for c in columns) if columns else "*"
+        clauses: List[str] = []
+        params: List = []
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set, np.ndarray)):
+                values = list(value)
+                clauses.append(f"{_quote(column)} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+            else:
+                clauses.append(f"{_quote(column)} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query(f"SELECT {selected} FROM {_quote(name)}{where}", params)
+
+    def query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=list(params))
+        finally:
+            conn.close()
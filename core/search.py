@@ -0,0 +1,235 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+
+# Ký tự lớn nhất: q + PREFIX_END là cận trên của mọi chuỗi bắt đầu bằng q
+PREFIX_END = "\U0010ffff"
+
+
+def normalize_text(values) -> pd.Series:
+    """Chữ thường, bỏ dấu (kể cả đ), chỉ giữ chữ/số, các khoảng trắng gộp làm 1."""
+    text = pd.Series(values, dtype="object").fillna("").astype(str)
+    text = text.str.replace("đ", "d").str.replace("Đ", "D")
+    text = text.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    return text.str.lower().str.replace(r"[^a-z0-9]+", " ", regex=True).str.strip()
+
+
+def normalize_query(query) -> str:
+    """normalize_text cho 1 chuỗi (không qua pandas: mỗi lần gõ phím chỉ tốn vài µs)."""
+    text = str(query or "").replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def _trigrams(text: str):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AthleteIndex:
+    """
+    Chỉ mục VĐV dựng 1 lần:
+    - ID -> các dòng: vị trí dòng sắp theo ID, tra bằng searchsorted (O(log n)).
+    - Tên chuẩn hóa: mảng token đã sắp xếp cho tìm theo tiền tố (typeahead),
+      và chỉ mục trigram (dạng CSR) cho tìm chuỗi con khi tiền tố không đủ kết quả.
+    """
+
+    def __init__(self, dataframe: pd.DataFrame, medal_types: Sequence[str] = ("Gold", "Silver", "Bronze")):
+        self.dataframe = dataframe
+        ids = dataframe["ID"].to_numpy(dtype=np.int64)
+        self.row_order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[self.row_order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]) if len(ids) else np.array([], dtype=np.intp)
+        self.ids = sorted_ids[starts]
+        self.bounds = np.r_[starts, len(ids)]
+
+        # Thông tin tóm tắt mỗi VĐV (lấy từ dòng đầu tiên theo ID)
+        first_rows = self.row_order[starts]
+        athlete_codes = np.repeat(np.arange(len(self.ids)), np.diff(self.bounds))
+        is_medal = dataframe["Medal"].isin(medal_types).to_numpy()[self.row_order] if "Medal" in dataframe.columns \
+            else np.zeros(len(ids), dtype=bool)
+        name_column = dataframe["Name"] if "Name" in dataframe.columns else dataframe["ID"].astype(str)
+        self.summary = pd.DataFrame({
+            "ID": self.ids,
+            "Name": name_column.to_numpy()[first_rows],
+            "NOC": dataframe["NOC"].to_numpy()[first_rows],
+            "Sport": dataframe["Sport"].to_numpy()[first_rows],
+            "Entries": np.diff(self.bounds),
+            "Medals": np.bincount(athlete_codes[is_medal], minlength=len(self.ids)),
+        })
+        self.names = normalize_text(self.summary["Name"]).to_numpy(dtype=object)
+
+        # Token -> VĐV, sắp theo token để tìm tiền tố bằng searchsorted
+        tokens = pd.Series(self.names).str.split().explode().dropna()
+        tokens = tokens[tokens != ""]
+        order = np.argsort(tokens.to_numpy(dtype=str), kind="stable")
+        self.tokens = tokens.to_numpy(dtype=object)[order]
+        self.token_athletes = tokens.index.to_numpy(dtype=np.int64)[order]
+
+        # Trigram -> VĐV (CSR: postings[indptr[k]:indptr[k+1]] của trigram k)
+        grams = [(gram, i) for i, name in enumerate(self.names) for gram in _trigrams(name)]
+        gram_codes, gram_values = pd.factorize(pd.Series([g for g, _ in grams], dtype=object), sort=True)
+        athletes = np.fromiter((i for _, i in grams), dtype=np.int64, count=len(grams))
+        order = np.lexsort((athletes, gram_codes))
+        self.gram_postings = athletes[order]
+        self.gram_indptr = np.searchsorted(gram_codes[order], np.arange(len(gram_values) + 1))
+        self.gram_lookup = {gram: k for k, gram in enumerate(gram_values)}
+
+    # ---------- ID ----------
+
+    def rows(self, athlete_id: int) -> np.ndarray:
+        """Vị trí các dòng (iloc) của 1 VĐV; rỗng nếu không có."""
+        k = np.searchsorted(self.ids, athlete_id)
+        if k >= len(self.ids) or self.ids[k] != athlete_id:
+            return np.array([], dtype=np.intp)
+        return self.row_order[self.bounds[k]:self.bounds[k + 1]]
+
+    def athlete(self, athlete_id: int) -> Optional[dict]:
+        """Tóm tắt + các dòng của 1 VĐV (sắp theo Year), None nếu không có ID."""
+        rows = self.rows(athlete_id)
+        if len(rows) == 0:
+            return None
+        k = int(np.searchsorted(self.ids, athlete_id))
+        history = self.dataframe.iloc[rows]
+        sort_cols = [c for c in ["Year", "Event"] if c in history.columns]
+        return {
+            "summary": self.summary.iloc[k].to_dict(),
+            "rows": history.sort_values(sort_cols, kind="stable") if sort_cols else history,
+        }
+
+    # ---------- Tên ----------
+
+    def _prefix_matches(self, word: str) -> np.ndarray:
+        """VĐV có token bắt đầu bằng word (có thể lặp nếu nhiều token cùng khớp)."""
+        lo = np.searchsorted(self.tokens, word, side="left")
+        hi = np.searchsorted(self.tokens, word + PREFIX_END, side="left")
+        return self.token_athletes[lo:hi]
+
+    def _substring_matches(self, query: str) -> np.ndarray:
+        # Trigram không đệm: query có thể nằm giữa tên
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        postings = []
+        for gram in grams:
+            k = self.gram_lookup.get(gram)
+            if k is None:
+                return np.array([], dtype=np.int64)
+            postings.append(self.gram_postings[self.gram_indptr[k]:self.gram_indptr[k + 1]])
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        return np.array([i for i in candidates if query in self.names[i]], dtype=np.int64)
+
+    def search(self, query: str, limit: int = 10) -> pd.DataFrame:
+        """
+        Typeahead: ID chính xác, rồi các tên có mọi từ của query là tiền tố của 1 token,
+        rồi (nếu chưa đủ limit) tên chứa query. Trong mỗi nhóm ưu tiên nhiều huy chương.
+        """
+        query = str(query or "").strip()
+        if not query:
+            return self.summary.iloc[0:0]
+        groups = []
+        if query.isdigit():
+            k = np.searchsorted(self.ids, int(query))
+            if k < len(self.ids) and self.ids[k] == int(query):
+                groups.append(np.array([k]))
+        normalized = normalize_query(query)
+        words = normalized.split()
+        if words:
+            # Bắt đầu từ từ ít kết quả nhất, lọc dần bằng các từ còn lại
+            postings = sorted((self._prefix_matches(word) for word in words), key=len)
+            matches = np.unique(postings[0]) if len(postings) > 1 else postings[0]
+            for posting in postings[1:]:
+                matches = matches[np.isin(matches, posting)]
+            groups.append(matches)
+            if len(matches) < limit and len(normalized) >= 3:
+                groups.append(self._substring_matches(normalized))
+        medals = self.summary["Medals"].to_numpy()
+        picked, seen = [], set()
+        for group in groups:
+            if len(group) > limit + len(picked):
+                # Chỉ sắp limit + số đã chọn VĐV nhiều huy chương nhất, không sắp cả nhóm
+                keep = min(len(group), limit + len(picked))
+                group = group[np.argpartition(-medals[group], keep - 1)[:keep]]
+            ranked = group[np.lexsort((self.names[group].astype(str), -medals[group]))] if len(group) else group
+            for i in ranked.tolist():
+                if i not in seen:
+                    seen.add(i)
+                    picked.append(i)
+                if len(picked) >= limit:
+                    break
+            if len(picked) >= limit:
+                break
+        return self.summary.iloc[picked].reset_index(drop=True)
+
+
+class TextIndex:
+    """
+    Chỉ mục ngược cho cột văn bản tự do (Event, Team): token -> các giá trị phân biệt
+    -> các dòng. Chỉ tách token trên giá trị phân biệt (vài nghìn), không trên từng dòng;
+    tra cứu = searchsorted tiền tố + gom danh sách dòng của các giá trị khớp.
+    """
+
+    def __init__(self, dataframe: pd.DataFrame, columns: Sequence[str] = ("Event", "Team")):
+        self.n_rows = len(dataframe)
+        self.columns = [c for c in columns if c in dataframe.columns]
+        self._fields = {}
+        for column in self.columns:
+            codes, values = pd.factorize(dataframe[column])
+            # Giá trị k -> dòng: row_order[row_indptr[k]:row_indptr[k + 1]] (NaN = -1 nằm đầu, bị bỏ qua)
+            row_order = np.argsort(codes, kind="stable")
+            row_indptr = np.searchsorted(codes[row_order], np.arange(len(values) + 1))
+            tokens = normalize_text(values).str.split().explode().dropna()
+            tokens = tokens[tokens != ""]
+            order = np.argsort(tokens.to_numpy(dtype=str), kind="stable")
+            self._fields[column] = {
+                "values": values,
+                "tokens": tokens.to_numpy(dtype=object)[order],
+                "token_values": tokens.index.to_numpy(dtype=np.int64)[order],
+                "row_order": row_order,
+                "row_indptr": row_indptr,
+            }
+
+    def value_codes(self, column: str, query: str) -> np.ndarray:
+        """Mã các giá trị của column có mọi từ trong query là tiền tố của 1 token."""
+        return self._value_codes(column, normalize_query(query).split())
+
+    def _value_codes(self, column: str, words: Sequence[str]) -> np.ndarray:
+        field = self._fields[column]
+        if not words:
+            return np.array([], dtype=np.int64)
+        matches = None
+        for word in words:
+            lo = np.searchsorted(field["tokens"], word, side="left")
+            hi = np.searchsorted(field["tokens"], word + PREFIX_END, side="left")
+            found = np.unique(field["token_values"][lo:hi])
+            matches = found if matches is None else np.intersect1d(matches, found, assume_unique=True)
+            if len(matches) == 0:
+                break
+        return matches
+
+    def values(self, query: str, column: str) -> list:
+        """Các giá trị phân biệt của column khớp query (gợi ý cho người dùng)."""
+        return list(self._fields[column]["values"][self.value_codes(column, query)])
+
+    def mask(self, query: str, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Mảng bool theo dòng: dòng có giá trị khớp query ở ít nhất 1 cột."""
+        selected = np.zeros(self.n_rows, dtype=bool)
+        words = normalize_query(query).split()
+        for column in (columns or self.columns):
+            field = self._fields[column]
+            codes = self._value_codes(column, words)
+            if len(codes) == 0:
+                continue
+            starts, ends = field["row_indptr"][codes], field["row_indptr"][codes + 1]
+            selected[np.concatenate([field["row_order"][s:e] for s, e in zip(starts, ends)])] = True
+        return selected
+
+    def rows(self, query: str, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Vị trí dòng (iloc, tăng dần) khớp query."""
+        return np.flatnonzero(self.mask(query, columns))
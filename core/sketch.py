@@ -0,0 +1,285 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+PHYSIQUE_METRICS = ("Height", "Weight", "BMI")
+# Biên bin cố định cho histogram; ngoài khoảng rơi vào 2 ô tràn (dưới / trên).
+# Height/Weight là số thực (dữ liệu gốc phần lớn là số nguyên, ô thiếu được điền bằng trung bình
+# nhóm nên có phần lẻ) -> bin rộng 1 (cm / kg), BMI rộng 0.25. Phân vị nội suy tuyến tính trong bin
+# chứa nó nên sai lệch tối đa ~1 độ rộng bin: ~1 cm / 1 kg, ~0.25 BMI; ô tràn trải tới min / max.
+PHYSIQUE_BIN_EDGES = {
+    "Height": np.arange(119.5, 231.0, 1.0),
+    "Weight": np.arange(24.5, 216.0, 1.0),
+    "BMI": np.arange(10.0, 60.25, 0.25),
+}
+PERCENTILES = (5, 25, 50, 75, 95)
+SKETCH_KEYS = ("Sport", "Sex")
+
+
+def _group_moments(codes: np.ndarray, values: np.ndarray, n_groups: int):
+    """count / mean / M2 / min / max theo mã nhóm của 1 khối (1 lượt bincount)."""
+    count = np.bincount(codes, minlength=n_groups).astype(float)
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    mean = np.divide(total, count, out=np.zeros(n_groups), where=count > 0)
+    m2 = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n_groups)
+    vmin = np.full(n_groups, np.inf)
+    vmax = np.full(n_groups, -np.inf)
+    np.minimum.at(vmin, codes, values)
+    np.maximum.at(vmax, codes, values)
+    return count, mean, m2, vmin, vmax
+
+
+def _combine_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """Gộp 2 bộ moment Welford (Chan et al.), theo từng phần tử."""
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    ratio = np.divide(count_b, count, out=np.zeros_like(count), where=count > 0)
+    mean = mean_a + delta * ratio
+    m2 = m2_a + m2_b + delta ** 2 * count_a * ratio
+    return count, mean, m2
+
+
+class PhysiqueSketch:
+    """
+    Bộ tích lũy gộp được cho Height/Weight/BMI theo từng nhóm Sport × Sex:
+    moment Welford (count, mean, M2, min, max) + histogram bin cố định.
+    Xây theo từng khối (update), gộp giữa các phân vùng (merge), rồi cắt theo
+    bộ lọc môn / giới tính (summary, histogram) mà không quét lại dữ liệu gốc.
+    """
+
+    def __init__(self, bin_edges: Optional[Dict[str, Sequence[float]]] = None):
+        edges = bin_edges if bin_edges is not None else PHYSIQUE_BIN_EDGES
+        self.bin_edges = {m: np.asarray(edges[m], dtype=float) for m in PHYSIQUE_METRICS}
+        self.keys = []
+        self._key_index = {}
+        n_metrics = len(PHYSIQUE_METRICS)
+        self.count = np.zeros((0, n_metrics))
+        self.mean = np.zeros((0, n_metrics))
+        self.m2 = np.zeros((0, n_metrics))
+        self.vmin = np.full((0, n_metrics), np.inf)
+        self.vmax = np.full((0, n_metrics), -np.inf)
+        # Mỗi chỉ số: (nhóm × (số bin + 2)); ô 0 = dưới edges[0], ô cuối = từ edges[-1] trở lên
+        self.hist = {m: np.zeros((0, len(e) + 1), dtype=np.int64) for m, e in self.bin_edges.items()}
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, chunk_size: int = 100_000, **kwargs) -> "PhysiqueSketch":
+        """Xây sketch từ DataFrame, mỗi lần update chunk_size dòng."""
+        sketch = cls(**kwargs)
+        for start in range(0, len(frame), chunk_size):
+            sketch.update(frame.iloc[start:start + chunk_size])
+        return sketch
+
+    @classmethod
+    def combine(cls, sketches: Iterable["PhysiqueSketch"]) -> "PhysiqueSketch":
+        """Gộp nhiều sketch (vd. mỗi phân vùng 1 sketch) thành sketch mới."""
+        result = None
+        for sketch in sketches:
+            if result is None:
+                result = cls(bin_edges=sketch.bin_edges)
+            result.merge(sketch)
+        return result if result is not None else cls()
+
+    def _group_ids(self, keys: Sequence[Tuple[str, str]]) -> np.ndarray:
+        """Mã nhóm toàn cục của các khóa; khóa mới được thêm vào cuối."""
+        new = [k for k in dict.fromkeys(keys) if k not in self._key_index]
+        if new:
+            for key in new:
+                self._key_index[key] = len(self.keys)
+                self.keys.append(key)
+            pad = ((0, len(new)), (0, 0))
+            self.count = np.pad(self.count, pad)
+            self.mean = np.pad(self.mean, pad)
+            self.m2 = np.pad(self.m2, pad)
+            self.vmin = np.pad(self.vmin, pad, constant_values=np.inf)
+            self.vmax = np.pad(self.vmax, pad, constant_values=-np.inf)
+            self.hist = {m: np.pad(h, pad) for m, h in self.hist.items()}
+        return np.array([self._key_index[k] for k in keys], dtype=np.intp)
+
+    def _absorb(self, ids, count, mean, m2, vmin, vmax, hist):
+        """Cộng thống kê của các nhóm ids (mỗi id 1 lần) vào trạng thái hiện tại."""
+        self.count[ids], self.mean[ids], self.m2[ids] = _combine_moments(
+            self.count[ids], self.mean[ids], self.m2[ids], count, mean, m2
+        )
+        self.vmin[ids] = np.minimum(self.vmin[ids], vmin)
+        self.vmax[ids] = np.maximum(self.vmax[ids], vmax)
+        for metric in PHYSIQUE_METRICS:
+            self.hist[metric][ids] += hist[metric]
+
+    def update(self, frame: pd.DataFrame) -> "PhysiqueSketch":
+        """Tích lũy 1 khối dòng (cần cột Sport, Sex, Height, Weight)."""
+        if frame.empty:
+            return self
+        local_codes, local_keys = pd.factorize(
+            pd.MultiIndex.from_arrays([frame[k] for k in SKETCH_KEYS])
+        )
+        seen = local_codes >= 0
+        local_codes = local_codes[seen]
+        ids = self._group_ids(list(local_keys))
+        n_local = len(ids)
+        height = frame["Height"].to_numpy(dtype=float)[seen]
+        weight = frame["Weight"].to_numpy(dtype=float)[seen]
+        columns = {"Height": height, "Weight": weight, "BMI": weight / (height / 100) ** 2}
+
+        stats = [np.zeros((n_local, len(PHYSIQUE_METRICS))) for _ in range(3)]
+        vmin = np.full((n_local, len(PHYSIQUE_METRICS)), np.inf)
+        vmax = np.full((n_local, len(PHYSIQUE_METRICS)), -np.inf)
+        hist = {}
+        for j, metric in enumerate(PHYSIQUE_METRICS):
+            values = columns[metric]
+            valid = np.isfinite(values)
+            codes, values = local_codes[valid], values[valid]
+            for target, part in zip(stats + [vmin, vmax], _group_moments(codes, values, n_local)):
+                target[:, j] = part
+            edges = self.bin_edges[metric]
+            slots = np.searchsorted(edges, values, side="right")
+            width = len(edges) + 1
+            hist[metric] = np.bincount(codes * width + slots, minlength=n_local * width).reshape(n_local, width)
+        self._absorb(ids, *stats, vmin, vmax, hist)
+        return self
+
+    def merge(self, other: "PhysiqueSketch") -> "PhysiqueSketch":
+        """Gộp sketch khác (cùng biên bin) vào sketch này."""
+        for metric in PHYSIQUE_METRICS:
+            if not np.array_equal(self.bin_edges[metric], other.bin_edges[metric]):
+                raise ValueError(f"Biên bin {metric} khác nhau, không gộp được")
+        if other.keys:
+            ids = self._group_ids(other.keys)
+            self._absorb(ids, other.count, other.mean, other.m2, other.vmin, other.vmax, other.hist)
+        return self
+
+    # ---------- Truy vấn ----------
+
+    def _select(self, sports=None, sexes=None) -> np.ndarray:
+        """Chỉ số các nhóm khớp bộ lọc môn / giới tính (None = tất cả)."""
+        mask = np.ones(len(self.keys), dtype=bool)
+        if sports:
+            allowed = set(sports)
+            mask &= np.array([k[0] in allowed for k in self.keys], dtype=bool)
+        if sexes:
+            allowed = set(sexes)
+            mask &= np.array([k[1] in allowed for k in self.keys], dtype=bool)
+        return np.flatnonzero(mask)
+
+    def _rollup(self, sports=None, sexes=None, by: Sequence[str] = SKETCH_KEYS):
+        """Gộp các nhóm đã chọn theo các cột trong by; trả về (index, count, mean, m2, vmin, vmax, hist)."""
+        unknown = set(by) - set(SKETCH_KEYS)
+        if unknown:
+            raise ValueError(f"by chỉ nhận {SKETCH_KEYS}, không có {sorted(unknown)}")
+        rows = self._select(sports, sexes)
+        positions = [SKETCH_KEYS.index(b) for b in by]
+        labels = [tuple(self.keys[i][p] for p in positions) for i in rows]
+        codes, uniques = pd.factorize(pd.Series(labels, dtype=object), sort=True)
+        n_out = len(uniques)
+        count = np.zeros((n_out, len(PHYSIQUE_METRICS)))
+        total = np.zeros_like(count)
+        np.add.at(count, codes, self.count[rows])
+        np.add.at(total, codes, self.count[rows] * self.mean[rows])
+        mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+        m2 = np.zeros_like(count)
+        np.add.at(m2, codes, self.m2[rows] + self.count[rows] * (self.mean[rows] - mean[codes]) ** 2)
+        vmin = np.full_like(count, np.inf)
+        vmax = np.full_like(count, -np.inf)
+        np.minimum.at(vmin, codes, self.vmin[rows])
+        np.maximum.at(vmax, codes, self.vmax[rows])
+        hist = {}
+        for metric, h in self.hist.items():
+            hist[metric] = np.zeros((n_out, h.shape[1]), dtype=np.int64)
+            np.add.at(hist[metric], codes, h[rows])
+        if by:
+            index = pd.MultiIndex.from_tuples(list(uniques), names=list(by)) if len(by) > 1 \
+                else pd.Index([u[0] for u in uniques], name=by[0])
+        else:
+            index = pd.Index(["All"], name="Group")
+            if n_out == 0:
+                count, mean, m2 = (np.zeros((1, len(PHYSIQUE_METRICS))) for _ in range(3))
+                vmin = np.full_like(count, np.inf)
+                vmax = np.full_like(count, -np.inf)
+                hist = {m: np.zeros((1, h.shape[1]), dtype=np.int64) for m, h in self.hist.items()}
+        return index, count, mean, m2, vmin, vmax, hist
+
+    def _slot_bounds(self, metric: str, vmin: float, vmax: float):
+        """Cận trái/phải của từng ô histogram; 2 ô tràn lấy min/max quan sát được."""
+        edges = self.bin_edges[metric]
+        left = np.concatenate([[min(vmin, edges[0])], edges])
+        right = np.concatenate([edges, [max(vmax, edges[-1])]])
+        return left, right
+
+    def _percentiles(self, metric: str, hist_row: np.ndarray, vmin: float, vmax: float, pcts) -> np.ndarray:
+        """Phân vị xấp xỉ từ histogram (nội suy tuyến tính trong bin), kẹp trong [min, max]."""
+        n = hist_row.sum()
+        if n == 0:
+            return np.full(len(pcts), np.nan)
+        left, right = self._slot_bounds(metric, vmin, vmax)
+        cumulative = np.cumsum(hist_row)
+        targets = np.asarray(pcts, dtype=float) / 100 * n
+        slots = np.minimum(np.searchsorted(cumulative, targets, side="left"), len(hist_row) - 1)
+        before = cumulative[slots] - hist_row[slots]
+        frac = np.divide(targets - before, hist_row[slots], out=np.zeros(len(pcts)), where=hist_row[slots] > 0)
+        values = left[slots] + frac * (right[slots] - left[slots])
+        return np.clip(values, vmin, vmax)
+
+    def summary(
+        self,
+        sports: Optional[Sequence[str]] = None,
+        sexes: Optional[Sequence[str]] = None,
+        by: Sequence[str] = SKETCH_KEYS,
+        percentiles: Sequence[int] = PERCENTILES,
+    ) -> pd.DataFrame:
+        """
+        Bảng N, Mean, Std, Min, P.., Max cho từng nhóm (gộp theo by) và chỉ số,
+        index = (*by, Metric). by=() gộp toàn bộ các nhóm đã chọn.
+        """
+        by = tuple(by)
+        index, count, mean, m2, vmin, vmax, hist = self._rollup(sports, sexes, by)
+        records = []
+        for i, label in enumerate(index):
+            key = label if isinstance(label, tuple) else (label,)
+            for j, metric in enumerate(PHYSIQUE_METRICS):
+                n = count[i, j]
+                record = dict(zip(index.names, key))
+                record["Metric"] = metric
+                record["N"] = int(n)
+                record["Mean"] = mean[i, j] if n > 0 else np.nan
+                record["Std"] = np.sqrt(m2[i, j] / (n - 1)) if n > 1 else np.nan
+                record["Min"] = vmin[i, j] if n > 0 else np.nan
+                for p, value in zip(percentiles, self._percentiles(metric, hist[metric][i], vmin[i, j], vmax[i, j], percentiles)):
+                    record[f"P{p}"] = value
+                record["Max"] = vmax[i, j] if n > 0 else np.nan
+                records.append(record)
+        columns = list(index.names) + ["Metric", "N", "Mean", "Std", "Min"] + [f"P{p}" for p in percentiles] + ["Max"]
+        table = pd.DataFrame(records, columns=columns).set_index(list(index.names) + ["Metric"])
+        return table.round(2)
+
+    def histogram(
+        self,
+        metric: str,
+        sports: Optional[Sequence[str]] = None,
+        sexes: Optional[Sequence[str]] = None,
+        by: Sequence[str] = (),
+    ) -> pd.DataFrame:
+        """
+        Histogram của 1 chỉ số (BinLeft, BinRight, Count), gộp theo by.
+        Bỏ các bin rỗng ở 2 đầu; ô tràn dùng min/max quan sát được làm cận.
+        """
+        if metric not in PHYSIQUE_METRICS:
+            raise ValueError(f"metric phải thuộc {PHYSIQUE_METRICS}")
+        by = tuple(by)
+        j = PHYSIQUE_METRICS.index(metric)
+        index, count, mean, m2, vmin, vmax, hist = self._rollup(sports, sexes, by)
+        frames = []
+        for i, label in enumerate(index):
+            row = hist[metric][i]
+            nonzero = np.flatnonzero(row)
+            if len(nonzero) == 0:
+                continue
+            left, right = self._slot_bounds(metric, vmin[i, j], vmax[i, j])
+            keep = slice(nonzero[0], nonzero[-1] + 1)
+            part = pd.DataFrame({"BinLeft": left[keep], "BinRight": right[keep], "Count": row[keep]})
+            if by:
+                key = label if isinstance(label, tuple) else (label,)
+                for name, value in zip(index.names, key):
+                    part.insert(len(part.columns) - 3, name, value)
+            frames.append(part)
+        if not frames:
+            return pd.DataFrame(columns=list(by) + ["BinLeft", "BinRight", "Count"])
+        return pd.concat(frames, ignore_index=True)
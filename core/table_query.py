@@ -0,0 +1,112 @@
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 1 điều kiện trong filter_query của DataTable, vd. {Name} icontains "phelps", {Age} >= 20
+# (tiền tố i/s = không phân biệt / phân biệt hoa thường); các điều kiện nối bằng &&
+_CLAUSE = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s*"
+    r"(?:(?P<null>is (?:not )?(?:blank|nil))|(?P<case>[is]?)(?P<op>>=|<=|!=|=|<|>|(?:contains|datestartswith|eq|ne|lt|le|gt|ge)\b))"
+    r"\s*(?P<value>.*)$"
+)
+_SYMBOLS = {">=": "ge", "<=": "le", "!=": "ne", "=": "eq", "<": "lt", ">": "gt"}
+_COMPARE = {
+    "eq": np.equal, "ne": np.not_equal, "lt": np.less,
+    "le": np.less_equal, "gt": np.greater, "ge": np.greater_equal,
+}
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1].replace("\\" + value[0], value[0])
+    return value
+
+
+def parse_filter_query(query: Optional[str]) -> List[Tuple[str, str, Optional[str], bool]]:
+    """
+    filter_query của DataTable -> [(column, op, value, case_sensitive)], op thuộc
+    eq/ne/lt/le/gt/ge/contains/datestartswith/blank/notblank. Điều kiện không đọc được -> ValueError.
+    """
+    clauses = []
+    for part in (query or "").split(" && "):
+        part = part.strip()
+        if not part:
+            continue
+        match = _CLAUSE.match(part)
+        if match is None:
+            raise ValueError(f"Không hiểu điều kiện lọc: {part}")
+        if match["null"]:
+            clauses.append((match["column"], "notblank" if " not " in match["null"] else "blank", None, True))
+            continue
+        op = match["op"]
+        clauses.append((match["column"], _SYMBOLS.get(op, op), _unquote(match["value"]), match["case"] != "i"))
+    return clauses
+
+
+def _clause_mask(values: pd.Series, op: str, value: Optional[str], case_sensitive: bool) -> np.ndarray:
+    if op in ("blank", "notblank"):
+        blank = values.isna().to_numpy()
+        if not pd.api.types.is_numeric_dtype(values.dtype):
+            # isna() của cột chuỗi có thể trả mảng chỉ đọc -> không dùng |=
+            blank = blank | (values.astype(object).fillna("").astype(str).str.strip() == "").to_numpy()
+        return blank if op == "blank" else ~blank
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype) and op in _COMPARE:
+        try:
+            number = float(value)
+        except ValueError:
+            return np.full(len(values), op == "ne")
+        with np.errstate(invalid="ignore"):
+            return _COMPARE[op](values.to_numpy(dtype=float, na_value=np.nan), number)
+    # Cột chuỗi / category: so trên các giá trị phân biệt rồi trải lại theo mã dòng
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(uniques, dtype=object).astype(str)
+    needle = value
+    if not case_sensitive:
+        text, needle = text.str.lower(), value.lower()
+    if op == "contains":
+        hit = text.str.contains(needle, regex=False).to_numpy()
+    elif op == "datestartswith":
+        hit = text.str.startswith(needle).to_numpy()
+    else:
+        hit = _COMPARE[op](text.to_numpy(dtype=str), needle)
+    # NaN (mã -1) chỉ thỏa "khác"
+    return np.append(hit, op == "ne")[codes]
+
+
+def filter_rows(dataframe: pd.DataFrame, query: Optional[str]) -> np.ndarray:
+    """Vị trí dòng (iloc, tăng dần) thỏa mọi điều kiện trong filter_query; cột không có -> ValueError."""
+    mask = np.ones(len(dataframe), dtype=bool)
+    for column, op, value, case_sensitive in parse_filter_query(query):
+        if column not in dataframe.columns:
+            raise ValueError(f"Không có cột {column}")
+        mask &= _clause_mask(dataframe[column], op, value, case_sensitive)
+    return np.flatnonzero(mask)
+
+
+def _sort_key(values: pd.Series, descending: bool) -> np.ndarray:
+    # Giá trị thiếu luôn nằm cuối, bất kể chiều sắp
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        return -numbers if descending else numbers
+    codes, uniques = pd.factorize(values, sort=True)
+    if descending:
+        codes = np.where(codes >= 0, len(uniques) - 1 - codes, codes)
+    return np.where(codes >= 0, codes, len(uniques))
+
+
+def sort_order(dataframe: pd.DataFrame, sort_by: Optional[Sequence[dict]]) -> np.ndarray:
+    """
+    Hoán vị dòng theo sort_by của DataTable ([{"column_id", "direction"}], cột đầu ưu tiên nhất),
+    sắp ổn định (hòa thì giữ thứ tự gốc); không sắp -> thứ tự gốc.
+    """
+    keys = [
+        _sort_key(dataframe[s["column_id"]], s.get("direction") == "desc")
+        for s in (sort_by or []) if s.get("column_id") in dataframe.columns
+    ]
+    if not keys:
+        return np.arange(len(dataframe))
+    # lexsort lấy khóa cuối làm khóa chính
+    return np.lexsort(keys[::-1])
@@ -0,0 +1,76 @@
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+Signature = Optional[Tuple[int, int]]
+
+
+def file_signature(path: Path) -> Signature:
+    """(mtime_ns, size) của file, None nếu không có."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """
+    Theo dõi file bằng cách hỏi định kỳ (mtime + size, không cần thư viện ngoài). File đổi (kể cả
+    mới xuất hiện / bị xóa) và đứng yên thêm 1 chu kỳ (đã ghi xong) -> on_change([các path đổi]),
+    gọi trong luồng của watcher. start() chạy nền (tự chạy lại trong tiến trình con sau fork).
+    """
+
+    def __init__(self, paths: Iterable[Union[str, Path]], on_change: Callable[[List[Path]], None], interval: float = 2.0):
+        self.paths = [Path(p) for p in paths]
+        self.on_change = on_change
+        self.interval = interval
+        self._seen: Dict[Path, Signature] = {p: file_signature(p) for p in self.paths}
+        # Thay đổi vừa thấy, chờ 1 chu kỳ nữa để chắc file đã ghi xong
+        self._pending: Dict[Path, Signature] = {}
+        self._stop = threading.Event()
+        self._running = False
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    def _after_fork(self):
+        if self._running and not self._stop.is_set():
+            self._spawn()
+
+    def poll(self) -> List[Path]:
+        """1 lượt kiểm tra; trả về các file đã đổi và ổn định (không gọi on_change)."""
+        changed = []
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature == self._seen[path]:
+                self._pending.pop(path, None)
+            elif path in self._pending and self._pending[path] == signature:
+                self._pending.pop(path)
+                self._seen[path] = signature
+                changed.append(path)
+            else:
+                self._pending[path] = signature
+        return changed
+
+    def start(self) -> None:
+        self._running = True
+        self._spawn()
+
+    def _spawn(self):
+        def run():
+            while not self._stop.wait(self.interval):
+                changed = self.poll()
+                if not changed:
+                    continue
+                try:
+                    self.on_change(changed)
+                except Exception as e:
+                    print(f"[Watcher] Lỗi khi xử lý {[p.name for p in changed]}: {e}")
+
+        threading.Thread(target=run, name="file-watcher", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,18 @@
+"""Cấu hình gunicorn: gunicorn -c gunicorn.conf.py (giá trị lấy từ wsgi.GUNICORN_OPTIONS)."""
+
+import sys
+from pathlib import Path
+
+# gunicorn chạy file cấu hình trước khi thêm thư mục dự án vào sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from wsgi import GUNICORN_OPTIONS
+
+wsgi_app = "wsgi:create_app()"
+bind = GUNICORN_OPTIONS["bind"]
+workers = GUNICORN_OPTIONS["workers"]
+threads = GUNICORN_OPTIONS["threads"]
+worker_class = GUNICORN_OPTIONS["worker_class"]
+timeout = GUNICORN_OPTIONS["timeout"]
+preload_app = GUNICORN_OPTIONS["preload_app"]
+post_fork = GUNICORN_OPTIONS["post_fork"]
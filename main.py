@@ -5,9 +5,11 @@ Chạy: python main.py
 """
 
 import argparse
+import json
 import subprocess
 import sys
 import time
+import urllib.request
 import webbrowser
 from pathlib import Path
 
@@ -16,54 +18,73 @@ from lib import install
 installer = install.RequirementsInstaller()
 installer.install_packages()
 
-from core import file, data_cleaner, analysis, visualization
+from core import file, data_cleaner, analysis, visualization, engine, metadata
 
 # step 1: set up file manager and read file
 file_manager = file.FileManager("data/athlete_events.csv")
 dataFrame = file_manager.read_file()
 
-# step 2: clean data
+# step 2: clean data (kèm cột Region nếu có data/noc_regions.csv)
+noc_regions = file_manager.read_noc_regions()
 cleaner = data_cleaner.DataCleaner(dataFrame)
-cleaner.run_full_olympic_cleaning()
+cleaner.run_full_olympic_cleaning(noc_regions=noc_regions)
 
 # step 3: save data
+# File CSV không kèm cột mã nội bộ; phân tích bên dưới vẫn dùng dataFrame có mã
 dataFrame = cleaner.get_data()
-file_manager.save_data(dataFrame, "output/csv/cleaned_data.csv")
+exportFrame = cleaner.get_export_data()
+file_manager.save_data(exportFrame, "output/csv/cleaned_data.csv")
+# Metadata kèm theo (dropdown, số dòng, dấu vân tay): web dựng layout không cần nạp cả CSV
+metadata.write_metadata(exportFrame, Path(__file__).resolve().parent / "output/csv/cleaned_data.csv")
 
 # step 4: analysis data + chạy full phân tích và lưu CSV vào output/csv
-data_analysis = analysis.DataAnalysis(dataFrame)
-data_analysis.ingest(output_dir="output/csv")
+# Engine chọn qua OLYMPIC_ANALYSIS_ENGINE (pandas | duckdb); duckdb truy vấn trên output/parquet/cleaned_data.parquet
+data_analysis = engine.create_analysis(dataFrame, parquet_path=engine.CLEANED_PARQUET)
+# Kèm kho kết quả gộp output/results.sqlite (mỗi kết quả 1 bảng có index); cây CSV vẫn giữ
+data_analysis.ingest(output_dir="output/csv", store_path="output/results.sqlite")
 
 # step 5: visualization - xuất biểu đồ vào output/chart
 vis = visualization.Visualization(data_analysis)
 vis.run_all(output_dir=Path("output/chart"))
 
 # step 6: (tùy chọn) Bật web Dash với animation mượt mà
+HEALTH_URL = "http://127.0.0.1:8050/healthz"
+# Thời gian chờ tối đa (giây) cho tới khi /healthz báo sẵn sàng (nạp dữ liệu + warmup)
+STARTUP_TIMEOUT = 180
+
+def wait_until_ready(proc, timeout=STARTUP_TIMEOUT):
+    """Hỏi /healthz tới khi server sẵn sàng; trả về False nếu tiến trình thoát hoặc quá thời gian."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(HEALTH_URL, timeout=2) as response:
+                if json.load(response).get("ready"):
+                    return True
+        except OSError:
+            pass  # chưa mở cổng / 503 khi đang warmup
+        time.sleep(0.5)
+    return False
+
 def main():
     parser = argparse.ArgumentParser(description="BTL Olympic: pipeline + web Dash")
     parser.add_argument("--no-web", action="store_true", help="Chỉ chạy pipeline, không mở Dash")
     args = parser.parse_args()
 
     if args.no_web:
-        print("Đã xong pipeline. Bật web sau với: python app_dash.py")
+        print("Đã xong pipeline. Bật web sau với: python wsgi.py (dev: python app_dash.py)")
         return
 
     root = Path(__file__).resolve().parent
-    proc = subprocess.Popen(
-        [sys.executable, "app_dash.py"],
-        cwd=root,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    time.sleep(7)
-    if proc.poll() is not None:
-        err = proc.stderr.read() or proc.stdout.read()
-        print("❌ Dash thoát ngay. Chạy trong terminal:")
+    # Server production (wsgi.py: gunicorn nhiều worker nếu có); log in thẳng ra terminal này
+    proc = subprocess.Popen([sys.executable, "wsgi.py"], cwd=root)
+    if not wait_until_ready(proc):
+        print("❌ Dash không khởi động được (xem log ở trên). Chạy trong terminal:")
         print("   cd", root)
-        print("   ", sys.executable, "app_dash.py")
-        if err:
-            print("\n--- Lỗi ---\n", err)
+        print("   ", sys.executable, "wsgi.py")
+        if proc.poll() is None:
+            proc.terminate()
     else:
         webbrowser.open("http://127.0.0.1:8050")
         print("✅ Web Dash đã bật: http://127.0.0.1:8050")
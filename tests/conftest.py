@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Chạy pytest từ bất kỳ đâu vẫn import được core.*
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,90 @@
+import time
+
+from core.cache import LRUCache, MemoryBudget
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    cache = LRUCache(max_bytes=300, sizeof=lambda value: 100)
+    for key in "abc":
+        cache.put(key, key.upper())
+    # Dùng lại "a" -> "b" thành mục cũ nhất
+    assert cache.get("a") == "A"
+    cache.put("d", "D")
+    assert "b" not in cache and all(key in cache for key in "acd")
+    assert cache.stats()["bytes"] == 300 and cache.evictions == 1
+    # Mục lớn chiếm chỗ nhiều mục nhỏ
+    cache.put("big", "BIG", size=250)
+    assert [key for key, _, _ in cache.entries()] == ["big"]
+
+
+def test_lru_rejects_value_over_budget_and_counts_hits():
+    cache = LRUCache(max_bytes=100, sizeof=lambda value: len(value))
+    assert not cache.put("huge", "x" * 101)
+    assert "huge" not in cache
+    assert cache.get("huge") is None
+    computed = []
+    assert cache.get_or_compute("k", lambda: computed.append(1) or "v") == "v"
+    assert cache.get_or_compute("k", lambda: computed.append(1) or "w") == "v"
+    assert computed == [1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_lru_replace_and_invalidate():
+    cache = LRUCache(max_bytes=1000, sizeof=lambda value: value)
+    cache.put(("cleaned", 1), 100)
+    cache.put(("cleaned", 1), 300)
+    cache.put(("raw", 1), 200)
+    assert cache.stats()["bytes"] == 500
+    assert cache.invalidate(lambda key: key[0] == "cleaned") == 1
+    assert len(cache) == 1 and cache.stats()["bytes"] == 200
+    assert cache.evict(("raw", 1)) and not cache.evict(("raw", 1))
+    assert cache.stats()["bytes"] == 0
+
+
+class FakeStore:
+    """Kho giả cho MemoryBudget: key -> (bytes, lần dùng cuối)."""
+
+    def __init__(self, **entries):
+        self.items = dict(entries)
+        self.evicted = []
+
+    def entries(self):
+        return [(key, size, used) for key, (size, used) in self.items.items()]
+
+    def evict(self, key):
+        if self.items.pop(key, None) is None:
+            return False
+        self.evicted.append(key)
+        return True
+
+
+def test_memory_budget_evicts_oldest_across_stores():
+    now = time.monotonic()
+    datasets = FakeStore(cleaned=(500, now - 30), raw=(400, now - 50))
+    results = FakeStore(fig1=(100, now - 40), fig2=(100, now - 1))
+    budget = MemoryBudget(max_bytes=650)
+    budget.register("datasets", datasets)
+    budget.register("results", results)
+    assert budget.enforce() == 2
+    assert datasets.evicted == ["raw"] and results.evicted == ["fig1"]
+    assert budget.usage() == {"datasets": 500, "results": 100}
+    # Đã vừa ngân sách -> không bỏ thêm
+    assert budget.enforce() == 0
+
+
+def test_memory_budget_idle_eviction_and_exemption():
+    now = time.monotonic()
+    datasets = FakeStore(cleaned=(500, now - 100), raw=(400, now - 90))
+    results = FakeStore(fig=(10, now - 80), fresh=(10, now))
+    budget = MemoryBudget(max_bytes=10_000, idle_seconds=60)
+    budget.register("datasets", datasets, idle_exempt=lambda key: key == "cleaned")
+    budget.register("results", results)
+    # Dưới ngân sách: chỉ bỏ mục idle; "cleaned" miễn idle dù cũ nhất và đứng trước các mục idle
+    assert budget.enforce() == 2
+    assert datasets.evicted == ["raw"] and results.evicted == ["fig"]
+    assert budget.idle_evictions == 2
+    # Mục miễn idle vẫn bị bỏ khi vượt ngân sách byte
+    budget.max_bytes = 100
+    assert budget.enforce() == 1 and datasets.evicted == ["raw", "cleaned"]
+    assert results.items.keys() == {"fresh"}
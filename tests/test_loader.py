@@ -0,0 +1,136 @@
+import threading
+
+from core.loader import ERROR, READY, SingleFlightLoader
+
+
+class Generation:
+    """Giá trị giả lập 1 thế hệ dữ liệu."""
+
+    def __init__(self, key, number):
+        self.key = key
+        self.number = number
+
+
+def test_concurrent_get_shares_one_load():
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def load(key, report):
+        calls.append(key)
+        report("đọc file")
+        started.set()
+        release.wait(5)
+        return Generation(key, len(calls))
+
+    loader = SingleFlightLoader(load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(loader.get("cleaned"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    assert loader.state()["cleaned"]["stage"] == "đọc file"
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == ["cleaned"]
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert loader.state()["cleaned"]["status"] == READY
+
+
+def test_failed_load_reaches_every_waiter_then_retries():
+    attempts = []
+    release = threading.Event()
+
+    def load(key, report):
+        attempts.append(key)
+        if len(attempts) == 1:
+            release.wait(5)
+            raise OSError("hỏng file")
+        return Generation(key, len(attempts))
+
+    loader = SingleFlightLoader(load)
+    errors = []
+
+    def get():
+        try:
+            loader.get("raw")
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 4 and attempts == ["raw"]
+    assert loader.state()["raw"]["status"] == ERROR
+    assert loader.get("raw").number == 2
+
+
+def test_reload_swaps_generation_while_old_holder_keeps_previous():
+    count = [0]
+    reloading = threading.Event()
+    release = threading.Event()
+
+    def load(key, report):
+        count[0] += 1
+        if count[0] > 1:
+            reloading.set()
+            release.wait(5)
+        return Generation(key, count[0])
+
+    loader = SingleFlightLoader(load)
+    held = loader.get("cleaned")
+    prepared = []
+    thread = threading.Thread(target=lambda: loader.reload("cleaned", prepare=prepared.append))
+    thread.start()
+    assert reloading.wait(5)
+    # Đang nạp lại: get() vẫn trả thế hệ cũ
+    assert loader.get("cleaned") is held
+    assert "reloading" in loader.state()["cleaned"]
+    release.set()
+    thread.join(5)
+    current = loader.get("cleaned")
+    assert current is not held and current.number == 2
+    assert prepared == [current]
+    # Người giữ thế hệ cũ không bị đổi dữ liệu giữa chừng
+    assert held.number == 1
+
+
+def test_invalidate_during_load_is_not_stored():
+    count = [0]
+    started = threading.Event()
+    release = threading.Event()
+
+    def load(key, report):
+        count[0] += 1
+        started.set()
+        release.wait(5)
+        return Generation(key, count[0])
+
+    loader = SingleFlightLoader(load)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(loader.get("cleaned")))
+    thread.start()
+    assert started.wait(5)
+    loader.invalidate("cleaned")
+    release.set()
+    thread.join(5)
+    assert result[0].number == 1
+    assert loader.peek("cleaned") is None
+    assert loader.get("cleaned").number == 2
+
+
+def test_entries_and_evict():
+    evicted = []
+    loader = SingleFlightLoader(
+        lambda key, report: Generation(key, 1),
+        sizeof=lambda key, value: 100,
+        on_evicted=evicted.append,
+    )
+    loader.get("cleaned")
+    assert [(key, size) for key, size, _ in loader.entries()] == [("cleaned", 100)]
+    assert loader.evict("cleaned") and not loader.evict("cleaned")
+    assert evicted == ["cleaned"] and loader.entries() == []
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.sketch import PHYSIQUE_METRICS, PhysiqueSketch
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    n = 3000
+    height = rng.normal(178, 9, n).round(1)
+    weight = rng.normal(74, 11, n).round(1)
+    height[rng.choice(n, 100, replace=False)] = np.nan
+    return pd.DataFrame({
+        "Sport": rng.choice(["Athletics", "Rowing", "Judo", "Archery"], n),
+        "Sex": rng.choice(["M", "F"], n),
+        "Height": height,
+        "Weight": weight,
+    })
+
+
+def _assert_same(a: PhysiqueSketch, b: PhysiqueSketch):
+    order_a = np.argsort([str(k) for k in a.keys])
+    order_b = np.argsort([str(k) for k in b.keys])
+    assert [a.keys[i] for i in order_a] == [b.keys[i] for i in order_b]
+    np.testing.assert_array_equal(a.count[order_a], b.count[order_b])
+    np.testing.assert_allclose(a.mean[order_a], b.mean[order_b], rtol=1e-12)
+    np.testing.assert_allclose(a.m2[order_a], b.m2[order_b], rtol=1e-9)
+    np.testing.assert_array_equal(a.vmin[order_a], b.vmin[order_b])
+    np.testing.assert_array_equal(a.vmax[order_a], b.vmax[order_b])
+    for metric in PHYSIQUE_METRICS:
+        np.testing.assert_array_equal(a.hist[metric][order_a], b.hist[metric][order_b])
+
+
+def test_merge_equals_single_pass(frame):
+    single = PhysiqueSketch().update(frame)
+    # Mỗi phân vùng thấy tập nhóm khác nhau (và thứ tự khóa khác nhau)
+    parts = [frame.iloc[:700], frame.iloc[700:710], frame.iloc[710:]]
+    merged = PhysiqueSketch.combine(PhysiqueSketch().update(part) for part in parts)
+    _assert_same(merged, single)
+    chunked = PhysiqueSketch.from_frame(frame, chunk_size=256)
+    _assert_same(chunked, single)
+
+
+def test_merged_moments_match_pandas(frame):
+    merged = PhysiqueSketch.from_frame(frame, chunk_size=500)
+    table = merged.summary(by=("Sport",))
+    expected = frame.assign(BMI=frame["Weight"] / (frame["Height"] / 100) ** 2).groupby("Sport")
+    for metric in PHYSIQUE_METRICS:
+        rows = table.xs(metric, level="Metric")
+        assert rows["N"].to_dict() == expected[metric].count().to_dict()
+        np.testing.assert_allclose(rows["Mean"], expected[metric].mean().round(2), atol=0.006)
+        np.testing.assert_allclose(rows["Std"], expected[metric].std().round(2), atol=0.006)
+
+
+def test_percentiles_within_one_bin(frame):
+    table = PhysiqueSketch().update(frame).summary(by=()).xs("All", level="Group")
+    for metric, width in (("Height", 1.0), ("Weight", 1.0)):
+        values = frame[metric].dropna()
+        for p in (5, 25, 50, 75, 95):
+            assert abs(table.loc[metric, f"P{p}"] - np.percentile(values, p)) <= width
+
+
+def test_merge_rejects_different_bins():
+    edges = {"Height": [150, 200], "Weight": [50, 100], "BMI": [15, 30]}
+    with pytest.raises(ValueError):
+        PhysiqueSketch().merge(PhysiqueSketch(bin_edges=edges))
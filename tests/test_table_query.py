@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.table_query import filter_rows, parse_filter_query, sort_order
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "Name": ["Michael Phelps", "usain bolt", None, "Larisa Latynina", ""],
+        "Age": [23, 22, np.nan, 30, 19],
+        "NOC": pd.Categorical(["USA", "JAM", "USA", "URS", None]),
+    })
+
+
+def test_parse_filter_query_grammar():
+    clauses = parse_filter_query('{Name} icontains "phelps" && {Age} >= 20 && {NOC} is blank && {Team} scontains Ja')
+    assert clauses == [
+        ("Name", "contains", "phelps", False),
+        ("Age", "ge", "20", True),
+        ("NOC", "blank", None, True),
+        ("Team", "contains", "Ja", True),
+    ]
+    assert parse_filter_query("{Age} = 23") == [("Age", "eq", "23", True)]
+    assert parse_filter_query("{Name} != 'a \\' b'") == [("Name", "ne", "a ' b", True)]
+    assert parse_filter_query("{Age} is not nil") == [("Age", "notblank", None, True)]
+    assert parse_filter_query(None) == [] and parse_filter_query("  ") == []
+
+
+@pytest.mark.parametrize("query", ["Age > 20", "{Age} ~ 20", "{Age} >= 20 && oops", "{Name}"])
+def test_parse_filter_query_rejects_bad_clause(query):
+    with pytest.raises(ValueError):
+        parse_filter_query(query)
+
+
+def test_filter_rows(frame):
+    assert filter_rows(frame, '{Name} icontains "BOLT"').tolist() == [1]
+    assert filter_rows(frame, '{Name} contains "Bolt"').tolist() == []
+    assert filter_rows(frame, "{Age} >= 22 && {Age} < 30").tolist() == [0, 1]
+    assert filter_rows(frame, "{Name} is blank").tolist() == [2, 4]
+    assert filter_rows(frame, "{NOC} = USA").tolist() == [0, 2]
+    # NaN chỉ thỏa "khác"
+    assert filter_rows(frame, "{NOC} != USA").tolist() == [1, 3, 4]
+    assert filter_rows(frame, "{Age} > abc").tolist() == []
+    assert filter_rows(frame, "").tolist() == [0, 1, 2, 3, 4]
+
+
+def test_filter_rows_unknown_column(frame):
+    with pytest.raises(ValueError):
+        filter_rows(frame, "{Height} > 180")
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+@pytest.mark.parametrize("column", ["Age", "NOC"])
+def test_sort_order_missing_last(frame, column, direction):
+    order = sort_order(frame, [{"column_id": column, "direction": direction}])
+    values = frame[column].iloc[order]
+    n_missing = int(values.isna().sum())
+    assert n_missing > 0
+    assert values.iloc[len(values) - n_missing:].isna().all()
+    present = values.iloc[:len(values) - n_missing].tolist()
+    assert present == sorted(present, reverse=direction == "desc")
+
+
+def test_sort_order_stable_and_multi_column(frame):
+    # Hòa thì giữ thứ tự gốc; cột đầu ưu tiên nhất
+    order = sort_order(frame, [{"column_id": "NOC", "direction": "asc"}, {"column_id": "Age", "direction": "desc"}])
+    assert order.tolist() == [1, 3, 0, 2, 4]
+    assert sort_order(frame, None).tolist() == [0, 1, 2, 3, 4]
+    assert sort_order(frame, [{"column_id": "Missing", "direction": "asc"}]).tolist() == [0, 1, 2, 3, 4]
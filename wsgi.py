@@ -0,0 +1,95 @@
+"""
+Chạy web Dash ở chế độ production (nhiều worker, dữ liệu nạp trước khi fork).
+Chạy: gunicorn -c gunicorn.conf.py          (dùng wsgi_app = "wsgi:create_app()")
+      python wsgi.py                         (gunicorn nếu đã cài, không thì server Flask đa luồng)
+Cấu hình qua biến môi trường: OLYMPIC_BIND, OLYMPIC_WORKERS, OLYMPIC_THREADS, OLYMPIC_TIMEOUT, OLYMPIC_WARMUP
+(nạp lại nóng khi file dữ liệu đổi: OLYMPIC_HOT_RELOAD, OLYMPIC_WATCH_INTERVAL).
+"""
+
+import os
+
+# gunicorn là tùy chọn (không chạy trên Windows); không có thì dùng server Flask đa luồng 1 tiến trình
+try:
+    from gunicorn.app.base import BaseApplication
+    HAS_GUNICORN = True
+except ImportError:
+    HAS_GUNICORN = False
+
+BIND = os.environ.get("OLYMPIC_BIND", "127.0.0.1:8050")
+# Mỗi worker là 1 tiến trình (dùng chung trang bộ nhớ dataset nhờ preload), mỗi worker nhiều thread
+WORKERS = int(os.environ.get("OLYMPIC_WORKERS", str(min(4, os.cpu_count() or 1))))
+THREADS = int(os.environ.get("OLYMPIC_THREADS", "4"))
+# Callback nặng đầu tiên (dữ liệu gốc, không lọc) có thể mất vài giây
+TIMEOUT = int(os.environ.get("OLYMPIC_TIMEOUT", "120"))
+WARMUP = os.environ.get("OLYMPIC_WARMUP", "1") != "0"
+
+def post_fork(server, worker):
+    """Mỗi worker tự theo dõi file dữ liệu và nạp lại thế hệ của riêng nó (master không phục vụ request)."""
+    import app_dash
+
+    app_dash.start_hot_reload()
+
+
+GUNICORN_OPTIONS = {
+    "bind": BIND,
+    "workers": WORKERS,
+    "threads": THREADS,
+    "worker_class": "gthread",
+    "timeout": TIMEOUT,
+    # Nạp app (dataset + warmup) trong master trước khi fork -> worker chia sẻ copy-on-write
+    "preload_app": True,
+    "post_fork": post_fork,
+}
+
+
+def create_app(warmup: bool = WARMUP):
+    """
+    App factory WSGI: import dashboard (nạp dataset), warmup cache rồi trả về Flask server.
+    warmup=False: bỏ qua bước dựng sẵn, /healthz báo sẵn sàng ngay.
+    """
+    import app_dash
+
+    if warmup:
+        app_dash.warmup()
+    else:
+        # Vẫn nạp dataset trước khi fork (preload) để worker dùng chung
+        app_dash.get_cached_data(use_cleaned=True)
+        app_dash.READINESS["ready"] = True
+    # Chờ các nguồn còn đang nạp nền (OLYMPIC_PRELOAD): worker fork sau đó dùng chung, không nạp lại
+    app_dash.DATA_LOADER.wait()
+    return app_dash.app.server
+
+
+if HAS_GUNICORN:
+    class DashApplication(BaseApplication):
+        """Chạy gunicorn ngay trong Python (python wsgi.py) với GUNICORN_OPTIONS."""
+
+        def __init__(self, options=None):
+            self.options = dict(GUNICORN_OPTIONS, **(options or {}))
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return create_app()
+
+
+def main():
+    if HAS_GUNICORN:
+        print(f"[WSGI] gunicorn {WORKERS} worker x {THREADS} thread tại http://{BIND}")
+        DashApplication().run()
+        return
+    host, port = BIND.rsplit(":", 1)
+    print("[WSGI] Chưa cài gunicorn -> server Flask đa luồng, 1 tiến trình (pip install gunicorn)")
+    server = create_app()
+    import app_dash
+    app_dash.start_hot_reload()
+    print(f"[WSGI] Mở trình duyệt: http://{BIND}")
+    server.run(host=host, port=int(port), threaded=True, debug=False)
+
+
+if __name__ == "__main__":
+    main()